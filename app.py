@@ -1,6 +1,7 @@
 """
 Render-compatible ASGI application wrapper
 Imports FastAPI app from backend and exposes it for gunicorn
+(database init and model loading happen in the app lifespan)
 """
 
 import os
@@ -14,52 +15,10 @@ sys.path.insert(0, backend_path)
 if not os.getenv('DATABASE_URL'):
     os.environ['DATABASE_URL'] = 'sqlite:///./navi_mumbai_house.db'
 
-# Database initialization
-try:
-    from sqlalchemy import create_engine
-    from sqlalchemy.orm import sessionmaker
-    from models import Base, Locality
-    from database import engine, SessionLocal
-
-    # Create tables
-    Base.metadata.create_all(bind=engine)
-    
-    # Add localities if not present
-    db = SessionLocal()
-    existing_count = db.query(Locality).count()
-    
-    if existing_count == 0:
-        print("Seeding 14 localities...")
-        localities_data = [
-            {"name": "Kharghar", "node_type": "Residential", "metro_distance_km": 8.5, "highway_distance_km": 2.0, "avg_price_per_sqft": 8500},
-            {"name": "Vashi", "node_type": "Mixed", "metro_distance_km": 0.5, "highway_distance_km": 3.0, "avg_price_per_sqft": 12000},
-            {"name": "Panvel", "node_type": "Residential", "metro_distance_km": 15.0, "highway_distance_km": 5.0, "avg_price_per_sqft": 6500},
-            {"name": "Nerul", "node_type": "CBD", "metro_distance_km": 2.0, "highway_distance_km": 4.0, "avg_price_per_sqft": 11000},
-            {"name": "Belapur", "node_type": "CBD", "metro_distance_km": 3.0, "highway_distance_km": 5.0, "avg_price_per_sqft": 10500},
-            {"name": "Airoli", "node_type": "Residential", "metro_distance_km": 7.0, "highway_distance_km": 2.5, "avg_price_per_sqft": 9500},
-            {"name": "Ulwe", "node_type": "Emerging", "metro_distance_km": 18.0, "highway_distance_km": 6.0, "avg_price_per_sqft": 5500},
-            {"name": "Dronagiri", "node_type": "Emerging", "metro_distance_km": 20.0, "highway_distance_km": 7.0, "avg_price_per_sqft": 5000},
-            {"name": "CBD Belapur", "node_type": "CBD", "metro_distance_km": 1.0, "highway_distance_km": 4.5, "avg_price_per_sqft": 13000},
-            {"name": "Seawoods", "node_type": "Premium", "metro_distance_km": 5.0, "highway_distance_km": 6.0, "avg_price_per_sqft": 15000},
-            {"name": "Koparkhairane", "node_type": "Residential", "metro_distance_km": 6.0, "highway_distance_km": 3.5, "avg_price_per_sqft": 10000},
-            {"name": "Ghansoli", "node_type": "Residential", "metro_distance_km": 12.0, "highway_distance_km": 4.0, "avg_price_per_sqft": 8000},
-            {"name": "Kamothe", "node_type": "Residential", "metro_distance_km": 16.0, "highway_distance_km": 5.5, "avg_price_per_sqft": 7000},
-            {"name": "Taloje", "node_type": "Industrial", "metro_distance_km": 20.0, "highway_distance_km": 2.0, "avg_price_per_sqft": 4500}
-        ]
-        
-        for loc_data in localities_data:
-            locality = Locality(**loc_data)
-            db.add(locality)
-        
-        db.commit()
-        print(f"✓ Seeded {len(localities_data)} localities")
-    else:
-        print(f"✓ Database already has {existing_count} localities")
-    
-    db.close()
-
-except Exception as e:
-    print(f"Database initialization warning: {e}")
+# Tables and seed localities are created in the app lifespan, not at
+# import time, and heavy ML imports wait until first use (cold start)
+os.environ.setdefault('INIT_DB_ON_STARTUP', 'true')
+os.environ.setdefault('LAZY_STARTUP', 'true')
 
 # Import and expose the FastAPI app
 from main import app
@@ -0,0 +1,43 @@
+"""
+Backfill the daily trend rollup table from existing predictions and properties
+
+Usage:
+    python backfill_trends.py                    # rebuild everything
+    python backfill_trends.py --since 2026-01-01 # rebuild from a day onwards
+"""
+
+import argparse
+import logging
+from datetime import date
+
+from database import engine, SessionLocal, Base
+from models import LocalityDailyStat
+from services.trend_rollup import backfill
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild locality_daily_stats")
+    parser.add_argument("--since", type=date.fromisoformat, default=None,
+                        help="First day (YYYY-MM-DD) to rebuild; defaults to all history")
+    args = parser.parse_args()
+
+    # Create the rollup table if this database predates it
+    Base.metadata.create_all(bind=engine, tables=[LocalityDailyStat.__table__])
+
+    db = SessionLocal()
+    try:
+        written = backfill(db, since=args.since)
+        logger.info(f"Rollup rows written: {written}")
+    except Exception as e:
+        logger.error(f"Backfill failed: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
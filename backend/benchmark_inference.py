@@ -0,0 +1,94 @@
+"""
+Benchmark the compiled NumPy ensemble against the stock XGBoost predictor
+
+Loads the published model bundle (train with
+`python ../ml/model_trainer.py` first), checks that both predictors agree
+and reports single-row latency and batch throughput for each. The
+crossover batch size is what COMPILED_INFERENCE_MAX_ROWS should be set to.
+
+Usage:
+    python benchmark_inference.py
+    python benchmark_inference.py --batch-sizes 1 16 64 256 --repeat 500
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from services.model_registry import ModelRegistry
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _time_call(fn, matrix: np.ndarray, repeat: int) -> float:
+    """Median seconds per call"""
+    fn(matrix)  # warm-up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(matrix)
+        samples.append(time.perf_counter() - started)
+    return float(np.median(samples))
+
+
+def _sample_matrix(handle, n_rows: int, rng: np.random.Generator) -> np.ndarray:
+    """Feature rows spread over the range each feature is split on, in the model's input space"""
+    compiled = handle.compiled
+    # Real (not virtual categorical) columns of split nodes; leaves have NaN thresholds
+    numeric = (compiled.feature < compiled.n_features) & ~np.isnan(compiled.threshold)
+    low = np.zeros(compiled.n_features)
+    high = np.ones(compiled.n_features)
+    for j in range(compiled.n_features):
+        thresholds = compiled.threshold[numeric & (compiled.feature == j)]
+        if len(thresholds):
+            low[j], high[j] = thresholds.min(), thresholds.max()
+    matrix = rng.uniform(low, high, (n_rows, compiled.n_features))
+    if handle.scaler is not None:
+        matrix = handle.scaler.inverse_transform(matrix)
+    if "locality" in handle.feature_names and handle.locality_codes:
+        column = handle.feature_names.index("locality")
+        matrix[:, column] = rng.integers(0, len(handle.locality_codes), n_rows)
+    return matrix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled vs stock inference benchmark")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64, 512, 4096])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    registry.load()
+    handle = registry.get()
+    if not handle.is_ready:
+        raise SystemExit("Model artifacts not found; train a model first")
+    if handle.compiled is None:
+        raise SystemExit("No compiled ensemble for this model; publish a bundle with ModelTrainer.save_model()")
+
+    # Time the model call alone: scale up front for models that still use a scaler
+    prepare = handle.scaler.transform if handle.scaler is not None else np.asarray
+    rng = np.random.default_rng(args.seed)
+    check = prepare(_sample_matrix(handle, 10_000, rng))
+    stock_pred = handle.model.predict(check)
+    compiled_pred = handle.compiled.predict(check)
+    max_rel = float(np.max(np.abs(stock_pred - compiled_pred) / np.maximum(np.abs(stock_pred), 1.0)))
+    logger.info(f"{handle.compiled.n_trees} trees, max depth {handle.compiled.max_depth}; "
+                f"max relative difference over 10,000 rows: {max_rel:.2e}")
+
+    logger.info(f"{'batch':>6} {'stock µs/call':>14} {'compiled µs/call':>17} "
+                f"{'stock rows/s':>13} {'compiled rows/s':>16} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        matrix = prepare(_sample_matrix(handle, batch_size, rng))
+        repeat = max(5, args.repeat // max(1, batch_size // 64))
+        stock = _time_call(handle.model.predict, matrix, repeat)
+        compiled = _time_call(handle.compiled.predict, matrix, repeat)
+        logger.info(f"{batch_size:>6} {stock * 1e6:>14,.0f} {compiled * 1e6:>17,.0f} "
+                    f"{batch_size / stock:>13,.0f} {batch_size / compiled:>16,.0f} {stock / compiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Benchmark SQLite with the stock engine against the tuned profile
+
+Runs the same mixed workload against a fresh database file for each
+profile: writer threads that each insert one Prediction row (with its
+trend rollup) and commit, like /predict without write-behind, and reader
+threads that fetch the latest predictions for a locality, like
+/prediction/history.
+
+- stock: the driver defaults (rollback journal, synchronous=FULL)
+- wal: database.create_sqlite_engine (WAL, synchronous=NORMAL, mmap,
+  cache, busy timeout, sized pool), writes on the DB pool
+- wal+writer: the same engine with writes funnelled through one writer
+  thread, as services.executors.run_db_write does with SQLITE_SINGLE_WRITER
+
+Reads run on a DB_EXECUTOR_WORKERS thread pool in every profile, like
+run_db in the app.
+
+Reports write and read QPS, latency percentiles and how many operations
+failed with "database is locked".
+
+Usage:
+    python benchmark_sqlite.py
+    python benchmark_sqlite.py --writers 8 --readers 8 --seconds 10 --dir /var/data
+"""
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from config import get_settings
+from database import Base, create_sqlite_engine
+from models import Locality, Prediction
+from services.trend_rollup import record_predictions
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+N_LOCALITIES = 14
+SEED_ROWS = 20000
+
+
+def _prediction(rng: random.Random) -> Prediction:
+    area = rng.uniform(400, 2000)
+    price = area * rng.uniform(6000, 20000)
+    return Prediction(
+        locality_id=rng.randint(1, N_LOCALITIES),
+        bhk=rng.randint(1, 4),
+        carpet_area_sqft=area,
+        predicted_total_price=price,
+        predicted_price_per_sqft=price / area,
+        confidence_score=0.85,
+        lower_bound=price * 0.9,
+        upper_bound=price * 1.1,
+        model_version="benchmark",
+        created_at=datetime.utcnow(),
+    )
+
+
+def _prepare(session_factory, engine):
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(0)
+    db = session_factory()
+    try:
+        db.add_all(Locality(id=i, name=f"Locality {i}") for i in range(1, N_LOCALITIES + 1))
+        db.flush()
+        records = [_prediction(rng) for _ in range(SEED_ROWS)]
+        db.add_all(records)
+        record_predictions(db, records)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _write(session_factory, rng: random.Random):
+    db = session_factory()
+    try:
+        record = _prediction(rng)
+        db.add(record)
+        record_predictions(db, [record])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _read(session_factory, rng: random.Random):
+    db = session_factory()
+    try:
+        return db.query(Prediction).filter(
+            Prediction.locality_id == rng.randint(1, N_LOCALITIES)
+        ).order_by(Prediction.created_at.desc()).limit(10).all()
+    finally:
+        db.close()
+
+
+PROFILES = ("stock", "wal", "wal+writer")
+
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float, directory: str = ".") -> dict:
+    """Run the mixed workload against a fresh database; returns QPS, latencies and lock errors"""
+    settings = get_settings()
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        engine = create_sqlite_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", settings, tuned=profile != "stock")
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        _prepare(session_factory, engine)
+        # Same shape as services/executors.py
+        db_pool = ThreadPoolExecutor(max_workers=settings.DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+        if profile == "wal+writer":
+            writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        else:
+            writer = db_pool
+
+        latencies = {"write": [], "read": []}
+        locked = {"write": 0, "read": 0}
+        deadline = time.perf_counter() + seconds
+        record_lock = threading.Lock()
+
+        def client(kind: str, seed: int):
+            rng = random.Random(seed)
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    if kind == "read":
+                        db_pool.submit(_read, session_factory, rng).result()
+                    else:
+                        writer.submit(_write, session_factory, rng).result()
+                except OperationalError as e:
+                    if "locked" not in str(e):
+                        raise
+                    with record_lock:
+                        locked[kind] += 1
+                    continue
+                elapsed = time.perf_counter() - started
+                with record_lock:
+                    latencies[kind].append(elapsed)
+
+        threads = [threading.Thread(target=client, args=("write", i)) for i in range(writers)]
+        threads += [threading.Thread(target=client, args=("read", 1000 + i)) for i in range(readers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        writer.shutdown(wait=True)
+        db_pool.shutdown(wait=True)
+        engine.dispose()
+
+    result = {"elapsed": elapsed}
+    for kind in ("write", "read"):
+        samples = np.array(latencies[kind]) * 1e3
+        result[kind] = {
+            "qps": len(samples) / elapsed,
+            "p50_ms": float(np.percentile(samples, 50)) if len(samples) else float("nan"),
+            "p99_ms": float(np.percentile(samples, 99)) if len(samples) else float("nan"),
+            "locked": locked[kind],
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stock vs tuned SQLite benchmark")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--dir", default=".",
+                        help="Where to create the scratch databases (use the disk the real database is on)")
+    args = parser.parse_args()
+
+    logger.info(f"{args.writers} writer and {args.readers} reader threads, {args.seconds:g}s per profile")
+    logger.info(f"{'profile':<11} {'op':<6} {'qps':>9} {'p50 ms':>9} {'p99 ms':>9} {'locked':>7}")
+    results = {}
+    for profile in PROFILES:
+        results[profile] = run_profile(profile, args.writers, args.readers, args.seconds, args.dir)
+        for kind in ("write", "read"):
+            row = results[profile][kind]
+            logger.info(f"{profile:<11} {kind:<6} {row['qps']:>9,.0f} {row['p50_ms']:>9.2f} "
+                        f"{row['p99_ms']:>9.2f} {row['locked']:>7,}")
+
+    for kind in ("write", "read"):
+        stock = results["stock"][kind]["qps"]
+        if stock > 0:
+            changes = ", ".join(
+                f"{profile} {results[profile][kind]['qps']:,.0f} ({results[profile][kind]['qps'] / stock:.1f}x)"
+                for profile in PROFILES[1:]
+            )
+            logger.info(f"{kind} QPS: stock {stock:,.0f}; {changes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Cold-start budget check: import time, lifespan startup and first prediction
+
+Runs two fresh interpreters from this directory:
+
+1. `python -X importtime -c "import main"`: total import time of the app
+   and its slowest direct imports. With LAZY_STARTUP none of the heavy ML
+   packages (HEAVY_PACKAGES) may be imported here.
+2. Import main, run the app lifespan (database init, model registry,
+   locality data) and serve one prediction, timing each step.
+
+Exits with status 1 when a heavy package is imported at startup or a step
+goes over its budget, so a regression fails CI. Timings depend on the
+machine; pass budgets that fit the target instance.
+
+Usage:
+    python check_startup.py
+    python check_startup.py --import-budget-ms 800 --startup-budget-ms 1500
+    python check_startup.py --eager            # measure LAZY_STARTUP=false for comparison
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parent
+HEAVY_PACKAGES = ("sklearn", "scipy", "pandas", "xgboost", "joblib")
+
+STARTUP_SNIPPET = """
+import json, time
+from fastapi.testclient import TestClient
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+with TestClient(main.app) as client:
+    ready = time.perf_counter()
+    response = client.post("/api/v1/prediction/predict",
+                           json={"locality_name": "Vashi", "bhk": 2, "carpet_area_sqft": 1000})
+    predicted = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1e3,
+    "lifespan_ms": (ready - imported) * 1e3,
+    "first_prediction_ms": (predicted - ready) * 1e3,
+    "status": response.status_code,
+    "model_version": response.json().get("model_version"),
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, int, str]]:
+    """(self µs, cumulative µs, depth, module) for every -X importtime line"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def check_imports(env: dict, budget_ms: float, lazy: bool) -> bool:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    total_ms = next(cumulative for _, cumulative, _, name in reversed(rows) if name == "main") / 1e3
+
+    logger.info(f"import main: {total_ms:,.0f} ms (budget {budget_ms:,.0f} ms); slowest direct imports:")
+    direct = sorted((row for row in rows if row[2] == 1), key=lambda row: -row[1])
+    for _, cumulative, _, name in direct[:10]:
+        logger.info(f"  {cumulative / 1e3:>8,.1f} ms  {name}")
+
+    ok = total_ms <= budget_ms
+    heavy = sorted({name.split(".")[0] for _, _, _, name in rows} & set(HEAVY_PACKAGES))
+    if heavy and lazy:
+        logger.error(f"Heavy packages imported at startup: {', '.join(heavy)}")
+        ok = False
+    if total_ms > budget_ms:
+        logger.error(f"Import time {total_ms:,.0f} ms is over the {budget_ms:,.0f} ms budget")
+    return ok
+
+
+def check_startup(env: dict, budget_ms: float) -> bool:
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SNIPPET],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup run failed:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    total_ms = timings["import_ms"] + timings["lifespan_ms"] + timings["first_prediction_ms"]
+
+    logger.info(f"import {timings['import_ms']:,.0f} ms, lifespan {timings['lifespan_ms']:,.0f} ms, "
+                f"first prediction {timings['first_prediction_ms']:,.0f} ms "
+                f"(HTTP {timings['status']}, model {timings['model_version']})")
+    logger.info(f"startup to first prediction: {total_ms:,.0f} ms (budget {budget_ms:,.0f} ms)")
+
+    ok = timings["status"] == 200 and total_ms <= budget_ms
+    if timings["status"] != 200:
+        logger.error(f"First prediction failed with HTTP {timings['status']}")
+    if total_ms > budget_ms:
+        logger.error(f"Startup {total_ms:,.0f} ms is over the {budget_ms:,.0f} ms budget")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import and startup budget check")
+    parser.add_argument("--import-budget-ms", type=float, default=1500)
+    parser.add_argument("--startup-budget-ms", type=float, default=3000)
+    parser.add_argument("--eager", action="store_true", help="Measure with LAZY_STARTUP=false")
+    parser.add_argument("--database-url", default=None,
+                        help="Database to start against (default: a fresh SQLite file)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=args.database_url or f"sqlite:///{tmp}/startup_check.db",
+            INIT_DB_ON_STARTUP="true",
+            LAZY_STARTUP="false" if args.eager else "true",
+        )
+        ok = check_imports(env, args.import_budget_ms, lazy=not args.eager)
+        ok = check_startup(env, args.startup_budget_ms) and ok
+
+    if not ok:
+        sys.exit(1)
+    logger.info("Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
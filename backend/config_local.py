@@ -20,6 +20,15 @@ class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./navi_mumbai_house.db")
     SQLALCHEMY_ECHO: bool = False
     
+    # SQLite tuning (ignored for other databases)
+    SQLITE_TUNED: bool = True  # WAL, synchronous=NORMAL and the pragmas below on every connection
+    SQLITE_SINGLE_WRITER: bool = True  # serialize writes on one thread (services/executors.py)
+    SQLITE_MMAP_SIZE_MB: int = 256
+    SQLITE_CACHE_SIZE_MB: int = 64
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_POOL_SIZE: int = 11  # DB_EXECUTOR_WORKERS + the writer thread
+    SQLITE_POOL_MAX_OVERFLOW: int = 5
+    
     # Redis Configuration (optional)
     REDIS_URL: str = "redis://localhost:6379/0"
     
@@ -27,11 +36,23 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10000  # token -> user snapshot
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60  # max staleness of a deactivated or changed user (capped at token expiry)
+    
+    # Password hashing (bcrypt runs on its own bounded pool)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32  # running + queued; beyond this register/login return 503
     
     # ML Configuration
+    MODEL_BUNDLE_DIR: str = "./models/bundles"  # versioned bundles; CURRENT names the one to serve
+    MODEL_BUNDLE_VERIFY: bool = True  # check payload sha256 against the manifest on load
+    # Legacy separate artifacts, used only when no bundle has been published
     MODEL_PATH: str = "./models/xgboost_model.pkl"
     SCALER_PATH: str = "./models/scaler.pkl"
     FEATURE_NAMES_PATH: str = "./models/feature_names.pkl"
+    COMPILED_INFERENCE_ENABLED: bool = True
+    COMPILED_INFERENCE_MAX_ROWS: int = 128  # larger batches go to the stock (native) predictor
+    MODEL_RELOAD_INTERVAL_SECONDS: int = 30  # 0 disables hot-swap polling
     
     # API Configuration
     CORS_ORIGINS: list = ["*"]
@@ -44,6 +65,70 @@ class Settings(BaseSettings):
     PREDICTION_TIMEOUT_SECONDS: int = 5
     MAX_PREDICTION_PRICE: float = 100000000  # 10 crore
     MIN_PREDICTION_PRICE: float = 500000  # 5 lakhs
+    MAX_BATCH_PREDICTION_SIZE: int = 10000
+    
+    # Inference micro-batching (coalesces concurrent /predict calls)
+    INFERENCE_BATCHING_ENABLED: bool = True
+    INFERENCE_BATCH_MAX_SIZE: int = 64
+    INFERENCE_BATCH_WINDOW_MS: float = 2.0
+    
+    # Executor pools (blocking work is kept off the event loop)
+    INFERENCE_POOL_SIZE: int = 4
+    DB_EXECUTOR_WORKERS: int = 10
+    
+    # Prediction logging (write-behind queue instead of a commit per request)
+    PREDICTION_WRITE_BEHIND: bool = False
+    PREDICTION_LOG_QUEUE_SIZE: int = 10000
+    PREDICTION_LOG_FLUSH_ROWS: int = 500
+    PREDICTION_LOG_FLUSH_INTERVAL_MS: int = 200
+    
+    # Prediction result cache (in-process LRU, optional Redis tier at REDIS_URL)
+    PREDICTION_CACHE_ENABLED: bool = True
+    PREDICTION_CACHE_MAX_ENTRIES: int = 10000
+    PREDICTION_CACHE_TTL_SECONDS: int = 3600
+    PREDICTION_CACHE_REDIS_ENABLED: bool = False
+    
+    # Locality resolver (in-memory name -> locality snapshot)
+    LOCALITY_REFRESH_INTERVAL_SECONDS: int = 300  # 0 disables background refresh
+    
+    # Rolling locality market statistics (from property transactions)
+    MARKET_STATS_WINDOW_DAYS: int = 30
+    MARKET_STATS_SWEEP_INTERVAL_SECONDS: int = 3600  # expires old day buckets; 0 disables
+    
+    # Bulk property ingestion (POST /properties/bulk)
+    BULK_INGEST_CHUNK_ROWS: int = 1000
+    BULK_INGEST_MAX_REPORTED_ERRORS: int = 100
+    
+    # Comparables engine (per-locality KD-tree over recent transactions)
+    COMPARABLES_MAX_AGE_DAYS: int = 365
+    COMPARABLES_REBUILD_THRESHOLD: int = 256  # buffered rows before a locality's tree is rebuilt
+    COMPARABLES_REFRESH_INTERVAL_SECONDS: int = 3600  # 0 disables periodic rebuilds
+    MAX_COMPARABLES: int = 50
+    
+    # Instrumentation (Prometheus text format at GET /metrics)
+    METRICS_ENABLED: bool = True
+    
+    # Admin-only operations (request profiling); empty disables them
+    ADMIN_TOKEN: str = ""
+    
+    # Request profiling (X-Admin-Token plus X-Profile: 1 or ?profile=1)
+    PROFILING_DIR: str = "./profiles"
+    PROFILING_MAX_FILES: int = 200
+    PROFILING_SAMPLE_PERCENT: float = 0.0  # also profile this share of requests under PROFILING_SAMPLE_PATHS
+    PROFILING_SAMPLE_PATHS: list = ["/api/v1/prediction", "/api/v1/trends"]
+    
+    # Tracing spans (OTLP/JSON lines under TRACE_DIR; continues incoming traceparent)
+    TRACING_ENABLED: bool = False
+    TRACE_SAMPLE_PERCENT: float = 1.0
+    TRACE_TRUST_PARENT_SAMPLED: bool = False  # obey the traceparent sampled flag (trusted gateway only)
+    TRACE_QUEUE_MAX_SPANS: int = 10000  # finished spans waiting for the writer; extra spans are dropped
+    TRACE_DIR: str = "./traces"
+    TRACE_FILE_MAX_MB: int = 50
+    TRACE_MAX_FILES: int = 10
+    
+    # Startup (cold start on small instances)
+    INIT_DB_ON_STARTUP: bool = False  # create tables and seed localities in the app lifespan
+    LAZY_STARTUP: bool = False  # defer xgboost/scikit-learn until first use, build comparables in the background
     
     # Localities supported
     SUPPORTED_LOCALITIES: list = [
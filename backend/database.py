@@ -1,8 +1,17 @@
 """
 Database configuration and session management
+
+SQLite (the single-node / Render deployment) gets a tuned profile unless
+SQLITE_TUNED is off: every pooled connection switches to WAL journaling
+with synchronous=NORMAL, a memory-mapped read path, a larger page cache,
+a busy timeout and foreign key enforcement. WAL lets readers run while a
+write is in progress and turns each commit into an append to the log
+instead of a full fsync of the database file. Writes themselves are
+serialized on one thread by services.executors.run_db_write.
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from config import get_settings
@@ -13,14 +22,74 @@ settings = get_settings()
 # Get database URL (for Render deployment, use SQLite)
 db_url = settings.DATABASE_URL
 
-# Configure engine based on database type
-if 'sqlite' in db_url:
-    # SQLite configuration (for free tier / local development)
-    engine = create_engine(
-        db_url,
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def sqlite_pragmas(settings) -> dict:
+    """PRAGMA name -> value applied to every new SQLite connection"""
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024,
+        "cache_size": -settings.SQLITE_CACHE_SIZE_MB * 1024,  # negative = KiB
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "foreign_keys": "ON",
+        "temp_store": "MEMORY",
+    }
+
+
+def create_sqlite_engine(url: str, settings, tuned: bool = True) -> Engine:
+    """
+    SQLite engine, with the tuned profile applied when `tuned` is set
+
+    Args:
+        url: sqlite:/// database URL
+        settings: Settings providing the SQLITE_* values
+        tuned: False gives the stock driver defaults (used for benchmarking)
+    """
+    if not tuned:
+        return create_engine(
+            url,
+            echo=settings.SQLALCHEMY_ECHO,
+            connect_args={"check_same_thread": False}
+        )
+
+    in_memory = url in ("sqlite://", "sqlite:///:memory:")
+    pool_args = {} if in_memory else {
+        # One connection per DB executor thread plus the writer thread
+        "pool_size": settings.SQLITE_POOL_SIZE,
+        "max_overflow": settings.SQLITE_POOL_MAX_OVERFLOW,
+        "pool_timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+    }
+    sqlite_engine = create_engine(
+        url,
         echo=settings.SQLALCHEMY_ECHO,
-        connect_args={"check_same_thread": False}
+        connect_args={
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        },
+        **pool_args
     )
+    pragmas = sqlite_pragmas(settings)
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return sqlite_engine
+
+
+# Configure engine based on database type
+if is_sqlite(db_url):
+    # SQLite configuration (for free tier / local development)
+    engine = create_sqlite_engine(db_url, settings, tuned=settings.SQLITE_TUNED)
 else:
     # PostgreSQL configuration (for production)
     engine = create_engine(
@@ -38,18 +107,6 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
-def get_db() -> Session:
-    """Dependency for getting database session"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-# Base class for models
-Base = declarative_base()
-
-
 def get_db() -> Session:
     """Dependency for getting database session"""
     db = SessionLocal()
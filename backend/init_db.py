@@ -2,7 +2,7 @@
 Database initialization and migration utilities
 """
 
-from sqlalchemy import inspect
+from sqlalchemy import inspect, text
 from database import engine, SessionLocal, Base
 from models import Locality, Property, User, Prediction, SavedEstimate
 import logging
@@ -15,9 +15,40 @@ def init_db():
     """Initialize database and create all tables"""
     logger.info("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    migrate_db()
     logger.info("Database initialization complete!")
 
 
+# Columns added to existing tables after their first release; create_all
+# only creates missing tables, so databases created earlier need these
+ADDED_COLUMNS = [
+    ("predictions", "prediction_uuid", "VARCHAR(36)",
+     "CREATE UNIQUE INDEX IF NOT EXISTS ix_predictions_prediction_uuid ON predictions (prediction_uuid)"),
+]
+
+
+def migrate_db():
+    """Add columns that older databases are missing (idempotent)"""
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    for table, column, column_type, index_ddl in ADDED_COLUMNS:
+        if table not in tables:
+            continue
+        existing = {col["name"] for col in inspector.get_columns(table)}
+        try:
+            with engine.begin() as conn:
+                if column not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+                    logger.info(f"Added column {table}.{column}")
+                conn.execute(text(index_ddl))
+        except Exception as e:
+            # Another worker may have added it first
+            columns = {col["name"] for col in inspect(engine).get_columns(table)}
+            if column not in columns:
+                raise
+            logger.info(f"Column {table}.{column} already present ({e.__class__.__name__})")
+
+
 def seed_localities():
     """Seed initial locality data"""
     db = SessionLocal()
@@ -5,16 +5,91 @@ Main application entry point
 
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from contextlib import asynccontextmanager
 import logging
 from typing import Optional
 from datetime import datetime
 
+from config import get_settings
+from services.model_registry import get_model_registry
+from services.batching import get_inference_batcher
+from services.executors import shutdown_executors
+from services.prediction_log import get_prediction_log_writer
+from services.locality_resolver import get_locality_resolver
+from services.market_stats import get_market_stats
+from services.comparables import get_comparables_index
+from services import metrics
+from services.profiling import ProfilingMiddleware
+from services import tracing
+
+
+_shared_state_loaded = False
+
+
+def load_shared_state():
+    """
+    Initialize the database and load the model and locality data (blocking,
+    no background threads)
+
+    Runs in the lifespan of every worker, unless the gunicorn master already
+    ran it before forking (see gunicorn.conf.py): the workers then inherit
+    the loaded objects copy-on-write instead of each building its own copy.
+    With LAZY_STARTUP the comparables index is left to the background
+    refresher, since building it imports scikit-learn.
+    """
+    global _shared_state_loaded
+    settings = get_settings()
+    if settings.INIT_DB_ON_STARTUP:
+        from init_db import init_db, seed_localities
+
+        init_db()
+        seed_localities()
+    get_model_registry().load()
+    try:
+        get_locality_resolver().refresh()
+        get_market_stats().sweep()
+        if not settings.LAZY_STARTUP:
+            get_comparables_index().refresh()
+    except Exception as e:
+        logger.error(f"Initial locality load failed, relying on background refresh: {e}")
+    _shared_state_loaded = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load shared resources once per process and release them on shutdown"""
+    settings = get_settings()
+    if not _shared_state_loaded:
+        load_shared_state()
+    registry = get_model_registry()
+    registry.start_watcher()
+    resolver = get_locality_resolver()
+    market_stats = get_market_stats()
+    comparables = get_comparables_index()
+    resolver.start_refresher()
+    market_stats.start_sweeper()
+    comparables.start_refresher(refresh_now=settings.LAZY_STARTUP)
+    if settings.PREDICTION_WRITE_BEHIND:
+        get_prediction_log_writer().start()
+    yield
+    await get_inference_batcher().drain()
+    # Flush-on-shutdown: every queued prediction row is written before exit
+    await get_prediction_log_writer().stop()
+    tracing.shutdown_tracing()
+    comparables.stop_refresher()
+    market_stats.stop_sweeper()
+    resolver.stop_refresher()
+    registry.stop_watcher()
+    shutdown_executors()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Navi Mumbai House Price Predictor API",
     description="ML-powered real estate valuation for Navi Mumbai",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -26,12 +101,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling (admin-flagged or sampled requests only)
+if get_settings().ADMIN_TOKEN or get_settings().PROFILING_SAMPLE_PERCENT > 0:
+    app.add_middleware(ProfilingMiddleware)
+
+# Stage spans for sampled requests, written to TRACE_DIR
+if get_settings().TRACING_ENABLED:
+    app.add_middleware(tracing.TracingMiddleware)
+    tracing.instrument_fastapi()
+
+# Request latency and DB work per route (outermost, so it times everything)
+if get_settings().METRICS_ENABLED:
+    from database import engine
+
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine(engine)
+    metrics.register_service_collectors()
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Import routers
-from routers import prediction, properties, localities, trends, auth
+from routers import prediction, properties, localities, trends, auth, admin
 
 # Include routers
 app.include_router(prediction.router, prefix="/api/v1/prediction", tags=["prediction"])
@@ -39,6 +131,7 @@ app.include_router(properties.router, prefix="/api/v1/properties", tags=["proper
 app.include_router(localities.router, prefix="/api/v1/localities", tags=["localities"])
 app.include_router(trends.router, prefix="/api/v1/trends", tags=["trends"])
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 
 
 @app.get("/health")
@@ -47,10 +140,19 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "service": "Navi Mumbai House Price Predictor"
+        "service": "Navi Mumbai House Price Predictor",
+        "model_version": get_model_registry().get().version,
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (404 when METRICS_ENABLED is off)"""
+    if not get_settings().METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(content=metrics.render_metrics(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API info"""
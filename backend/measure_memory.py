@@ -0,0 +1,162 @@
+"""
+Measure per-worker memory of the gunicorn deployment, with and without preload
+
+Starts `gunicorn -c gunicorn.conf.py app:app` from the repository root once
+per mode, waits until every worker has finished loading, sends a few
+predictions, then reads /proc/<pid>/smaps_rollup of the master and each
+worker. RSS counts a shared page in every process that maps it; PSS splits
+it between them, so the PSS total is what the pod actually uses. Linux only.
+
+Usage:
+    python measure_memory.py                          # preload vs per-worker, 4 workers
+    python measure_memory.py --workers 8 --modes preload
+    python measure_memory.py --pid 12345              # an already running master
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent.parent
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+SAMPLE_REQUEST = {"locality_name": "Vashi", "bhk": 2, "carpet_area_sqft": 1000}
+
+
+def read_memory(pid: int) -> Dict[str, float]:
+    """smaps_rollup fields of a process, in MB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in FIELDS:
+                values[name] = int(rest.split()[0]) / 1024
+    return values
+
+
+def child_pids(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # pid (comm) state ppid ...; comm may contain spaces
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def report(master: int) -> Dict[str, float]:
+    """Log one line per process and return the totals"""
+    rows = [("master", master, read_memory(master))]
+    rows += [("worker", pid, read_memory(pid)) for pid in child_pids(master)]
+    logger.info(f"{'role':<7} {'pid':>7} {'RSS MB':>8} {'PSS MB':>8} {'shared MB':>10} {'private MB':>11}")
+    for role, pid, mem in rows:
+        shared = mem["Shared_Clean"] + mem["Shared_Dirty"]
+        private = mem["Private_Clean"] + mem["Private_Dirty"]
+        logger.info(f"{role:<7} {pid:>7} {mem['Rss']:>8.1f} {mem['Pss']:>8.1f} {shared:>10.1f} {private:>11.1f}")
+    workers = [mem for role, _, mem in rows if role == "worker"]
+    totals = {
+        "workers": len(workers),
+        "rss": sum(mem["Rss"] for _, _, mem in rows),
+        "pss": sum(mem["Pss"] for _, _, mem in rows),
+        "worker_private": sum(mem["Private_Clean"] + mem["Private_Dirty"] for mem in workers) / max(1, len(workers)),
+    }
+    logger.info(f"total RSS {totals['rss']:.1f} MB, total PSS {totals['pss']:.1f} MB, "
+                f"private per worker {totals['worker_private']:.1f} MB")
+    return totals
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_settled(master: int, workers: int, timeout: float):
+    """Every worker forked and no worker's RSS still growing"""
+    deadline = time.monotonic() + timeout
+    previous = None
+    while time.monotonic() < deadline:
+        pids = child_pids(master)
+        if len(pids) == workers:
+            current = [read_memory(pid)["Rss"] for pid in pids]
+            if previous is not None and len(previous) == len(current) and all(
+                abs(a - b) < 0.5 for a, b in zip(previous, current)
+            ):
+                return
+            previous = current
+        time.sleep(1.0)
+    raise TimeoutError("Workers did not settle; check the gunicorn output")
+
+
+def _send_predictions(port: int, n: int):
+    body = json.dumps(SAMPLE_REQUEST).encode()
+    for _ in range(n):
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/api/v1/prediction/predict",
+            data=body, headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            response.read()
+
+
+def measure(preload: bool, workers: int, requests: int, timeout: float) -> Dict[str, float]:
+    port = _free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               GUNICORN_PRELOAD="true" if preload else "false")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_settled(process.pid, workers, timeout)
+        _send_predictions(port, requests)
+        _wait_until_settled(process.pid, workers, timeout)
+        logger.info(f"--- {'preload' if preload else 'per-worker load'}, {workers} workers ---")
+        return report(process.pid)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS/PSS per gunicorn worker")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", choices=["preload", "per-worker"], default=["preload", "per-worker"])
+    parser.add_argument("--requests", type=int, default=200, help="Predictions sent before measuring")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--pid", type=int, default=None, help="Measure a running gunicorn master instead")
+    args = parser.parse_args()
+
+    if args.pid:
+        report(args.pid)
+        return
+
+    results = {mode: measure(mode == "preload", args.workers, args.requests, args.timeout) for mode in args.modes}
+    if len(results) == 2:
+        saved = results["per-worker"]["pss"] - results["preload"]["pss"]
+        logger.info(f"Preload saves {saved:.1f} MB PSS in total "
+                    f"({saved / args.workers:.1f} MB per worker)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 SQLAlchemy database models
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -66,6 +66,7 @@ class Prediction(Base):
     __tablename__ = "predictions"
     
     id = Column(Integer, primary_key=True, index=True)
+    prediction_uuid = Column(String(36), unique=True, index=True, nullable=True)  # client-facing id, known before insert
     locality_id = Column(Integer, ForeignKey("localities.id"), index=True)
     
     # Input features
@@ -97,6 +98,24 @@ class Prediction(Base):
     locality = relationship("Locality", back_populates="predictions")
 
 
+class LocalityDailyStat(Base):
+    """Per-locality daily rollup of predicted or transacted price per sqft"""
+    __tablename__ = "locality_daily_stats"
+    
+    # Primary key order matches the trend query: one locality, one source, a day range
+    locality_id = Column(Integer, ForeignKey("localities.id"), primary_key=True)
+    source = Column(String(20), primary_key=True)  # "prediction", "transaction"
+    day = Column(Date, primary_key=True)
+    
+    sample_count = Column(Integer, default=0, nullable=False)
+    sum_price_per_sqft = Column(Float, default=0.0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @property
+    def avg_price_per_sqft(self) -> float:
+        return self.sum_price_per_sqft / self.sample_count if self.sample_count else 0.0
+
+
 class User(Base):
     """Model for user accounts"""
     __tablename__ = "users"
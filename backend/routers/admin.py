@@ -0,0 +1,28 @@
+"""
+API router for admin-only operations (ADMIN_TOKEN)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from config import get_settings
+from services.auth import require_admin
+from services.profiling import list_profiles, profile_path
+import logging
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+logger = logging.getLogger(__name__)
+
+
+@router.get("/profiles")
+async def get_profiles():
+    """Stored request profiles, newest first"""
+    return {"profiles": list_profiles(get_settings().PROFILING_DIR)}
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str):
+    """Download one profile (pstats format: snakeviz, flameprof, pstats)"""
+    path = profile_path(get_settings().PROFILING_DIR, profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=profile_id)
@@ -6,17 +6,24 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from database import get_db
 from schemas import UserCreate, UserResponse, Token
-from datetime import datetime, timedelta
-from passlib.context import CryptContext
-from jose import JWTError, jwt
+from datetime import timedelta
 from config import get_settings
+from services.auth import (
+    UserSnapshot, create_access_token, get_current_user, hash_password, verify_password,
+)
+from services.executors import ExecutorBusy, run_db, run_db_write
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in requests, retry shortly",
+        headers={"Retry-After": "1"},
+    )
 
 
 @router.post("/register", response_model=UserResponse)
@@ -28,15 +35,20 @@ async def register_user(
     from models import User
     
     # Check if user exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_db(
+        lambda: db.query(User).filter(User.email == user_data.email).first()
+    )
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    # Hash password
-    hashed_password = pwd_context.hash(user_data.password)
+    # Hash password (bcrypt runs on the password pool, not the event loop)
+    try:
+        hashed_password = await hash_password(user_data.password)
+    except ExecutorBusy:
+        raise _busy()
     
     # Create user
     db_user = User(
@@ -47,10 +59,12 @@ async def register_user(
         hashed_password=hashed_password
     )
     
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    def save():
+        db.add(db_user)
+        db.commit()
+        db.refresh(db_user)
     
+    await run_db_write(save)
     return db_user
 
 
@@ -64,8 +78,14 @@ async def login(
     from models import User
     
     # Find user
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not pwd_context.verify(password, user.hashed_password):
+    user = await run_db(
+        lambda: db.query(User).filter(User.email == email).first()
+    )
+    try:
+        valid = user is not None and await verify_password(password, user.hashed_password)
+    except ExecutorBusy:
+        raise _busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
@@ -86,16 +106,7 @@ async def login(
     }
 
 
-def create_access_token(data: dict, expires_delta = None):
-    """Create JWT access token"""
-    settings = get_settings()
-    to_encode = data.copy()
-    
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+@router.get("/me", response_model=UserResponse)
+async def read_current_user(user: UserSnapshot = Depends(get_current_user)):
+    """The user the bearer token belongs to (cached per token, no DB query after the first)"""
+    return user
@@ -5,7 +5,10 @@ API router for locality endpoints
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
-from schemas import LocalityResponse, LocalityDetailResponse
+from schemas import LocalityResponse, LocalityDetailResponse, PropertyResponse
+from services.executors import run_db
+from services.locality_resolver import get_locality_resolver
+from dataclasses import asdict
 import logging
 
 router = APIRouter()
@@ -15,14 +18,10 @@ logger = logging.getLogger(__name__)
 @router.get("/", response_model=list[LocalityResponse])
 async def get_all_localities(
     skip: int = 0,
-    limit: int = 20,
-    db: Session = Depends(get_db)
+    limit: int = 20
 ):
     """Get all supported localities with price statistics"""
-    from models import Locality
-    
-    localities = db.query(Locality).offset(skip).limit(limit).all()
-    return localities
+    return get_locality_resolver().all()[skip:skip + limit]
 
 
 @router.get("/{locality_name}", response_model=LocalityDetailResponse)
@@ -31,26 +30,27 @@ async def get_locality_details(
     db: Session = Depends(get_db)
 ):
     """Get detailed locality information including recent properties (F-03: Locality Heatmap base data)"""
-    from models import Locality
+    from models import Property
     
-    locality = db.query(Locality).filter(
-        Locality.name.ilike(locality_name)
-    ).first()
+    locality = get_locality_resolver().resolve(locality_name)
     
     if not locality:
         raise HTTPException(status_code=404, detail="Locality not found")
     
-    return locality
+    properties = await run_db(
+        lambda: db.query(Property).filter(Property.locality_id == locality.id).all()
+    )
+    
+    return LocalityDetailResponse(
+        **asdict(locality),
+        properties=[PropertyResponse.model_validate(p) for p in properties]
+    )
 
 
 @router.get("/stats/all")
-async def get_locality_stats(
-    db: Session = Depends(get_db)
-):
+async def get_locality_stats():
     """Get statistics for all localities for heatmap visualization"""
-    from models import Locality
-    
-    localities = db.query(Locality).all()
+    localities = get_locality_resolver().all()
     
     stats = [
         {
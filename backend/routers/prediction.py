@@ -3,10 +3,19 @@ API router for prediction endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from database import get_db
-from schemas import PredictionRequest, PredictionResponse
+from schemas import (
+    PredictionRequest, PredictionResponse,
+    BatchPredictionRequest, BatchPredictionItem, BatchPredictionResponse
+)
 from services.prediction_service import PredictionService
+from services.batching import get_inference_batcher
+from services.executors import run_db
+from services.prediction_log import get_prediction_log_writer
+from services.prediction_cache import get_prediction_cache
+from services.locality_resolver import get_locality_resolver
 from config import get_settings
 import logging
 
@@ -14,6 +23,14 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def _validation_message(error: ValidationError) -> str:
+    """Compact one-line summary of a pydantic validation error"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'item'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
 @router.post("/predict", response_model=PredictionResponse)
 async def predict_property_price(
     request: PredictionRequest,
@@ -33,7 +50,7 @@ async def predict_property_price(
         settings = get_settings()
         
         # Validate locality
-        if request.locality_name not in settings.SUPPORTED_LOCALITIES:
+        if not get_locality_resolver().is_supported(request.locality_name):
             raise HTTPException(
                 status_code=400,
                 detail=f"Locality '{request.locality_name}' not supported. Supported localities: {settings.SUPPORTED_LOCALITIES}"
@@ -57,6 +74,65 @@ async def predict_property_price(
         )
 
 
+@router.post("/batch", response_model=BatchPredictionResponse)
+async def predict_property_prices_batch(
+    request: BatchPredictionRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Predict prices for many properties in one call (bulk valuation for lenders)
+    
+    Args:
+        request: List of property details
+        db: Database session
+        
+    Returns:
+        One result per input item, in input order, with either a prediction or an error
+    """
+    settings = get_settings()
+    if len(request.items) > settings.MAX_BATCH_PREDICTION_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.items)} items (max {settings.MAX_BATCH_PREDICTION_SIZE})"
+        )
+    
+    # Items that fail schema validation get their error in place
+    outcomes = [(None, None)] * len(request.items)
+    valid_indices = []
+    valid_requests = []
+    for idx, item in enumerate(request.items):
+        try:
+            valid_requests.append(PredictionRequest.model_validate(item))
+            valid_indices.append(idx)
+        except ValidationError as e:
+            outcomes[idx] = (None, _validation_message(e))
+    
+    try:
+        if valid_requests:
+            service = PredictionService(db)
+            for idx, outcome in zip(valid_indices, await service.predict_batch(valid_requests)):
+                outcomes[idx] = outcome
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}")
+        await run_db(db.rollback)
+        raise HTTPException(
+            status_code=500,
+            detail="Error generating batch predictions"
+        )
+    
+    results = [
+        BatchPredictionItem(index=idx, prediction=prediction, error=error)
+        for idx, (prediction, error) in enumerate(outcomes)
+    ]
+    error_count = sum(1 for item in results if item.error is not None)
+    
+    return BatchPredictionResponse(
+        results=results,
+        success_count=len(results) - error_count,
+        error_count=error_count
+    )
+
+
 @router.get("/history/{locality_name}")
 async def get_prediction_history(
     locality_name: str,
@@ -84,3 +160,22 @@ async def get_prediction_history(
             status_code=500,
             detail="Error fetching prediction history"
         )
+
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats():
+    """Micro-batching scheduler metrics: queue depth, batch sizes and wait times"""
+    return get_inference_batcher().stats()
+
+
+@router.get("/log/stats")
+async def get_prediction_log_stats():
+    """Write-behind prediction log metrics: queue depth and flush counters"""
+    return get_prediction_log_writer().stats()
+
+
+@router.get("/cache/stats")
+async def get_prediction_cache_stats():
+    """Prediction cache metrics: entries and hit rate"""
+    cache = get_prediction_cache()
+    return cache.stats() if cache else {"enabled": False}
@@ -2,10 +2,21 @@
 API router for property endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from database import get_db
-from schemas import PropertyCreate, PropertyResponse
+from typing import Optional
+from schemas import (
+    PropertyCreate, PropertyResponse, BulkIngestResponse,
+    PredictionRequest, ComparablesResponse
+)
+from services.executors import run_db, run_db_write
+from services.trend_rollup import record_transactions
+from services.market_stats import get_market_stats
+from services.property_ingest import PropertyBulkLoader, resolve_format
+from services.comparables import get_comparables_index
+from services.locality_resolver import get_locality_resolver
+from config import get_settings
 import logging
 
 router = APIRouter()
@@ -33,14 +44,102 @@ async def create_property(
         db_property = Property(**property_data.dict())
         db_property.price_per_sqft = property_data.price / property_data.carpet_area_sqft if property_data.price else None
         
-        db.add(db_property)
-        db.commit()
-        db.refresh(db_property)
-        return db_property
+        market_stats = get_market_stats()
+        
+        def save():
+            db.add(db_property)
+            db.flush()
+            record_transactions(db, [db_property])
+            changes = market_stats.record(db, [db_property])
+            db.commit()
+            db.refresh(db_property)
+            return changes
+        
+        changes = await run_db_write(save)
     except Exception as e:
         logger.error(f"Error creating property: {str(e)}")
-        db.rollback()
+        await run_db(db.rollback)
         raise HTTPException(status_code=500, detail="Error creating property")
+    
+    # Committed; refreshing the in-memory views must not turn it into an error
+    market_stats.publish(changes)
+    try:
+        # A KD-tree rebuild can take a while; keep it off the event loop
+        await run_db(get_comparables_index().add, [db_property])
+    except Exception as e:
+        logger.error(f"Comparables index update failed for property {db_property.id}: {e}")
+    return db_property
+
+
+@router.post("/bulk", response_model=BulkIngestResponse)
+async def bulk_create_properties(
+    request: Request,
+    format: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Stream-load many property records (e.g. a month of RERA transactions)
+    
+    The body is CSV with a header row (PropertyCreate field names) or NDJSON
+    with one PropertyCreate object per line. The format comes from the
+    `format` query parameter or the Content-Type header.
+    
+    Args:
+        request: Raw request; the body is read incrementally
+        format: "csv" or "ndjson" (optional)
+        db: Database session
+        
+    Returns:
+        Counts of accepted and rejected rows with the first row errors
+    """
+    fmt = resolve_format(format, request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Upload must be CSV (text/csv) or NDJSON (application/x-ndjson), or pass ?format=csv|ndjson"
+        )
+    
+    loader = PropertyBulkLoader(db, fmt)
+    try:
+        summary = await loader.ingest(request.stream())
+    except Exception as e:
+        logger.error(f"Bulk property ingestion failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Bulk ingestion failed after {loader.accepted} accepted rows"
+        )
+    return summary
+
+
+@router.post("/comparables", response_model=ComparablesResponse)
+async def get_comparable_properties(
+    request: PredictionRequest,
+    k: int = 5
+):
+    """
+    Find the most similar recent transactions for a property (F-04: Comparable Listings)
+    
+    Args:
+        request: Property details (same body as a prediction request)
+        k: Number of comparables to return
+        
+    Returns:
+        Up to k recent transactions in the same locality, nearest first
+    """
+    settings = get_settings()
+    if not 1 <= k <= settings.MAX_COMPARABLES:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {settings.MAX_COMPARABLES}")
+    
+    locality = get_locality_resolver().resolve(request.locality_name)
+    if not locality:
+        raise HTTPException(status_code=404, detail="Locality not found")
+    
+    comparables = get_comparables_index().query(locality.id, request, k)
+    return ComparablesResponse(
+        locality_name=locality.name,
+        comparables=comparables,
+        count=len(comparables)
+    )
 
 
 @router.get("/{property_id}", response_model=PropertyResponse)
@@ -51,7 +150,9 @@ async def get_property(
     """Get property by ID"""
     from models import Property
     
-    property_obj = db.query(Property).filter(Property.id == property_id).first()
+    property_obj = await run_db(
+        lambda: db.query(Property).filter(Property.id == property_id).first()
+    )
     if not property_obj:
         raise HTTPException(status_code=404, detail="Property not found")
     return property_obj
@@ -66,8 +167,10 @@ async def get_properties_by_locality(
     """Get properties for a specific locality (F-04: Comparable Listings)"""
     from models import Property
     
-    properties = db.query(Property).filter(
-        Property.locality_id == locality_id
-    ).limit(limit).all()
+    properties = await run_db(
+        lambda: db.query(Property).filter(
+            Property.locality_id == locality_id
+        ).limit(limit).all()
+    )
     
     return {"properties": properties, "count": len(properties)}
@@ -2,82 +2,74 @@
 API router for price trend endpoints (F-05)
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from database import get_db
 from schemas import LocalityTrendResponse
-from datetime import datetime, timedelta
+from services.executors import run_db
+from services.locality_resolver import get_locality_resolver
+from services.trend_rollup import SOURCES, SOURCE_PREDICTION, get_daily_trend
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-@router.get("/{locality_name}/6m", response_model=LocalityTrendResponse)
-async def get_6month_trend(
-    locality_name: str,
-    db: Session = Depends(get_db)
-):
-    """Get 6-month price trend for a locality (F-05: Price Trend Charts)"""
-    from models import Locality, Prediction
-    
-    locality = db.query(Locality).filter(Locality.name.ilike(locality_name)).first()
+async def _build_trend(locality_name: str, period_days: int, source: str, db: Session) -> LocalityTrendResponse:
+    """Read a locality's trend from the daily rollup table"""
+    if source not in SOURCES:
+        raise HTTPException(status_code=400, detail=f"source must be one of {list(SOURCES)}")
+
+    locality = get_locality_resolver().resolve(locality_name)
     if not locality:
         raise HTTPException(status_code=404, detail="Locality not found")
-    
-    # Get predictions from last 6 months
-    six_months_ago = datetime.utcnow() - timedelta(days=180)
-    predictions = db.query(Prediction).filter(
-        Prediction.locality_id == locality.id,
-        Prediction.created_at >= six_months_ago
-    ).order_by(Prediction.created_at).all()
-    
-    # Aggregate by date
-    trend_data = []
-    for pred in predictions:
-        trend_data.append({
-            "date": pred.created_at,
-            "avg_price_per_sqft": pred.predicted_price_per_sqft,
-            "transaction_count": 1
-        })
-    
+
+    trend_data = await run_db(get_daily_trend, db, locality.id, period_days, source)
+
     return LocalityTrendResponse(
         locality_name=locality_name,
         trend_data=trend_data,
-        period_days=180
+        period_days=period_days
     )
 
 
+@router.get("/{locality_name}/6m", response_model=LocalityTrendResponse)
+async def get_6month_trend(
+    locality_name: str,
+    source: str = SOURCE_PREDICTION,
+    db: Session = Depends(get_db)
+):
+    """Get 6-month price trend for a locality (F-05: Price Trend Charts)"""
+    return await _build_trend(locality_name, 180, source, db)
+
+
 @router.get("/{locality_name}/12m", response_model=LocalityTrendResponse)
 async def get_12month_trend(
     locality_name: str,
+    source: str = SOURCE_PREDICTION,
     db: Session = Depends(get_db)
 ):
     """Get 12-month price trend for a locality (F-05: Price Trend Charts)"""
-    from models import Locality, Prediction
-    
-    locality = db.query(Locality).filter(Locality.name.ilike(locality_name)).first()
-    if not locality:
-        raise HTTPException(status_code=404, detail="Locality not found")
-    
-    # Get predictions from last 12 months
-    twelve_months_ago = datetime.utcnow() - timedelta(days=365)
-    predictions = db.query(Prediction).filter(
-        Prediction.locality_id == locality.id,
-        Prediction.created_at >= twelve_months_ago
-    ).order_by(Prediction.created_at).all()
-    
-    # Aggregate by date
-    trend_data = []
-    for pred in predictions:
-        trend_data.append({
-            "date": pred.created_at,
-            "avg_price_per_sqft": pred.predicted_price_per_sqft,
-            "transaction_count": 1
-        })
-    
-    return LocalityTrendResponse(
-        locality_name=locality_name,
-        trend_data=trend_data,
-        period_days=365
-    )
+    return await _build_trend(locality_name, 365, source, db)
+
+
+@router.get("/{locality_name}", response_model=LocalityTrendResponse)
+async def get_trend(
+    locality_name: str,
+    period_days: int = Query(180, ge=1, le=3650),
+    source: str = SOURCE_PREDICTION,
+    db: Session = Depends(get_db)
+):
+    """
+    Get a price trend over an arbitrary period
+
+    Args:
+        locality_name: Name of the locality
+        period_days: Days to cover, today inclusive (longer periods are bucketed to at most 365 points)
+        source: "prediction" (model estimates) or "transaction" (recorded sales)
+        db: Database session
+
+    Returns:
+        Daily (or multi-day) average price per sqft with sample counts
+    """
+    return await _build_trend(locality_name, period_days, source, db)
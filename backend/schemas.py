@@ -2,9 +2,9 @@
 Pydantic schemas for request/response validation
 """
 
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+from typing import Any, Optional, List
+from datetime import datetime, timezone
 from enum import Enum
 
 
@@ -37,6 +37,14 @@ class PropertyCreate(PropertyBase):
     price: Optional[float] = None
     transaction_date: Optional[datetime] = None
     source: str = "manual"
+    
+    @field_validator("transaction_date")
+    @classmethod
+    def _naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Stored timestamps are naive UTC; an offset in the input is applied, not dropped
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
 
 
 class PropertyResponse(PropertyBase):
@@ -51,6 +59,34 @@ class PropertyResponse(PropertyBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BulkIngestError(BaseModel):
+    row: int  # 1-based data row (CSV header excluded)
+    error: str
+
+
+class BulkIngestResponse(BaseModel):
+    accepted: int
+    rejected: int
+    errors: List[BulkIngestError] = []
+    errors_truncated: bool = False
+
+
+class ComparableProperty(PropertyBase):
+    id: Optional[int] = None  # assigned rows only; bulk-loaded rows get theirs on the next index refresh
+    locality_id: int
+    name: Optional[str] = None
+    price: Optional[float] = None
+    price_per_sqft: float
+    transaction_date: datetime
+    distance: float
+
+
+class ComparablesResponse(BaseModel):
+    locality_name: str
+    comparables: List[ComparableProperty]
+    count: int
+
+
 # ==================== Prediction Schemas ====================
 
 class PredictionRequest(BaseModel):
@@ -69,7 +105,8 @@ class PredictionRequest(BaseModel):
 
 
 class PredictionResponse(BaseModel):
-    id: int
+    id: Optional[int] = None  # not yet assigned when the row is still in the write-behind queue
+    prediction_uuid: Optional[str] = None
     locality_name: str
     bhk: int
     carpet_area_sqft: float
@@ -84,6 +121,23 @@ class PredictionResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class BatchPredictionRequest(BaseModel):
+    # Validated one by one so a malformed item is reported in its own slot
+    items: List[Any] = Field(..., min_length=1)
+
+
+class BatchPredictionItem(BaseModel):
+    index: int
+    prediction: Optional[PredictionResponse] = None
+    error: Optional[str] = None
+
+
+class BatchPredictionResponse(BaseModel):
+    results: List[BatchPredictionItem]
+    success_count: int
+    error_count: int
+
+
 # ==================== Locality Schemas ====================
 
 class LocalityBase(BaseModel):
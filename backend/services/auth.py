@@ -0,0 +1,172 @@
+"""
+Password hashing, access tokens and the authenticated-user dependency
+
+bcrypt costs 100-250 ms of CPU per call, so hashing and verification run
+on the bounded password pool (see services/executors.py) instead of the
+event loop. get_current_user decodes a bearer token once and caches the
+resolved user by token for AUTH_USER_CACHE_TTL_SECONDS (never past the
+token's expiry); later requests with the same token cost neither a JWT
+decode nor a database round trip. Updating or deleting a User through the
+ORM evicts that user's cached entries in this process; changes made
+elsewhere (another worker, a manual SQL edit) apply once the short TTL
+runs out.
+"""
+
+import hmac
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+from passlib.context import CryptContext
+from sqlalchemy import event, inspect
+
+from config import get_settings
+from database import SessionLocal
+from models import User
+from services.executors import run_db, run_password_hash
+from services.ttl_cache import LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Read-only copy of a User row, safe to share between requests"""
+
+    id: int
+    email: str
+    full_name: Optional[str]
+    phone: Optional[str]
+    user_type: str
+    is_active: bool
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row: User) -> "UserSnapshot":
+        return cls(
+            id=row.id,
+            email=row.email,
+            full_name=row.full_name,
+            phone=row.phone,
+            user_type=row.user_type,
+            is_active=bool(row.is_active),
+            created_at=row.created_at,
+        )
+
+
+async def hash_password(password: str) -> str:
+    """bcrypt hash on the password pool (raises ExecutorBusy when saturated)"""
+    return await run_password_hash(pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    """bcrypt verification on the password pool (raises ExecutorBusy when saturated)"""
+    return await run_password_hash(pwd_context.verify, password, hashed_password)
+
+
+def create_access_token(data: dict, expires_delta = None):
+    """Create JWT access token"""
+    settings = get_settings()
+    to_encode = data.copy()
+
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(minutes=15)
+
+    to_encode.update({"exp": expire})
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return encoded_jwt
+
+
+@lru_cache()
+def get_user_cache() -> LRUTTLCache:
+    """Process-wide token -> UserSnapshot cache"""
+    settings = get_settings()
+    return LRUTTLCache(settings.AUTH_USER_CACHE_MAX_ENTRIES, settings.AUTH_USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(email: Optional[str] = None) -> int:
+    """Evict the cached snapshots of one user (every user when email is None)"""
+    cache = get_user_cache()
+    if email is None:
+        evicted = len(cache)
+        cache.clear()
+        return evicted
+    return cache.evict(lambda user: user.email == email)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _evict_changed_user(mapper, connection, target):
+    """Drop cached snapshots of a User row written through the ORM"""
+    # A renamed user is cached under the old address
+    emails = {target.email, *inspect(target).attrs.email.history.deleted}
+    get_user_cache().evict(lambda user: user.email in emails)
+
+
+def _load_user(email: str) -> Optional[UserSnapshot]:
+    db = SessionLocal()
+    try:
+        row = db.query(User).filter(User.email == email).first()
+        return UserSnapshot.from_row(row) if row else None
+    finally:
+        db.close()
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> UserSnapshot:
+    """FastAPI dependency: the active user a bearer token was issued to"""
+    if credentials is None:
+        raise _unauthorized("Not authenticated")
+    token = credentials.credentials
+    cache = get_user_cache()
+    user = cache.get(token)
+    if user is not None:
+        return user
+
+    settings = get_settings()
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise _unauthorized("Invalid or expired token")
+    email = payload.get("sub")
+    if not email:
+        raise _unauthorized("Invalid token")
+
+    user = await run_db(_load_user, email)
+    if user is None or not user.is_active:
+        raise _unauthorized("Unknown or inactive user")
+
+    # Never cache past the token's own expiry
+    ttl = min(payload.get("exp", 0) - time.time(), settings.AUTH_USER_CACHE_TTL_SECONDS)
+    if ttl > 0:
+        cache.set(token, user, ttl_seconds=ttl)
+    return user
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """FastAPI dependency: X-Admin-Token must match ADMIN_TOKEN (404 while no token is configured)"""
+    settings = get_settings()
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
@@ -0,0 +1,138 @@
+"""
+Micro-batching scheduler for single-row model inference
+
+Concurrent /predict calls each submit one feature vector. The scheduler holds
+them for at most INFERENCE_BATCH_WINDOW_MS (or until INFERENCE_BATCH_MAX_SIZE
+rows are waiting), scores them as one matrix on the inference pool and
+resolves every caller's future with its own row of the result.
+"""
+
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+from config import get_settings
+from services.executors import run_inference
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBatcher:
+    """Coalesces concurrent single-row predictions into one matrix call"""
+
+    def __init__(self, max_batch_size: int, window_ms: float):
+        self.max_batch_size = max(1, max_batch_size)
+        self.window_seconds = max(0.0, window_ms) / 1000.0
+        self._pending = []
+        self._timer = None
+        self._inflight = set()
+        self._batches = 0
+        self._rows = 0
+        self._max_batch_size_seen = 0
+        self._last_batch_size = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    async def submit(self, handle, feature_vector: List[float]) -> float:
+        """
+        Queue one feature vector and wait for its prediction
+
+        Args:
+            handle: ModelHandle to score with (rows are grouped per handle)
+            feature_vector: Raw, ordered feature values for one property
+
+        Returns:
+            Predicted total price for this row
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        # The batch runs in the context of the caller that flushes it (or
+        # scheduled the timer), so its model.predict span lands in that trace
+        with span("inference.batch_wait"):
+            self._pending.append((handle, feature_vector, future, time.perf_counter()))
+
+            if len(self._pending) >= self.max_batch_size:
+                self.flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window_seconds, self.flush)
+
+            return await future
+
+    def flush(self):
+        """Dispatch everything that is currently queued as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def drain(self):
+        """Flush the queue and wait for in-flight batches (used on shutdown)"""
+        self.flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def _run_batch(self, batch: list):
+        started = time.perf_counter()
+        waits = [started - item[3] for item in batch]
+        self._batches += 1
+        self._rows += len(batch)
+        self._last_batch_size = len(batch)
+        self._max_batch_size_seen = max(self._max_batch_size_seen, len(batch))
+        self._total_wait_seconds += sum(waits)
+        self._max_wait_seconds = max(self._max_wait_seconds, max(waits))
+
+        # A hot-swap can land mid-window; never score a row with another model
+        groups = {}
+        for item in batch:
+            groups.setdefault(id(item[0]), []).append(item)
+
+        for items in groups.values():
+            handle = items[0][0]
+            try:
+                matrix = np.array([item[1] for item in items], dtype=float)
+                predictions = await run_inference(handle.predict, matrix)
+            except Exception as e:
+                logger.error(f"Batched inference failed for {len(items)} rows: {e}")
+                for item in items:
+                    if not item[2].done():
+                        item[2].set_exception(e)
+                continue
+            for item, prediction in zip(items, predictions):
+                if not item[2].done():
+                    item[2].set_result(float(prediction))
+
+    def stats(self) -> dict:
+        """Queue depth, batch size and wait time counters"""
+        return {
+            "queue_depth": len(self._pending),
+            "batches": self._batches,
+            "rows": self._rows,
+            "avg_batch_size": self._rows / self._batches if self._batches else 0.0,
+            "last_batch_size": self._last_batch_size,
+            "max_batch_size": self._max_batch_size_seen,
+            "avg_wait_ms": 1000 * self._total_wait_seconds / self._rows if self._rows else 0.0,
+            "max_wait_ms": 1000 * self._max_wait_seconds,
+            "window_ms": 1000 * self.window_seconds,
+            "max_batch_rows": self.max_batch_size,
+        }
+
+
+@lru_cache()
+def get_inference_batcher() -> InferenceBatcher:
+    """Get the process-wide inference batcher"""
+    settings = get_settings()
+    return InferenceBatcher(
+        max_batch_size=settings.INFERENCE_BATCH_MAX_SIZE,
+        window_ms=settings.INFERENCE_BATCH_WINDOW_MS,
+    )
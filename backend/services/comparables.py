@@ -0,0 +1,271 @@
+"""
+Nearest-neighbour comparables engine (F-04)
+
+Recent priced transactions are indexed per locality as weighted feature
+vectors (bhk, carpet area, floor, age, amenities). Each locality holds a
+KD-tree over its bulk rows plus a small append buffer for properties
+ingested since the last build; queries search both and merge. When the
+buffer reaches COMPARABLES_REBUILD_THRESHOLD rows the locality's tree is
+rebuilt. add() is blocking (callers run it on an executor) and builds the
+new index outside the lock, which only guards the swap. A periodic refresh
+reloads from the database, which also drops transactions older than
+COMPARABLES_MAX_AGE_DAYS.
+
+Timestamps are kept as naive UTC, like the rest of the schema; aware
+values (an ISO date with an offset in a bulk upload) are converted.
+
+Price per sqft is returned with every comparable but is not part of the
+distance: the asking property's price is exactly what is unknown.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+
+from config import get_settings
+from database import SessionLocal
+from models import Property
+
+if TYPE_CHECKING:
+    from sklearn.neighbors import KDTree
+
+logger = logging.getLogger(__name__)
+
+AMENITIES = ["lift", "parking", "gym", "swimming_pool", "gated_society", "cctv"]
+
+# Divisors that put one "unit of difference" on a comparable footing:
+# 1 BHK ~ 250 sqft ~ 5 floors ~ 5 years ~ 2 amenities
+FEATURE_SCALES = np.array([1.0, 250.0, 5.0, 5.0] + [2.0] * len(AMENITIES))
+
+DEFAULT_FLOOR = 1
+DEFAULT_AGE_YEARS = 10
+
+
+def feature_vector(item) -> np.ndarray:
+    """Weighted feature vector for a Property, PredictionRequest or column dict"""
+    get = item.get if isinstance(item, dict) else lambda name: getattr(item, name, None)
+    floor = get("floor_number")
+    age = get("building_age_years")
+    raw = [
+        get("bhk"),
+        get("carpet_area_sqft"),
+        DEFAULT_FLOOR if floor is None else floor,
+        DEFAULT_AGE_YEARS if age is None else age,
+    ] + [1.0 if get(name) else 0.0 for name in AMENITIES]
+    return np.asarray(raw, dtype=float) / FEATURE_SCALES
+
+
+class _LocalityIndex:
+    """Immutable per-locality index: KD-tree rows plus an append buffer"""
+
+    __slots__ = ("vectors", "tree", "rows", "buffer", "buffer_rows")
+
+    def __init__(self, vectors: np.ndarray, tree: Optional["KDTree"], rows: list,
+                 buffer: np.ndarray, buffer_rows: list):
+        self.vectors = vectors
+        self.tree = tree
+        self.rows = rows
+        self.buffer = buffer
+        self.buffer_rows = buffer_rows
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, rows: list) -> "_LocalityIndex":
+        if not len(rows):
+            return cls(vectors, None, rows, _empty_matrix(), [])
+        # scikit-learn takes seconds to import; only pay for it once there is data
+        from sklearn.neighbors import KDTree
+
+        tree = KDTree(vectors)
+        return cls(vectors, tree, rows, _empty_matrix(), [])
+
+    def __len__(self):
+        return len(self.rows) + len(self.buffer_rows)
+
+    def query(self, vector: np.ndarray, k: int) -> list:
+        candidates = []
+        if self.tree is not None:
+            kk = min(k, len(self.rows))
+            distances, indices = self.tree.query(vector.reshape(1, -1), k=kk)
+            candidates.extend(zip(distances[0].tolist(), (self.rows[i] for i in indices[0])))
+        if self.buffer_rows:
+            distances = np.sqrt(((self.buffer - vector) ** 2).sum(axis=1))
+            nearest = np.argsort(distances)[:k]
+            candidates.extend((float(distances[i]), self.buffer_rows[i]) for i in nearest)
+        # Nearest first; among equals, the most recent transaction first
+        candidates.sort(key=lambda c: (c[0], -c[1]["_ts"]))
+        return candidates[:k]
+
+
+class ComparablesIndex:
+    """Per-locality nearest-neighbour index over recent transactions"""
+
+    def __init__(self, session_factory=SessionLocal, settings=None):
+        self.settings = settings or get_settings()
+        self._session_factory = session_factory
+        self._indexes: Dict[int, _LocalityIndex] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher = None
+
+    def query(self, locality_id: int, item, k: int) -> List[dict]:
+        """
+        Find the k most similar recent transactions in a locality
+
+        Args:
+            locality_id: Locality to search
+            item: PredictionRequest (or anything with the property fields)
+            k: Number of comparables to return
+
+        Returns:
+            Comparable rows (nearest first), each with a `distance`
+        """
+        index = self._indexes.get(locality_id)
+        if index is None or not len(index):
+            return []
+        return [
+            dict({key: value for key, value in row.items() if key != "_ts"}, distance=distance)
+            for distance, row in index.query(feature_vector(item), k)
+        ]
+
+    def add(self, properties: Iterable):
+        """Index newly written priced properties, objects or column dicts (blocking)"""
+        cutoff = datetime.utcnow() - timedelta(days=self.settings.COMPARABLES_MAX_AGE_DAYS)
+        by_locality = {}
+        for p in properties:
+            row = _row_payload(p)
+            if row["locality_id"] is None or row["price_per_sqft"] is None or row["transaction_date"] < cutoff:
+                continue
+            by_locality.setdefault(row["locality_id"], []).append(row)
+
+        for locality_id, rows in by_locality.items():
+            vectors = np.vstack([feature_vector(r) for r in rows])
+            while True:
+                current = self._indexes.get(locality_id)
+                updated = self._appended(current, vectors, rows)
+                with self._lock:
+                    # Another add() may have swapped this locality meanwhile; redo on top of it
+                    if self._indexes.get(locality_id) is current:
+                        self._indexes[locality_id] = updated
+                        break
+
+    def _appended(self, current: Optional[_LocalityIndex], vectors: np.ndarray, rows: list) -> _LocalityIndex:
+        """current plus rows in its buffer, rebuilt once the buffer reaches the threshold"""
+        current = current or _LocalityIndex.build(_empty_matrix(), [])
+        buffer = np.vstack([current.buffer, vectors])
+        buffer_rows = current.buffer_rows + rows
+        if len(buffer_rows) >= self.settings.COMPARABLES_REBUILD_THRESHOLD:
+            return _LocalityIndex.build(np.vstack([current.vectors, buffer]), current.rows + buffer_rows)
+        return _LocalityIndex(current.vectors, current.tree, current.rows, buffer, buffer_rows)
+
+    def refresh(self):
+        """Rebuild every locality index from the database (blocking)"""
+        cutoff = datetime.utcnow() - timedelta(days=self.settings.COMPARABLES_MAX_AGE_DAYS)
+        when = func.coalesce(Property.transaction_date, Property.created_at)
+        columns = [
+            Property.id, Property.locality_id, Property.name, Property.bhk, Property.carpet_area_sqft,
+            Property.floor_number, Property.total_floors, Property.building_age_years,
+            Property.price, Property.price_per_sqft, Property.transaction_date, Property.created_at,
+        ] + [getattr(Property, name) for name in AMENITIES]
+
+        db = self._session_factory()
+        try:
+            result = db.execute(
+                select(*columns).where(Property.price_per_sqft.isnot(None), when >= cutoff)
+            )
+            by_locality = {}
+            for record in result.mappings():
+                row = _row_payload(dict(record))
+                by_locality.setdefault(row["locality_id"], []).append(row)
+        finally:
+            db.close()
+
+        indexes = {
+            locality_id: _LocalityIndex.build(np.vstack([feature_vector(r) for r in rows]), rows)
+            for locality_id, rows in by_locality.items()
+        }
+        with self._lock:
+            self._indexes = indexes
+        logger.info(f"Comparables index rebuilt ({sum(len(i) for i in indexes.values())} transactions)")
+
+    def stats(self) -> dict:
+        indexes = self._indexes
+        return {
+            "localities": len(indexes),
+            "indexed": sum(len(i.rows) for i in indexes.values()),
+            "buffered": sum(len(i.buffer_rows) for i in indexes.values()),
+        }
+
+    def start_refresher(self, refresh_now: bool = False):
+        """
+        Rebuild in a daemon thread every COMPARABLES_REFRESH_INTERVAL_SECONDS
+
+        Args:
+            refresh_now: Also build once right away (startup deferred the initial build)
+        """
+        interval = self.settings.COMPARABLES_REFRESH_INTERVAL_SECONDS
+        if self._refresher is not None or (interval <= 0 and not refresh_now):
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(
+            target=self._watch, args=(interval, refresh_now), name="comparables-refresh", daemon=True
+        )
+        self._refresher.start()
+
+    def stop_refresher(self):
+        """Stop the background rebuild thread"""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+
+    def _watch(self, interval: float, refresh_now: bool = False):
+        while refresh_now or (interval > 0 and not self._stop.wait(interval)):
+            refresh_now = False
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Comparables index refresh failed: {e}")
+
+
+def _empty_matrix() -> np.ndarray:
+    return np.empty((0, len(FEATURE_SCALES)))
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _row_payload(p) -> dict:
+    """Fields returned for a comparable, plus its timestamp for tie-breaks"""
+    get = p.get if isinstance(p, dict) else lambda name: getattr(p, name, None)
+    when = _naive_utc(get("transaction_date") or get("created_at")) or datetime.utcnow()
+    row = {
+        "id": get("id"),
+        "locality_id": get("locality_id"),
+        "name": get("name"),
+        "bhk": get("bhk"),
+        "carpet_area_sqft": get("carpet_area_sqft"),
+        "floor_number": get("floor_number"),
+        "total_floors": get("total_floors"),
+        "building_age_years": get("building_age_years"),
+        "price": get("price"),
+        "price_per_sqft": get("price_per_sqft"),
+        "transaction_date": when,
+        "_ts": when.timestamp(),
+    }
+    for name in AMENITIES:
+        row[name] = bool(get(name))
+    return row
+
+
+@lru_cache()
+def get_comparables_index() -> ComparablesIndex:
+    """Get the process-wide comparables index"""
+    return ComparablesIndex()
@@ -0,0 +1,172 @@
+"""
+Bounded executors that keep blocking work off the event loop
+
+Route handlers are ``async def``; anything that blocks (SQLAlchemy session
+calls, CPU-bound model inference, bcrypt) is submitted to a dedicated
+thread pool sized from config.Settings. XGBoost, NumPy and bcrypt release
+the GIL while they work, so threads give real parallelism without pickling
+the model into worker processes.
+
+Password hashing is also admission-limited: at most
+PASSWORD_HASH_MAX_PENDING calls may be running or queued, and further
+calls fail fast with ExecutorBusy instead of piling up behind a login
+burst.
+
+Database writes go through run_db_write. On SQLite with
+SQLITE_SINGLE_WRITER that is one writer thread: SQLite allows a single
+writer at a time, and queueing writes in-process is cheaper than pool
+threads contending for the file lock, sleeping in SQLite's busy handler
+and eventually failing with "database is locked". Reads stay on the DB
+pool and run alongside the writer under WAL. Other databases write on
+the DB pool.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from config import get_settings
+from services import profiling
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_inference_executor: Optional[ThreadPoolExecutor] = None
+_db_executor: Optional[ThreadPoolExecutor] = None
+_db_writer_executor: Optional[ThreadPoolExecutor] = None
+_password_executor: Optional[ThreadPoolExecutor] = None
+_password_slots: Optional[threading.BoundedSemaphore] = None
+
+
+class ExecutorBusy(RuntimeError):
+    """Raised when a pool's admission limit is reached"""
+
+
+def get_inference_executor() -> ThreadPoolExecutor:
+    """Thread pool for CPU-bound model inference"""
+    global _inference_executor
+    if _inference_executor is None:
+        with _lock:
+            if _inference_executor is None:
+                _inference_executor = ThreadPoolExecutor(
+                    max_workers=get_settings().INFERENCE_POOL_SIZE,
+                    thread_name_prefix="inference",
+                )
+    return _inference_executor
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Thread pool for blocking database access"""
+    global _db_executor
+    if _db_executor is None:
+        with _lock:
+            if _db_executor is None:
+                _db_executor = ThreadPoolExecutor(
+                    max_workers=get_settings().DB_EXECUTOR_WORKERS,
+                    thread_name_prefix="db",
+                )
+    return _db_executor
+
+
+def get_db_writer_executor() -> ThreadPoolExecutor:
+    """Executor for database writes: one thread on SQLite, the DB pool otherwise"""
+    global _db_writer_executor
+    if _db_writer_executor is None:
+        settings = get_settings()
+        if not (settings.DATABASE_URL.startswith("sqlite") and settings.SQLITE_SINGLE_WRITER):
+            return get_db_executor()
+        with _lock:
+            if _db_writer_executor is None:
+                _db_writer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+    return _db_writer_executor
+
+
+def get_password_executor() -> ThreadPoolExecutor:
+    """Thread pool for bcrypt hashing and verification"""
+    global _password_executor, _password_slots
+    if _password_executor is None:
+        with _lock:
+            if _password_executor is None:
+                settings = get_settings()
+                _password_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+                _password_executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    thread_name_prefix="password",
+                )
+    return _password_executor
+
+
+async def _run_in(executor: ThreadPoolExecutor, fn: Callable[..., T], *args, **kwargs) -> T:
+    # run_in_executor does not carry context variables across the hop by
+    # itself; copy them so request-scoped state follows the work
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    fn = profiling.bind(fn)
+    return await loop.run_in_executor(executor, functools.partial(ctx.run, fn, *args, **kwargs))
+
+
+async def run_inference(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run a CPU-bound callable on the inference pool"""
+    return await _run_in(get_inference_executor(), fn, *args, **kwargs)
+
+
+async def run_db(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking database callable on the DB pool"""
+    return await _run_in(get_db_executor(), fn, *args, **kwargs)
+
+
+async def run_db_write(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking callable that writes and commits on the DB writer"""
+    return await _run_in(get_db_writer_executor(), fn, *args, **kwargs)
+
+
+async def run_password_hash(fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a bcrypt callable on the password pool
+
+    Raises:
+        ExecutorBusy: PASSWORD_HASH_MAX_PENDING calls are already running or queued
+    """
+    executor = get_password_executor()
+    slots = _password_slots
+    if not slots.acquire(blocking=False):
+        raise ExecutorBusy("Password hashing pool is saturated")
+    try:
+        return await _run_in(executor, fn, *args, **kwargs)
+    finally:
+        slots.release()
+
+
+def queue_depths() -> dict:
+    """Tasks waiting for a thread in each executor that has been created"""
+    executors = {
+        "inference": _inference_executor,
+        "db": _db_executor,
+        "db_writer": _db_writer_executor,
+        "password": _password_executor,
+    }
+    # _work_queue holds submitted calls that no worker thread has picked up yet
+    return {
+        name: executor._work_queue.qsize()
+        for name, executor in executors.items()
+        if executor is not None
+    }
+
+
+def shutdown_executors():
+    """Wait for queued work and release the worker threads"""
+    global _inference_executor, _db_executor, _db_writer_executor, _password_executor
+    with _lock:
+        for executor in (_inference_executor, _db_executor, _db_writer_executor, _password_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        _inference_executor = None
+        _db_executor = None
+        _db_writer_executor = None
+        _password_executor = None
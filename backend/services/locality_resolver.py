@@ -0,0 +1,149 @@
+"""
+In-memory locality resolver shared by all routers
+
+Localities are a small, slowly changing table (14 Navi Mumbai nodes), yet
+every prediction, history, trend and locality request used to look one up
+with ``Locality.name.ilike(...)``, which cannot use the unique index on
+``name``. The resolver keeps a normalized name -> LocalitySnapshot map in
+memory, refreshed in the background every LOCALITY_REFRESH_INTERVAL_SECONDS
+and immediately after writes that touch locality rows.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from config import get_settings
+from database import SessionLocal
+from models import Locality
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_locality_name(name: str) -> str:
+    """Case- and whitespace-insensitive lookup key for a locality name"""
+    return " ".join(name.split()).casefold()
+
+
+@dataclass(frozen=True)
+class LocalitySnapshot:
+    """Read-only copy of a Locality row"""
+
+    id: int
+    name: str
+    node_type: Optional[str]
+    metro_distance_km: Optional[float]
+    highway_distance_km: Optional[float]
+    avg_price_per_sqft: Optional[float]
+    avg_price_updated: Optional[datetime]
+    transaction_volume_30days: int
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row: Locality) -> "LocalitySnapshot":
+        return cls(
+            id=row.id,
+            name=row.name,
+            node_type=row.node_type,
+            metro_distance_km=row.metro_distance_km,
+            highway_distance_km=row.highway_distance_km,
+            avg_price_per_sqft=row.avg_price_per_sqft,
+            avg_price_updated=row.avg_price_updated,
+            transaction_volume_30days=row.transaction_volume_30days or 0,
+            created_at=row.created_at,
+        )
+
+
+class LocalityResolver:
+    """Resolves locality names and ids without touching the database"""
+
+    def __init__(self, session_factory=SessionLocal, settings=None):
+        self.settings = settings or get_settings()
+        self._session_factory = session_factory
+        self._supported = frozenset(
+            normalize_locality_name(name) for name in self.settings.SUPPORTED_LOCALITIES
+        )
+        self._by_name: Dict[str, LocalitySnapshot] = {}
+        self._by_id: Dict[int, LocalitySnapshot] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher = None
+
+    def is_supported(self, name: str) -> bool:
+        """True if the locality is in SUPPORTED_LOCALITIES (set lookup)"""
+        return normalize_locality_name(name) in self._supported
+
+    def resolve(self, name: str) -> Optional[LocalitySnapshot]:
+        """Snapshot for a locality name, or None if unknown"""
+        return self._by_name.get(normalize_locality_name(name))
+
+    def get(self, locality_id: int) -> Optional[LocalitySnapshot]:
+        """Snapshot for a locality id, or None if unknown"""
+        return self._by_id.get(locality_id)
+
+    def all(self) -> List[LocalitySnapshot]:
+        """Every locality, ordered by id"""
+        by_id = self._by_id
+        return [by_id[key] for key in sorted(by_id)]
+
+    def refresh(self):
+        """Reload every locality row and swap the maps in one step (blocking)"""
+        db = self._session_factory()
+        try:
+            rows = db.query(Locality).all()
+            snapshots = [LocalitySnapshot.from_row(row) for row in rows]
+        finally:
+            db.close()
+        self._install(snapshots)
+        logger.info(f"Locality resolver refreshed ({len(snapshots)} localities)")
+
+    def update(self, snapshot: LocalitySnapshot):
+        """Replace one locality after a write without reloading the table"""
+        with self._lock:
+            by_id = dict(self._by_id)
+            by_id[snapshot.id] = snapshot
+            self._publish(by_id.values())
+
+    def _install(self, snapshots):
+        with self._lock:
+            self._publish(snapshots)
+
+    def _publish(self, snapshots):
+        # Build new dicts and rebind; readers never see a half-built map
+        snapshots = list(snapshots)
+        self._by_name = {normalize_locality_name(s.name): s for s in snapshots}
+        self._by_id = {s.id: s for s in snapshots}
+
+    def start_refresher(self):
+        """Refresh in a daemon thread every LOCALITY_REFRESH_INTERVAL_SECONDS"""
+        interval = self.settings.LOCALITY_REFRESH_INTERVAL_SECONDS
+        if interval <= 0 or self._refresher is not None:
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(
+            target=self._watch, args=(interval,), name="locality-resolver-refresh", daemon=True
+        )
+        self._refresher.start()
+
+    def stop_refresher(self):
+        """Stop the background refresh thread"""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Locality resolver refresh failed: {e}")
+
+
+@lru_cache()
+def get_locality_resolver() -> LocalityResolver:
+    """Get the process-wide locality resolver"""
+    return LocalityResolver()
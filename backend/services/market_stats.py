@@ -0,0 +1,189 @@
+"""
+Rolling locality market statistics
+
+Locality.avg_price_per_sqft and Locality.transaction_volume_30days are kept
+current from the "transaction" rows of the daily rollup table
+(services.trend_rollup). The window is MARKET_STATS_WINDOW_DAYS day buckets:
+
+- writing a priced Property re-aggregates at most WINDOW_DAYS rollup rows for
+  its locality (a primary-key range read) and updates the Locality row in the
+  same transaction;
+- a periodic sweep re-aggregates every locality so day buckets that slide
+  out of the window expire without rescanning the properties table.
+
+Changed values are pushed into the locality resolver, so the stats endpoint
+and inference read them from memory. A locality with no transactions in the
+window keeps its last known average and reports a volume of 0.
+
+Both paths lock the Locality rows (SELECT ... FOR UPDATE) before reading
+the window totals. Under read committed the totals query then runs after
+any concurrent writer of the same locality has committed, so the last
+writer never stores an aggregate that misses the other's rows. On
+PostgreSQL the sweep also takes a transaction-level advisory lock, so when
+several workers start (or wake) together only one of them sweeps; the
+others skip and pick the values up on the resolver's next refresh. SQLite
+serializes writers on its own and ignores both locks.
+"""
+
+import logging
+import threading
+from dataclasses import replace
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import SessionLocal
+from models import Locality, LocalityDailyStat
+from services.locality_resolver import get_locality_resolver
+from services.trend_rollup import SOURCE_TRANSACTION
+
+logger = logging.getLogger(__name__)
+
+SWEEP_LOCK_KEY = 0x6D6B7473  # pg advisory lock id for the sweep ("mkts")
+
+
+class MarketStats:
+    """Maintains rolling per-locality transaction averages and volumes"""
+
+    def __init__(self, window_days: int, session_factory=SessionLocal):
+        self.window_days = max(1, window_days)
+        self._session_factory = session_factory
+        self._stop = threading.Event()
+        self._sweeper = None
+
+    def _window_totals(self, db: Session, locality_ids: Optional[Iterable[int]] = None) -> Dict[int, tuple]:
+        """(count, sum of price per sqft) per locality over the current window"""
+        start = datetime.utcnow().date() - timedelta(days=self.window_days - 1)
+        query = (
+            select(
+                LocalityDailyStat.locality_id,
+                func.sum(LocalityDailyStat.sample_count),
+                func.sum(LocalityDailyStat.sum_price_per_sqft),
+            )
+            .where(
+                LocalityDailyStat.source == SOURCE_TRANSACTION,
+                LocalityDailyStat.day >= start,
+            )
+            .group_by(LocalityDailyStat.locality_id)
+        )
+        if locality_ids is not None:
+            query = query.where(LocalityDailyStat.locality_id.in_(list(locality_ids)))
+        return {locality_id: (int(count or 0), float(total or 0.0)) for locality_id, count, total in db.execute(query)}
+
+    @staticmethod
+    def _lock_localities(db: Session, locality_ids: Optional[Iterable[int]] = None) -> list:
+        """Lock Locality rows in id order (deadlock-free); returns the locked ids"""
+        query = select(Locality.id).order_by(Locality.id).with_for_update()
+        if locality_ids is not None:
+            query = query.where(Locality.id.in_(list(locality_ids)))
+        return list(db.execute(query).scalars())
+
+    @staticmethod
+    def _try_sweep_lock(db: Session) -> bool:
+        """Advisory lock held until commit so concurrent sweeps in other processes skip"""
+        if db.get_bind().dialect.name != "postgresql":
+            return True
+        return bool(db.execute(select(func.pg_try_advisory_xact_lock(SWEEP_LOCK_KEY))).scalar())
+
+    def _apply(self, db: Session, locality_ids: Iterable[int], totals: Dict[int, tuple]) -> Dict[int, dict]:
+        """Write window aggregates to the Locality rows; returns the new values"""
+        now = datetime.utcnow()
+        changes = {}
+        for locality_id in locality_ids:
+            count, total = totals.get(locality_id, (0, 0.0))
+            values = {"transaction_volume_30days": count}
+            if count:
+                values["avg_price_per_sqft"] = total / count
+                values["avg_price_updated"] = now
+            db.execute(update(Locality).where(Locality.id == locality_id).values(**values))
+            changes[locality_id] = values
+        return changes
+
+    def record(self, db: Session, properties: Iterable) -> Dict[int, dict]:
+        """
+        Refresh the localities touched by newly written properties
+
+        Call after trend_rollup.record_transactions and before commit, then
+        pass the result to publish() once the transaction has committed.
+
+        Args:
+            db: Session holding the uncommitted property rows
+            properties: Property objects or column values (dicts) just written
+
+        Returns:
+            New Locality column values keyed by locality id
+        """
+        locality_ids = set()
+        for p in properties:
+            locality_id, price_per_sqft = (
+                (p.get("locality_id"), p.get("price_per_sqft")) if isinstance(p, dict)
+                else (p.locality_id, p.price_per_sqft)
+            )
+            if locality_id is not None and price_per_sqft is not None:
+                locality_ids.add(locality_id)
+        if not locality_ids:
+            return {}
+        locality_ids = self._lock_localities(db, locality_ids)
+        return self._apply(db, locality_ids, self._window_totals(db, locality_ids))
+
+    def publish(self, changes: Dict[int, dict]):
+        """Push committed Locality values into the in-memory resolver"""
+        resolver = get_locality_resolver()
+        for locality_id, values in changes.items():
+            snapshot = resolver.get(locality_id)
+            if snapshot is not None:
+                resolver.update(replace(snapshot, **values))
+
+    def sweep(self) -> Dict[int, dict]:
+        """Recompute every locality so expired day buckets drop out (blocking)"""
+        db = self._session_factory()
+        try:
+            if not self._try_sweep_lock(db):
+                logger.info("Market stats sweep already running in another process, skipped")
+                db.rollback()
+                return {}
+            locality_ids = self._lock_localities(db)
+            changes = self._apply(db, locality_ids, self._window_totals(db))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self.publish(changes)
+        return changes
+
+    def start_sweeper(self):
+        """Sweep in a daemon thread every MARKET_STATS_SWEEP_INTERVAL_SECONDS"""
+        interval = get_settings().MARKET_STATS_SWEEP_INTERVAL_SECONDS
+        if interval <= 0 or self._sweeper is not None:
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(
+            target=self._watch, args=(interval,), name="market-stats-sweep", daemon=True
+        )
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        """Stop the background sweep thread"""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Market stats sweep failed: {e}")
+
+
+@lru_cache()
+def get_market_stats() -> MarketStats:
+    """Get the process-wide market statistics maintainer"""
+    return MarketStats(window_days=get_settings().MARKET_STATS_WINDOW_DAYS)
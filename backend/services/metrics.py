@@ -0,0 +1,334 @@
+"""
+In-process Prometheus metrics, exposed at GET /metrics
+
+Histograms keep their samples in dicts keyed by label
+values. Recording is a dict lookup, a bisect and two additions under a
+lock, a fraction of a microsecond. Values the services already track
+(cache hit counts, queue depths, executor backlogs) are read by
+collectors at scrape time, so they cost nothing per request.
+
+Per-request numbers are gathered by MetricsMiddleware (a plain ASGI
+middleware, no per-request Request/Response objects): latency by route
+template, method and status, plus the number of SQL statements and time
+spent in the database. The database figures come from SQLAlchemy cursor
+events (instrument_engine) and reach the request through a context
+variable, which services.executors carries into its worker threads.
+
+Metrics are per process. Under gunicorn, scrape every worker (or run one
+worker per container) rather than the load-balanced port.
+"""
+
+import bisect
+import contextvars
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Response appends the charset
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 1000)
+SQL_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "PRAGMA"})
+PRICE_PER_SQFT_BUCKETS = (2500, 5000, 7500, 10000, 12500, 15000, 20000, 25000, 30000, 40000, 60000, 100000)
+
+# (labels, value) pairs reported by a collector for one metric
+Samples = Iterable[Tuple[Dict[str, str], float]]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def _labels(self, values: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds; observe(value, *labelvalues)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(labelvalues, list(counts), total) for labelvalues, (counts, total) in self._values.items()]
+        lines = self._header()
+        for labelvalues, counts, total in values:
+            labels = self._labels(labelvalues)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                bucket_labels = dict(labels, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics and scrape-time collectors rendered together in text format"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Tuple[str, str, str, Callable[[], Samples]]] = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(self, name: str, kind: str, documentation: str, collect: Callable[[], Samples]):
+        """
+        Register a metric whose samples are read at scrape time
+
+        Args:
+            name: Metric name (counters include the _total suffix here)
+            kind: "gauge" or "counter"
+            documentation: HELP text
+            collect: Returns (labels, value) pairs
+        """
+        with self._lock:
+            self._collectors.append((name, kind, documentation, collect))
+
+    def _add(self, metric: _Metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+        for name, kind, documentation, collect in list(self._collectors):
+            try:
+                samples = list(collect())
+            except Exception as e:
+                logger.warning(f"Metrics collector {name} failed: {e}")
+                continue
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+REQUEST_DB_QUERIES = registry.histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request",
+    ("route",), buckets=COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = registry.histogram(
+    "http_request_db_seconds", "Time spent executing SQL per HTTP request",
+    ("route",),
+)
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time",
+    ("operation",), buckets=FAST_BUCKETS + (0.25, 1.0),
+)
+MODEL_INFERENCE_DURATION = registry.histogram(
+    "model_inference_seconds", "Model scoring time per call (one call may score a batch)",
+    ("evaluator",),
+)
+MODEL_INFERENCE_ROWS = registry.histogram(
+    "model_inference_rows", "Rows scored per model call",
+    ("evaluator",), buckets=(1, 2, 4, 8, 16, 32, 64, 256, 1024, 4096),
+)
+FEATURE_PREP_DURATION = registry.histogram(
+    "feature_prep_seconds", "Feature preparation time per request",
+    ("mode",), buckets=FAST_BUCKETS,
+)
+PREDICTED_PRICE_PER_SQFT = registry.histogram(
+    "prediction_price_per_sqft", "Predicted price per sqft served, by locality (drift)",
+    ("locality",), buckets=PRICE_PER_SQFT_BUCKETS,
+)
+
+
+class RequestStats:
+    """Database work attributed to one request"""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def instrument_engine(engine):
+    """Time every SQL statement on `engine` and attribute it to the current request"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        operation = statement.lstrip()[:6].upper()
+        DB_QUERY_DURATION.observe(elapsed, operation if operation in SQL_OPERATIONS else "OTHER")
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+
+_route_templates: Dict[Callable, str] = {}
+
+
+def route_template(scope) -> Optional[str]:
+    """Path template of the route that handled a request (None if nothing matched)"""
+    # The router leaves the matched endpoint in the scope; label by its
+    # path template so path parameters don't create new series
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return None
+    route = _route_templates.get(endpoint)
+    if route is None:
+        for candidate in getattr(scope.get("app"), "routes", ()):
+            if getattr(candidate, "endpoint", None) is endpoint:
+                route = candidate.path
+                break
+        else:
+            route = getattr(endpoint, "__name__", "unknown")
+        _route_templates[endpoint] = route
+    return route
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and DB work per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            route = route_template(scope) or "unmatched"
+            REQUEST_DURATION.observe(elapsed, scope["method"], route, str(status))
+            REQUEST_DB_QUERIES.observe(stats.queries, route)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, route)
+
+
+def register_service_collectors():
+    """Export cache, queue and model state that the services already track"""
+    from services.auth import get_user_cache
+    from services.batching import get_inference_batcher
+    from services.executors import queue_depths
+    from services.model_registry import get_model_registry
+    from services.prediction_cache import get_prediction_cache
+    from services.prediction_log import get_prediction_log_writer
+    from services import tracing
+
+    def caches():
+        prediction_cache = get_prediction_cache()
+        if prediction_cache is not None:
+            yield "prediction", prediction_cache.hits, prediction_cache.misses, len(prediction_cache.local)
+        user_cache = get_user_cache()
+        yield "auth_user", user_cache.hits, user_cache.misses, len(user_cache)
+
+    def queues():
+        yield {"queue": "inference_batcher"}, get_inference_batcher().stats()["queue_depth"]
+        yield {"queue": "prediction_log"}, get_prediction_log_writer().stats()["queue_depth"]
+        for name, depth in queue_depths().items():
+            yield {"queue": f"executor_{name}"}, depth
+
+    registry.collector("cache_hits_total", "counter", "Cache lookups answered from the cache",
+                       lambda: [({"cache": name}, hits) for name, hits, _, _ in caches()])
+    registry.collector("cache_misses_total", "counter", "Cache lookups that missed",
+                       lambda: [({"cache": name}, misses) for name, _, misses, _ in caches()])
+    registry.collector("cache_entries", "gauge", "Entries held in the in-process cache",
+                       lambda: [({"cache": name}, entries) for name, _, _, entries in caches()])
+    registry.collector("queue_depth", "gauge", "Items waiting in in-process queues and executor backlogs", queues)
+    registry.collector("prediction_log_failed_flushes_total", "counter",
+                       "Prediction log batches that failed to insert",
+                       lambda: [({}, get_prediction_log_writer().stats()["failed_flushes"])])
+    registry.collector("prediction_log_dropped_rows_total", "counter",
+                       "Prediction rows dropped after repeated insert failures",
+                       lambda: [({}, get_prediction_log_writer().stats()["dropped_rows"])])
+    registry.collector("trace_dropped_spans_total", "counter",
+                       "Finished spans dropped because the trace exporter queue was full",
+                       lambda: [({}, tracing.dropped_spans())])
+    registry.collector("model_info", "gauge", "Model version being served",
+                       lambda: [({"version": get_model_registry().get().version}, 1)])
+
+
+def render_metrics() -> str:
+    """Current metrics in the Prometheus text exposition format"""
+    return registry.render()
@@ -0,0 +1,146 @@
+"""
+Reader for the versioned model bundles written by ml/bundle.py
+
+A bundle directory carries a manifest (model version, feature names,
+locality categories, training metrics, sha256 of every payload file),
+the model itself and, for XGBoost models, the flattened node arrays of
+the compiled evaluator as .npy files. The node arrays are memory-mapped
+read-only in the dtypes the evaluator uses, so loading them copies
+nothing and all worker processes share the same page-cache pages.
+
+With lazy=True an XGBoost model that has compiled arrays is not
+deserialized up front: xgboost (and the scikit-learn stack it imports)
+is only loaded when something first calls the model, e.g. a batch too
+large for the compiled evaluator. Single predictions never need it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+CURRENT_NAME = "CURRENT"
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """One loaded bundle; compiled_arrays are read-only memory maps"""
+
+    version: str
+    path: str
+    model: Any
+    scaler: Any
+    feature_names: List[str]
+    locality_categories: Optional[List[str]]
+    metrics: Dict[str, Any] = field(default_factory=dict)
+    compiled_arrays: Optional[Dict[str, Any]] = None
+
+
+class LazyModel:
+    """Stand-in that loads the XGBoost model on first attribute access"""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._model = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = _load_xgboost(self._path)
+                    logger.info(f"XGBoost model loaded on first use from {self._path}")
+        return self._model
+
+
+def current_version(bundle_dir: str) -> Optional[str]:
+    """Version named by the CURRENT pointer, or None if nothing was published"""
+    try:
+        with open(os.path.join(bundle_dir, CURRENT_NAME)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_bundle(path: str, verify: bool = True, lazy: bool = False) -> ModelBundle:
+    """
+    Load a bundle directory
+
+    Args:
+        path: Bundle directory (bundle_dir/<version>)
+        verify: Check every payload file against its manifest sha256
+        lazy: Defer loading an XGBoost model that has compiled arrays until first use
+
+    Raises:
+        ValueError: Unknown format or a file that does not match the manifest
+    """
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported model bundle format: {manifest.get('format')}")
+    if verify:
+        _verify_files(path, manifest["files"])
+
+    model_path = os.path.join(path, manifest["model_file"])
+    if manifest["model_type"] == "xgboost":
+        model = LazyModel(model_path) if lazy and manifest.get("compiled") else _load_xgboost(model_path)
+    else:
+        import joblib
+
+        model = joblib.load(model_path, mmap_mode="r")
+
+    scaler = None
+    if manifest.get("scaler_file") and not manifest.get("raw_features"):
+        import joblib
+
+        scaler = joblib.load(os.path.join(path, manifest["scaler_file"]))
+
+    compiled_arrays = None
+    if manifest.get("compiled"):
+        compiled = dict(manifest["compiled"])
+        compiled_arrays = {
+            name: np.load(os.path.join(path, file), mmap_mode="r", allow_pickle=False)
+            for name, file in compiled.pop("arrays").items()
+        }
+        compiled_arrays.update(compiled)
+
+    return ModelBundle(
+        version=manifest["model_version"],
+        path=path,
+        model=model,
+        scaler=scaler,
+        feature_names=list(manifest["feature_names"]),
+        locality_categories=manifest.get("locality_categories"),
+        metrics=manifest.get("metrics") or {},
+        compiled_arrays=compiled_arrays,
+    )
+
+
+def _load_xgboost(path: str):
+    import xgboost as xgb
+
+    model = xgb.XGBRegressor(enable_categorical=True)
+    model.load_model(path)
+    return model
+
+
+def _verify_files(path: str, files: Dict[str, dict]):
+    for name, expected in files.items():
+        digest = hashlib.sha256()
+        with open(os.path.join(path, name), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        if digest.hexdigest() != expected["sha256"]:
+            raise ValueError(f"Model bundle file {name} does not match its manifest checksum")
@@ -0,0 +1,242 @@
+"""
+Process-wide registry for the trained ML artifacts
+
+The registry loads the published model bundle (see services/model_bundle.py)
+once and hands every request the same immutable ModelHandle, which carries
+the bundle's model version. Serving models trained with the scaler folded
+into their trees take raw features and need no scaler. When the bundle has
+compiled node arrays, the handle scores single rows and small batches with
+them instead of the stock predictor. A background watcher polls the
+bundle's CURRENT pointer and swaps in a freshly loaded handle when a new
+version is published.
+
+Deployments without a bundle keep loading the separate pickle artifacts
+(MODEL_PATH, SCALER_PATH, FEATURE_NAMES_PATH); their version is
+"legacy-<fingerprint>".
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import get_settings
+from services.compiled_ensemble import CompiledEnsemble
+from services.model_bundle import current_version, load_bundle
+from services.locality_resolver import normalize_locality_name
+from services.metrics import MODEL_INFERENCE_DURATION, MODEL_INFERENCE_ROWS
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelHandle:
+    """Immutable, fully loaded set of model artifacts"""
+
+    model: Any
+    scaler: Any
+    feature_names: Optional[List[str]]
+    fingerprint: str
+    version: str = ""
+    locality_codes: Dict[str, int] = field(default_factory=dict)
+    compiled: Optional[CompiledEnsemble] = None
+    compiled_max_rows: int = 0
+
+    @property
+    def is_ready(self) -> bool:
+        """True when the ML model can be used (otherwise callers fall back)"""
+        return self.model is not None
+
+    def predict(self, matrix: np.ndarray) -> np.ndarray:
+        """Score a 2-D raw feature matrix and return predicted total prices"""
+        started = time.perf_counter()
+        if self.scaler is not None:
+            with span("model.scale", rows=len(matrix)):
+                matrix = self.scaler.transform(matrix)
+        # NumPy walk wins on per-call overhead; XGBoost's native loop on large batches
+        evaluator = "compiled" if self.compiled is not None and len(matrix) <= self.compiled_max_rows else "model"
+        with span("model.predict", rows=len(matrix), evaluator=evaluator, model_version=self.version):
+            if evaluator == "compiled":
+                predictions = self.compiled.predict(matrix)
+            else:
+                predictions = self.model.predict(matrix)
+        MODEL_INFERENCE_DURATION.observe(time.perf_counter() - started, evaluator)
+        MODEL_INFERENCE_ROWS.observe(len(matrix), evaluator)
+        return predictions
+
+    def locality_code(self, name: str) -> float:
+        """Categorical code the model was trained with for a locality (NaN if unseen)"""
+        return self.locality_codes.get(normalize_locality_name(name), np.nan)
+
+
+EMPTY_HANDLE = ModelHandle(model=None, scaler=None, feature_names=None, fingerprint="fallback", version="fallback")
+
+
+class ModelRegistry:
+    """Loads model artifacts once and hot-swaps them when the files change"""
+
+    def __init__(self, settings=None):
+        self.settings = settings or get_settings()
+        self._handle = EMPTY_HANDLE
+        self._signature = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._swap_listeners: List[Callable[[ModelHandle], None]] = []
+
+    @property
+    def paths(self) -> Tuple[str, str, str]:
+        return (
+            self.settings.MODEL_PATH,
+            self.settings.SCALER_PATH,
+            self.settings.FEATURE_NAMES_PATH,
+        )
+
+    def get(self) -> ModelHandle:
+        """Return the current handle (a single reference read, never partial)"""
+        return self._handle
+
+    def add_swap_listener(self, callback: Callable[[ModelHandle], None]):
+        """Call ``callback(new_handle)`` after every successful hot-swap"""
+        self._swap_listeners.append(callback)
+
+    def _artifact_signature(self) -> Optional[tuple]:
+        """(mtime, size) of every artifact, or None if a required file is missing"""
+        signature = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def load(self) -> bool:
+        """
+        Load the current bundle (or the legacy artifacts) and swap it in if it changed
+
+        Returns:
+            True if a new handle was installed
+        """
+        with self._lock:
+            version = current_version(self.settings.MODEL_BUNDLE_DIR)
+            # Bundles are immutable, so the published version identifies the content
+            signature = ("bundle", version) if version else self._artifact_signature()
+            if signature is None:
+                if self._signature is None:
+                    logger.warning("Model artifacts not found. Using fallback model.")
+                return False
+            if signature == self._signature:
+                return False
+
+            if version:
+                handle = self._load_bundle(version)
+            else:
+                handle = self._load_legacy(signature)
+            if handle is None:
+                return False
+            self._handle = handle
+            self._signature = signature
+            logger.info(f"ML model {handle.version} loaded successfully "
+                        f"({'compiled' if handle.compiled else 'stock'} predictor)")
+
+        for callback in self._swap_listeners:
+            try:
+                callback(handle)
+            except Exception as e:
+                logger.error(f"Model swap listener failed: {e}")
+        return True
+
+    def _load_bundle(self, version: str) -> Optional[ModelHandle]:
+        try:
+            bundle = load_bundle(
+                os.path.join(self.settings.MODEL_BUNDLE_DIR, version),
+                verify=self.settings.MODEL_BUNDLE_VERIFY,
+                lazy=self.settings.LAZY_STARTUP and self.settings.COMPILED_INFERENCE_ENABLED,
+            )
+            compiled = None
+            if self.settings.COMPILED_INFERENCE_ENABLED and bundle.compiled_arrays:
+                compiled = CompiledEnsemble(bundle.compiled_arrays)
+        except Exception as e:
+            logger.warning(f"Could not load model bundle {version}: {e}. Keeping current model.")
+            return None
+
+        return ModelHandle(
+            model=bundle.model,
+            scaler=bundle.scaler,
+            feature_names=bundle.feature_names,
+            fingerprint=bundle.version,
+            version=bundle.version,
+            locality_codes=_locality_codes(bundle.locality_categories),
+            compiled=compiled,
+            compiled_max_rows=self.settings.COMPILED_INFERENCE_MAX_ROWS,
+        )
+
+    def _load_legacy(self, signature: tuple) -> Optional[ModelHandle]:
+        """Separate pickle artifacts from before the bundle format"""
+        import joblib
+
+        try:
+            model = joblib.load(self.settings.MODEL_PATH)
+            scaler = joblib.load(self.settings.SCALER_PATH)
+            feature_names = joblib.load(self.settings.FEATURE_NAMES_PATH)
+        except Exception as e:
+            logger.warning(f"Could not load pre-trained model: {e}. Keeping current model.")
+            return None
+
+        # A writer may still have been replacing files while we read them;
+        # only publish a handle whose inputs did not move underneath us.
+        if self._artifact_signature() != signature:
+            logger.info("Model artifacts changed during load, retrying on next poll")
+            return None
+
+        fingerprint = hashlib.sha1(repr(signature).encode()).hexdigest()[:12]
+        return ModelHandle(
+            model=model,
+            scaler=scaler,
+            feature_names=list(feature_names),
+            fingerprint=fingerprint,
+            version=f"legacy-{fingerprint}",
+        )
+
+    def start_watcher(self):
+        """Poll the artifact paths in a daemon thread and hot-swap on change"""
+        interval = self.settings.MODEL_RELOAD_INTERVAL_SECONDS
+        if interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="model-registry-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self):
+        """Stop the background watcher thread"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _watch(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.load()
+            except Exception as e:
+                logger.error(f"Model registry reload failed: {e}")
+
+
+def _locality_codes(categories: Optional[List[str]]) -> Dict[str, int]:
+    return {normalize_locality_name(name): code for code, name in enumerate(categories or [])}
+
+
+@lru_cache()
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry"""
+    return ModelRegistry()
@@ -0,0 +1,166 @@
+"""
+Prediction result cache
+
+Keys are a SHA-256 over the canonicalized PredictionRequest, the model
+fingerprint and the locality inputs the model actually sees (distances and
+average price). A model hot-swap or a change in locality averages therefore
+produces new keys automatically; the in-process tier is also cleared when
+the registry swaps models.
+
+Tiers:
+- in-process LRU with TTL (services/ttl_cache.py; always on when caching is enabled)
+- optional Redis tier shared by all workers (PREDICTION_CACHE_REDIS_ENABLED)
+
+InMemoryRedis implements the small async Redis surface used here so the
+two-tier path can be exercised without a Redis server
+(tests/test_prediction_cache.py).
+"""
+
+import hashlib
+import json
+import logging
+import time
+from functools import lru_cache
+from typing import Optional
+
+from config import get_settings
+from schemas import PredictionRequest
+from services.model_registry import get_model_registry
+from services.ttl_cache import LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_request_key(request: PredictionRequest, locality, model_fingerprint: str) -> str:
+    """Stable hash of everything that determines a prediction's outputs"""
+    payload = request.model_dump()
+    payload["locality_name"] = payload["locality_name"].strip().casefold()
+    payload["_locality"] = [
+        locality.id,
+        locality.metro_distance_km,
+        locality.highway_distance_km,
+        locality.avg_price_per_sqft,
+    ]
+    payload["_model"] = model_fingerprint
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class InMemoryRedis:
+    """Async stand-in for the subset of redis.asyncio.Redis used by the cache"""
+
+    def __init__(self):
+        self._data = {}
+
+    async def get(self, name: str) -> Optional[bytes]:
+        entry = self._data.get(name)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[name]
+            return None
+        return value
+
+    async def set(self, name: str, value, ex: Optional[int] = None):
+        if isinstance(value, str):
+            value = value.encode()
+        expires_at = time.monotonic() + ex if ex else None
+        self._data[name] = (value, expires_at)
+        return True
+
+    async def delete(self, *names: str) -> int:
+        return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+    async def flushdb(self):
+        self._data.clear()
+        return True
+
+
+class PredictionCache:
+    """Two-tier (local LRU + optional Redis) cache of prediction outputs"""
+
+    KEY_PREFIX = "prediction:"
+
+    def __init__(self, local: LRUTTLCache, redis_client=None, ttl_seconds: int = 3600):
+        self.local = local
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[dict]:
+        value = self.local.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(self.KEY_PREFIX + key)
+            except Exception as e:
+                logger.warning(f"Prediction cache Redis get failed: {e}")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, value)
+                self.hits += 1
+                self.redis_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: dict):
+        self.local.set(key, value)
+        if self.redis is not None:
+            try:
+                await self.redis.set(self.KEY_PREFIX + key, json.dumps(value), ex=self.ttl_seconds)
+            except Exception as e:
+                logger.warning(f"Prediction cache Redis set failed: {e}")
+
+    def clear_local(self, *_):
+        """Drop every in-process entry (registered as a model swap listener)"""
+        self.local.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.local),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "redis_enabled": self.redis is not None,
+        }
+
+
+def _create_redis_client(url: str):
+    try:
+        import redis.asyncio as redis_asyncio
+    except ImportError:
+        logger.warning("redis package not installed; prediction cache runs without the Redis tier")
+        return None
+    return redis_asyncio.Redis.from_url(url)
+
+
+@lru_cache()
+def get_prediction_cache() -> Optional[PredictionCache]:
+    """Get the process-wide prediction cache (None when caching is disabled)"""
+    settings = get_settings()
+    if not settings.PREDICTION_CACHE_ENABLED:
+        return None
+
+    redis_client = None
+    if settings.PREDICTION_CACHE_REDIS_ENABLED:
+        redis_client = _create_redis_client(settings.REDIS_URL)
+
+    cache = PredictionCache(
+        local=LRUTTLCache(settings.PREDICTION_CACHE_MAX_ENTRIES, settings.PREDICTION_CACHE_TTL_SECONDS),
+        redis_client=redis_client,
+        ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS,
+    )
+
+    get_model_registry().add_swap_listener(cache.clear_local)
+    return cache
@@ -0,0 +1,214 @@
+"""
+Write-behind queue for prediction logging
+
+With PREDICTION_WRITE_BEHIND enabled, /predict no longer commits its
+Prediction row before responding. The row (already carrying its
+prediction_uuid) is put on a bounded in-memory queue and a background task
+bulk-inserts queued rows whenever PREDICTION_LOG_FLUSH_ROWS have
+accumulated or PREDICTION_LOG_FLUSH_INTERVAL_MS has passed.
+
+A full queue makes producers wait (backpressure) instead of dropping rows.
+A failed insert is retried with backoff, up to MAX_FLUSH_ATTEMPTS, and then
+the batch is dropped and counted so one persistent error (a missing
+column, a read-only disk) cannot stall the queue and every /predict
+behind it. stop() drains the queue on shutdown but gives up after
+STOP_TIMEOUT_SECONDS.
+
+Each queued row carries the span context of the request that produced it.
+A flush runs as its own trace ("prediction_log.flush") linked to those
+request spans, so a traced request can be followed to the insert that
+persisted it.
+"""
+
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from config import get_settings
+from database import SessionLocal
+from models import Prediction
+from services.executors import run_db_write
+from services.tracing import current_span_context, span, start_trace
+from services.trend_rollup import record_predictions
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def _insert_rows(rows: List[dict]):
+    """Bulk insert prediction rows and their trend rollups in one transaction (blocking)"""
+    db = SessionLocal()
+    try:
+        db.execute(insert(Prediction), rows)
+        record_predictions(db, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class PredictionLogWriter:
+    """Bounded queue plus a background task that bulk-inserts Prediction rows"""
+
+    MAX_RETRY_DELAY_SECONDS = 5.0
+    MAX_FLUSH_ATTEMPTS = 5
+    STOP_TIMEOUT_SECONDS = 10.0
+
+    def __init__(self, max_queue_size: int, flush_rows: int, flush_interval_ms: int):
+        self.max_queue_size = max(1, max_queue_size)
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval_seconds = max(1, flush_interval_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._rows_written = 0
+        self._flushes = 0
+        self._failed_flushes = 0
+        self._dropped_rows = 0
+        self._backpressure_waits = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the flush task on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def enqueue(self, row: dict):
+        """Queue one Prediction row; waits if the queue is full"""
+        if not self.running or self._stopping:
+            # Writer not started or shutting down: fall back to a direct insert
+            with span("db.save_prediction", rows=1):
+                await run_db_write(_insert_rows, [row])
+            return
+        if self._queue.full():
+            self._backpressure_waits += 1
+        with span("prediction_log.enqueue"):
+            await self._queue.put((row, current_span_context()))
+
+    async def stop(self, timeout: Optional[float] = None):
+        """Flush everything still queued and stop the background task"""
+        if not self.running:
+            return
+        self._stopping = True
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (self.STOP_TIMEOUT_SECONDS if timeout is None else timeout)
+        try:
+            # The sentinel queues behind every pending row, so they all get
+            # written; on a full queue it waits for the flush task to make room
+            await asyncio.wait_for(self._queue.put(_STOP), max(0.0, deadline - loop.time()))
+            await asyncio.wait_for(self._task, max(0.0, deadline - loop.time()))
+            timed_out = False
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            timed_out = True
+        self._task = None
+        # Producers that were blocked on a full queue land behind the sentinel;
+        # each get wakes one of them, so keep going until none is left
+        leftover = []
+        while True:
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not _STOP:
+                    leftover.append(item)
+            await asyncio.sleep(0)
+            if self._queue.empty():
+                break
+        if timed_out:
+            self._dropped_rows += len(leftover)
+            logger.error(f"Prediction log did not drain in time; dropping {len(leftover)} queued rows")
+        elif leftover:
+            await self._write(leftover, retries=3)
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if first is _STOP:
+                return
+            items = [first]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval_seconds
+            while len(items) < self.flush_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                items.append(item)
+            await self._write(items, retries=3 if stop else self.MAX_FLUSH_ATTEMPTS)
+            if stop:
+                return
+
+    async def _write(self, items: List[Tuple[dict, Optional[Tuple[str, str]]]], retries: int):
+        """Insert one batch of (row, span context) items, retrying with backoff up to `retries` attempts"""
+        rows = [row for row, _ in items]
+        links = [link for _, link in items if link is not None]
+        with start_trace("prediction_log.flush", links=links, rows=len(rows)) as flush:
+            try:
+                await self._write_rows(rows, retries, flush)
+            except asyncio.CancelledError:
+                # stop() timed out; an insert already running in the writer thread may still land
+                self._dropped_rows += len(rows)
+                raise
+
+    async def _write_rows(self, rows: List[dict], retries: int, flush):
+        delay = 0.1
+        attempt = 0
+        while True:
+            try:
+                await run_db_write(_insert_rows, rows)
+                self._rows_written += len(rows)
+                self._flushes += 1
+                return
+            except Exception as e:
+                self._failed_flushes += 1
+                attempt += 1
+                flush.set_attribute("attempts", attempt)
+                if attempt >= retries:
+                    self._dropped_rows += len(rows)
+                    logger.error(f"Dropping {len(rows)} prediction rows after {attempt} failed flushes: {e}")
+                    return
+                logger.warning(f"Prediction log flush failed ({len(rows)} rows), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.MAX_RETRY_DELAY_SECONDS)
+
+    def stats(self) -> dict:
+        """Queue depth and flush counters"""
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_size": self.max_queue_size,
+            "rows_written": self._rows_written,
+            "flushes": self._flushes,
+            "failed_flushes": self._failed_flushes,
+            "dropped_rows": self._dropped_rows,
+            "backpressure_waits": self._backpressure_waits,
+        }
+
+
+@lru_cache()
+def get_prediction_log_writer() -> PredictionLogWriter:
+    """Get the process-wide prediction log writer"""
+    settings = get_settings()
+    return PredictionLogWriter(
+        max_queue_size=settings.PREDICTION_LOG_QUEUE_SIZE,
+        flush_rows=settings.PREDICTION_LOG_FLUSH_ROWS,
+        flush_interval_ms=settings.PREDICTION_LOG_FLUSH_INTERVAL_MS,
+    )
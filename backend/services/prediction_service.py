@@ -3,13 +3,24 @@ Prediction service for handling ML model predictions
 """
 
 import logging
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from schemas import PredictionRequest, PredictionResponse
-from models import Prediction, Locality
+from models import Prediction
 from datetime import datetime
-import joblib
+import time
+import uuid
 import numpy as np
 from config import get_settings
+from services.model_registry import ModelHandle, get_model_registry
+from services.batching import get_inference_batcher
+from services.executors import run_db, run_db_write, run_inference
+from services.prediction_log import get_prediction_log_writer
+from services.prediction_cache import canonical_request_key, get_prediction_cache
+from services.locality_resolver import LocalitySnapshot, get_locality_resolver
+from services.trend_rollup import record_predictions
+from services.metrics import FEATURE_PREP_DURATION, PREDICTED_PRICE_PER_SQFT
+from services.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -17,24 +28,15 @@ logger = logging.getLogger(__name__)
 class PredictionService:
     """Service for handling property price predictions"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, handle: ModelHandle = None):
         self.db = db
         self.settings = get_settings()
-        self.model = None
-        self.scaler = None
-        self.feature_names = None
-        self._load_model()
-    
-    def _load_model(self):
-        """Load pre-trained ML model and scaler"""
-        try:
-            self.model = joblib.load(self.settings.MODEL_PATH)
-            self.scaler = joblib.load(self.settings.SCALER_PATH)
-            self.feature_names = joblib.load(self.settings.FEATURE_NAMES_PATH)
-            logger.info("ML model loaded successfully")
-        except Exception as e:
-            logger.warning(f"Could not load pre-trained model: {e}. Using fallback model.")
-            self.model = None
+        # Pin one registry handle for the whole request so a concurrent
+        # hot-swap can never mix artifacts from two model versions
+        self.handle = handle or get_model_registry().get()
+        self.model = self.handle.model
+        self.feature_names = self.handle.feature_names
+        self.localities = get_locality_resolver()
     
     async def predict(self, request: PredictionRequest) -> PredictionResponse:
         """
@@ -46,27 +48,66 @@ class PredictionService:
         Returns:
             Prediction with price estimate and confidence interval
         """
-        # Get locality information
-        locality = self.db.query(Locality).filter(
-            Locality.name.ilike(request.locality_name)
-        ).first()
+        # Get locality information (in-memory, no query)
+        with span("locality.resolve"):
+            locality = self.localities.resolve(request.locality_name)
         
         if not locality:
             raise ValueError(f"Locality {request.locality_name} not found")
         
+        # Repeated requests (same property, locality inputs and model) skip inference
+        cache = get_prediction_cache()
+        cache_key = canonical_request_key(request, locality, self.handle.fingerprint) if cache else None
+        with span("prediction.cache_lookup") as lookup:
+            outputs = await cache.get(cache_key) if cache else None
+            lookup.set_attribute("cache.hit", outputs is not None)
+        
+        if outputs is None:
+            outputs = await self._compute_outputs(request, locality)
+            if cache:
+                await cache.set(cache_key, outputs)
+        PREDICTED_PRICE_PER_SQFT.observe(outputs["predicted_price_per_sqft"], locality.name)
+        
+        # Store prediction in database
+        values = self._prediction_values(
+            request, locality,
+            created_at=datetime.utcnow(),
+            **outputs
+        )
+        
+        if self.settings.PREDICTION_WRITE_BEHIND:
+            # The row is persisted by the background writer; the response is
+            # identified by its pre-generated prediction_uuid
+            await get_prediction_log_writer().enqueue(values)
+            return self._to_response(Prediction(**values), request.locality_name)
+        
+        db_prediction = Prediction(**values)
+        await run_db_write(self._save_prediction, db_prediction)
+        
+        return self._to_response(db_prediction, request.locality_name)
+    
+    async def _compute_outputs(self, request: PredictionRequest, locality: LocalitySnapshot) -> dict:
+        """Run feature preparation, inference and post-processing for one request"""
         # Prepare features for prediction
-        features = self._prepare_features(request, locality)
+        started = time.perf_counter()
+        with span("prediction.prepare_features"):
+            features = self._prepare_features(request, locality)
+        FEATURE_PREP_DURATION.observe(time.perf_counter() - started, "single")
         
         # Make prediction
-        if self.model and self.scaler:
+        if self.handle.is_ready:
             # Model predicts TOTAL PRICE for the property
-            predicted_total_price = self._predict_with_ml(features)
+            if self.settings.INFERENCE_BATCHING_ENABLED:
+                predicted_total_price = await self._predict_with_scheduler(features)
+            else:
+                predicted_total_price = await run_inference(self._predict_with_ml, features)
         else:
             # Fallback: Use locality average + adjustments
             predicted_total_price = self._predict_with_fallback(request, locality)
         
         # Sanity check: cap unrealistic prices
-        predicted_total_price = self._apply_sanity_check(predicted_total_price)
+        with span("prediction.sanity_check"):
+            predicted_total_price = self._apply_sanity_check(predicted_total_price)
         
         # Calculate price per sqft from total price
         predicted_price_per_sqft = predicted_total_price / request.carpet_area_sqft
@@ -77,8 +118,134 @@ class PredictionService:
         lower_bound = predicted_total_price - margin
         upper_bound = predicted_total_price + margin
         
-        # Store prediction in database
-        db_prediction = Prediction(
+        return {
+            "predicted_total_price": predicted_total_price,
+            "predicted_price_per_sqft": predicted_price_per_sqft,
+            "confidence_score": confidence_score,
+            "lower_bound": lower_bound,
+            "upper_bound": upper_bound,
+        }
+    
+    async def predict_batch(
+        self, requests: List[PredictionRequest]
+    ) -> List[Tuple[Optional[PredictionResponse], Optional[str]]]:
+        """
+        Make price predictions for many properties in one pass
+        
+        Localities come from the in-memory resolver, the feature matrix is
+        scored with one model call, and all Prediction rows are inserted
+        together.
+        
+        Args:
+            requests: Property details, one per prediction
+            
+        Returns:
+            One (prediction, error) pair per request, in request order
+        """
+        results = [(None, None)] * len(requests)
+        
+        valid = []
+        batch_localities = []
+        with span("locality.resolve", rows=len(requests)):
+            for idx, request in enumerate(requests):
+                locality = self.localities.resolve(request.locality_name)
+                if not self.localities.is_supported(request.locality_name):
+                    results[idx] = (None, f"Locality '{request.locality_name}' not supported")
+                elif locality is None:
+                    results[idx] = (None, f"Locality {request.locality_name} not found")
+                elif request.carpet_area_sqft <= 0:
+                    results[idx] = (None, "carpet_area_sqft must be positive")
+                else:
+                    valid.append(idx)
+                    batch_localities.append(locality)
+        
+        if not valid:
+            return results
+        
+        batch_requests = [requests[idx] for idx in valid]
+        started = time.perf_counter()
+        with span("prediction.prepare_features", rows=len(batch_requests)):
+            features = [
+                self._prepare_features(r, loc) for r, loc in zip(batch_requests, batch_localities)
+            ]
+        FEATURE_PREP_DURATION.observe(time.perf_counter() - started, "batch")
+        
+        if self.handle.is_ready:
+            try:
+                predicted_total_prices = await run_inference(self._predict_matrix, features)
+            except Exception as e:
+                logger.error(f"ML batch prediction error: {e}")
+                predicted_total_prices = np.array([self._predict_with_fallback_simple(f) for f in features])
+        else:
+            predicted_total_prices = np.array([
+                self._predict_with_fallback(r, loc) for r, loc in zip(batch_requests, batch_localities)
+            ])
+        
+        with span("prediction.sanity_check", rows=len(batch_requests)):
+            predicted_total_prices = self._apply_sanity_check(predicted_total_prices)
+        carpet_areas = np.array([r.carpet_area_sqft for r in batch_requests], dtype=float)
+        predicted_prices_per_sqft = predicted_total_prices / carpet_areas
+        margins = predicted_total_prices * 0.1
+        for locality, per_sqft in zip(batch_localities, predicted_prices_per_sqft):
+            PREDICTED_PRICE_PER_SQFT.observe(float(per_sqft), locality.name)
+        
+        created_at = datetime.utcnow()
+        records = [
+            self._build_prediction_record(
+                request, locality,
+                predicted_total_price=float(total),
+                predicted_price_per_sqft=float(per_sqft),
+                confidence_score=0.85,
+                lower_bound=float(total - margin),
+                upper_bound=float(total + margin),
+                created_at=created_at
+            )
+            for request, locality, total, per_sqft, margin in zip(
+                batch_requests, batch_localities,
+                predicted_total_prices, predicted_prices_per_sqft, margins
+            )
+        ]
+        
+        responses = await run_db_write(
+            self._save_predictions, records, [r.locality_name for r in batch_requests]
+        )
+        
+        for idx, response in zip(valid, responses):
+            results[idx] = (response, None)
+        return results
+    
+    def _save_prediction(self, record: Prediction):
+        """Persist one prediction row (blocking; run on the DB writer)"""
+        with span("db.save_prediction", rows=1):
+            self.db.add(record)
+            record_predictions(self.db, [record])
+            with span("db.commit"):
+                self.db.commit()
+            self.db.refresh(record)
+    
+    def _save_predictions(self, records: List[Prediction], locality_names: List[str]) -> List[PredictionResponse]:
+        """Insert many prediction rows in one flush and return their responses"""
+        # One flush issues a multi-row INSERT and populates every primary key
+        with span("db.save_prediction", rows=len(records)):
+            self.db.add_all(records)
+            self.db.flush()
+            record_predictions(self.db, records)
+            responses = [
+                self._to_response(record, name)
+                for record, name in zip(records, locality_names)
+            ]
+            with span("db.commit"):
+                self.db.commit()
+        return responses
+    
+    def _build_prediction_record(self, request: PredictionRequest, locality: LocalitySnapshot, **outputs) -> Prediction:
+        """Create a Prediction row from the request inputs and model outputs"""
+        return Prediction(**self._prediction_values(request, locality, **outputs))
+    
+    def _prediction_values(self, request: PredictionRequest, locality: LocalitySnapshot, **outputs) -> dict:
+        """Column values for a Prediction row, including its public UUID"""
+        return dict(
+            prediction_uuid=str(uuid.uuid4()),
             locality_id=locality.id,
             bhk=request.bhk,
             carpet_area_sqft=request.carpet_area_sqft,
@@ -91,33 +258,28 @@ class PredictionService:
             swimming_pool=request.swimming_pool,
             gated_society=request.gated_society,
             cctv=request.cctv,
-            predicted_total_price=predicted_total_price,
-            predicted_price_per_sqft=predicted_price_per_sqft,
-            confidence_score=confidence_score,
-            lower_bound=lower_bound,
-            upper_bound=upper_bound,
-            model_version="1.0"
+            model_version=self.handle.version,
+            **outputs
         )
-        
-        self.db.add(db_prediction)
-        self.db.commit()
-        self.db.refresh(db_prediction)
-        
+    
+    def _to_response(self, record: Prediction, locality_name: str) -> PredictionResponse:
+        """Convert a stored Prediction row into the API response"""
         return PredictionResponse(
-            id=db_prediction.id,
-            locality_name=request.locality_name,
-            bhk=request.bhk,
-            carpet_area_sqft=request.carpet_area_sqft,
-            predicted_total_price=predicted_total_price,
-            predicted_price_per_sqft=predicted_price_per_sqft,
-            confidence_score=confidence_score,
-            lower_bound=lower_bound,
-            upper_bound=upper_bound,
-            model_version="1.0",
-            created_at=db_prediction.created_at
+            id=record.id,
+            prediction_uuid=record.prediction_uuid,
+            locality_name=locality_name,
+            bhk=record.bhk,
+            carpet_area_sqft=record.carpet_area_sqft,
+            predicted_total_price=record.predicted_total_price,
+            predicted_price_per_sqft=record.predicted_price_per_sqft,
+            confidence_score=record.confidence_score,
+            lower_bound=record.lower_bound,
+            upper_bound=record.upper_bound,
+            model_version=record.model_version,
+            created_at=record.created_at
         )
     
-    def _prepare_features(self, request: PredictionRequest, locality: Locality) -> dict:
+    def _prepare_features(self, request: PredictionRequest, locality: LocalitySnapshot) -> dict:
         """Prepare features for model prediction"""
         features = {
             'bhk': request.bhk,
@@ -133,7 +295,10 @@ class PredictionService:
             'cctv': int(request.cctv),
             'metro_distance_km': locality.metro_distance_km or 5.0,
             'highway_distance_km': locality.highway_distance_km or 3.0,
-            'avg_price_locality': locality.avg_price_per_sqft or 100000
+            'avg_price_locality': locality.avg_price_per_sqft or 100000,
+            # Native categorical code; older one-hot models read loc_<name> instead
+            'locality': self.handle.locality_code(locality.name),
+            f'loc_{locality.name}': 1
         }
         return features
     
@@ -143,38 +308,64 @@ class PredictionService:
         Returns: Total price in rupees (NOT price per sqft)
         """
         try:
-            feature_vector = self._features_to_vector(features)
-            scaled_features = self.scaler.transform([feature_vector])
-            # Model predicts TOTAL PRICE for the property
-            predicted_total_price = self.model.predict(scaled_features)[0]
+            return float(self._predict_matrix([features])[0])
+        except Exception as e:
+            logger.error(f"ML prediction error: {e}")
+            return self._predict_with_fallback_simple(features)
+    
+    async def _predict_with_scheduler(self, features: dict) -> float:
+        """
+        Make prediction through the shared micro-batching scheduler so that
+        concurrent single requests are scored as one matrix
+        Returns: Total price in rupees (NOT price per sqft)
+        """
+        try:
+            predicted_total_price = await get_inference_batcher().submit(
+                self.handle, self._features_to_vector(features)
+            )
             return max(predicted_total_price, self.settings.MIN_PREDICTION_PRICE)
         except Exception as e:
             logger.error(f"ML prediction error: {e}")
             return self._predict_with_fallback_simple(features)
     
-    def _apply_sanity_check(self, predicted_total_price: float) -> float:
+    def _predict_matrix(self, feature_rows: List[dict]) -> np.ndarray:
+        """
+        Score many feature dicts with one model call
+        Returns: Array of total prices in rupees
         """
-        Apply sanity checks to predicted price
+        matrix = np.array([self._features_to_vector(f) for f in feature_rows], dtype=float)
+        # Model predicts TOTAL PRICE for the property
+        predicted_total_prices = self.handle.predict(matrix)
+        return np.maximum(predicted_total_prices, self.settings.MIN_PREDICTION_PRICE)
+    
+    def _apply_sanity_check(self, predicted_total_price):
+        """
+        Apply sanity checks to predicted price(s)
         - Cap extremely high predictions (possible model artifacts)
         - Ensure minimum viable prediction
+        
+        Accepts a single price or a NumPy array of prices and returns the same shape.
         """
+        prices = np.asarray(predicted_total_price, dtype=float)
+        
         # If prediction is > 5 crore (unrealistic for Navi Mumbai), scale it down
-        if predicted_total_price > 50000000:
-            logger.warning(f"Predicted price {predicted_total_price:,.0f} exceeds realistic range, scaling down by 10x")
-            predicted_total_price = predicted_total_price / 10
+        too_high = prices > 50000000
+        if too_high.any():
+            logger.warning(f"{int(too_high.sum())} predicted price(s) exceed realistic range, scaling down by 10x")
+            prices = np.where(too_high, prices / 10, prices)
         
         # Final cap at 5 crore max
-        if predicted_total_price > 50000000:
-            logger.warning(f"Price still too high {predicted_total_price:,.0f}, capping at 5 crore")
-            predicted_total_price = 50000000
+        too_high = prices > 50000000
+        if too_high.any():
+            logger.warning(f"{int(too_high.sum())} price(s) still too high, capping at 5 crore")
+            prices = np.minimum(prices, 50000000)
         
         # Apply min/max bounds
-        predicted_total_price = max(predicted_total_price, self.settings.MIN_PREDICTION_PRICE)
-        predicted_total_price = min(predicted_total_price, self.settings.MAX_PREDICTION_PRICE)
+        prices = np.clip(prices, self.settings.MIN_PREDICTION_PRICE, self.settings.MAX_PREDICTION_PRICE)
         
-        return predicted_total_price
+        return float(prices) if prices.ndim == 0 else prices
     
-    def _predict_with_fallback(self, request: PredictionRequest, locality: Locality) -> float:
+    def _predict_with_fallback(self, request: PredictionRequest, locality: LocalitySnapshot) -> float:
         """
         Fallback prediction using locality averages and feature adjustments
         Returns: Total price in rupees
@@ -237,30 +428,16 @@ class PredictionService:
     
     async def get_prediction_history(self, locality_name: str, limit: int = 10):
         """Get recent predictions for a locality"""
-        locality = self.db.query(Locality).filter(
-            Locality.name.ilike(locality_name)
-        ).first()
+        locality = self.localities.resolve(locality_name)
         
         if not locality:
             raise ValueError(f"Locality {locality_name} not found")
         
+        return await run_db(self._get_prediction_history, locality, locality_name, limit)
+    
+    def _get_prediction_history(self, locality: LocalitySnapshot, locality_name: str, limit: int):
         predictions = self.db.query(Prediction).filter(
             Prediction.locality_id == locality.id
         ).order_by(Prediction.created_at.desc()).limit(limit).all()
         
-        return [
-            PredictionResponse(
-                id=p.id,
-                locality_name=locality_name,
-                bhk=p.bhk,
-                carpet_area_sqft=p.carpet_area_sqft,
-                predicted_total_price=p.predicted_total_price,
-                predicted_price_per_sqft=p.predicted_price_per_sqft,
-                confidence_score=p.confidence_score,
-                lower_bound=p.lower_bound,
-                upper_bound=p.upper_bound,
-                model_version=p.model_version,
-                created_at=p.created_at
-            )
-            for p in predictions
-        ]
+        return [self._to_response(p, locality_name) for p in predictions]
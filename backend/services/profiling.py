@@ -0,0 +1,231 @@
+"""
+On-demand request profiling
+
+A request is profiled when it carries the admin token (X-Admin-Token)
+together with `X-Profile: 1` or `?profile=1`, or when it falls in the
+PROFILING_SAMPLE_PERCENT share of requests under PROFILING_SAMPLE_PATHS.
+Every other request only pays for a scan of its headers.
+
+A profiled request runs under cProfile, but only its own work is
+recorded. The profiler is switched on around each step of the request's
+coroutine on the event loop: routing, PredictionService.predict and
+response serialization. Each call the request hands to the executors
+(SQLAlchemy execution, model inference, bcrypt) is profiled in its worker
+thread. Other requests interleaved on the loop or running on the pools
+are not captured.
+
+The merged profile is written to PROFILING_DIR as a pstats file and its
+name is returned in the X-Profile-Id response header. Download it from
+/api/v1/admin/profiles/{id} and open it with snakeviz, or render a flame
+graph with flameprof. One request is profiled at a time per process; a
+request that asks while another is being profiled is served normally
+with `X-Profile-Status: busy`.
+"""
+
+import asyncio
+import cProfile
+import functools
+import hmac
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, List, Optional
+from urllib.parse import parse_qsl
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = ".prof"
+_UNSAFE = re.compile(r"[^A-Za-z0-9]+")
+
+_session: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+
+class ProfileSession:
+    """cProfile runs collected for one request, merged when it is saved"""
+
+    def __init__(self, profile_id: str):
+        self.profile_id = profile_id
+        self.loop_profiler = cProfile.Profile()
+        self._thread_profilers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def run(self, fn: Callable, *args, **kwargs):
+        """Call fn under a profiler of its own (used in executor threads)"""
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            with self._lock:
+                self._thread_profilers.append(profiler)
+
+    def save(self, directory: str) -> str:
+        """Write the merged profile as a pstats file (blocking)"""
+        with self._lock:
+            profilers = [self.loop_profiler] + self._thread_profilers
+        # pstats refuses a profiler that recorded nothing
+        profilers = [profiler for profiler in profilers if profiler.getstats()]
+        if not profilers:
+            raise ValueError("nothing was recorded")
+        stats = pstats.Stats(*profilers)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.profile_id)
+        stats.dump_stats(path)
+        return path
+
+
+def bind(fn: Callable) -> Callable:
+    """fn, profiled in whatever thread runs it if the current request is being profiled"""
+    session = _session.get()
+    if session is None:
+        return fn
+    return functools.partial(session.run, fn)
+
+
+class _ProfiledCoroutine:
+    """Drives a coroutine with the profiler enabled only while it is running"""
+
+    def __init__(self, coro, profiler: cProfile.Profile):
+        self._coro = coro
+        self._profiler = profiler
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            self._profiler.enable()
+            try:
+                if error is not None:
+                    yielded = self._coro.throw(error)
+                else:
+                    yielded = self._coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self._profiler.disable()
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles admin-flagged and sampled requests"""
+
+    def __init__(self, app, settings=None):
+        self.app = app
+        settings = settings or get_settings()
+        self.directory = settings.PROFILING_DIR
+        self.max_files = settings.PROFILING_MAX_FILES
+        self._token = settings.ADMIN_TOKEN.encode()
+        self._sample_rate = max(0.0, min(100.0, settings.PROFILING_SAMPLE_PERCENT)) / 100
+        self._sample_paths = tuple(settings.PROFILING_SAMPLE_PATHS)
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, _add_headers(send, [(b"x-profile-status", b"busy")]))
+            return
+
+        try:
+            session = ProfileSession(self._profile_id(scope))
+            headers = [(b"x-profile-id", session.profile_id.encode())]
+            token = _session.set(session)
+            try:
+                await _ProfiledCoroutine(self.app(scope, receive, _add_headers(send, headers)),
+                                         session.loop_profiler)
+            finally:
+                _session.reset(token)
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self._store, session)
+        finally:
+            self._busy.release()
+
+    def _selected(self, scope) -> bool:
+        if self._token:
+            for name, value in scope["headers"]:
+                if name == b"x-admin-token":
+                    if hmac.compare_digest(value, self._token) and self._flagged(scope):
+                        return True
+                    break
+        if self._sample_rate and scope["path"].startswith(self._sample_paths):
+            return random.random() < self._sample_rate
+        return False
+
+    @staticmethod
+    def _flagged(scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return value not in (b"", b"0", b"false")
+        query = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+        return query.get("profile", "0") not in ("", "0", "false")
+
+    @staticmethod
+    def _profile_id(scope) -> str:
+        path = _UNSAFE.sub("_", scope["path"]).strip("_")[:60] or "root"
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return f"{stamp}-{scope['method'].lower()}-{path}-{uuid.uuid4().hex[:8]}{PROFILE_SUFFIX}"
+
+    def _store(self, session: ProfileSession):
+        try:
+            path = session.save(self.directory)
+            logger.info(f"Request profile written to {path}")
+            prune_profiles(self.directory, self.max_files)
+        except Exception as e:
+            logger.error(f"Could not write request profile {session.profile_id}: {e}")
+
+
+def _add_headers(send, headers: list):
+    async def send_with_headers(message):
+        if message["type"] == "http.response.start":
+            message = dict(message, headers=list(message.get("headers", [])) + headers)
+        await send(message)
+
+    return send_with_headers
+
+
+def list_profiles(directory: str) -> List[dict]:
+    """Stored profiles, newest first"""
+    try:
+        entries = [entry for entry in os.scandir(directory)
+                   if entry.is_file() and entry.name.endswith(PROFILE_SUFFIX)]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    return [
+        {
+            "id": entry.name,
+            "bytes": entry.stat().st_size,
+            "created_at": datetime.utcfromtimestamp(entry.stat().st_mtime).isoformat(),
+        }
+        for entry in entries
+    ]
+
+
+def profile_path(directory: str, profile_id: str) -> Optional[str]:
+    """Path of a stored profile, or None for an unknown or malformed id"""
+    if os.path.basename(profile_id) != profile_id or not profile_id.endswith(PROFILE_SUFFIX):
+        return None
+    path = os.path.join(directory, profile_id)
+    return path if os.path.isfile(path) else None
+
+
+def prune_profiles(directory: str, max_files: int):
+    """Delete the oldest profiles beyond max_files"""
+    for profile in list_profiles(directory)[max(0, max_files):]:
+        try:
+            os.remove(os.path.join(directory, profile["id"]))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,273 @@
+"""
+Streaming bulk ingestion of property transactions (CSV / NDJSON)
+
+The request body is read chunk by chunk and split into records
+incrementally. Every BULK_INGEST_CHUNK_ROWS records are validated, get a
+vectorized price_per_sqft, and are written in one transaction together with
+their trend rollups and market statistics. PostgreSQL (psycopg2) uses COPY;
+other databases use a single executemany INSERT. At most one chunk of
+records plus BULK_INGEST_MAX_REPORTED_ERRORS error entries are held in
+memory, whatever the upload size.
+"""
+
+import codecs
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+import numpy as np
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from models import Property
+from schemas import PropertyCreate
+from services.executors import run_db_write
+from services.locality_resolver import get_locality_resolver
+from services.market_stats import get_market_stats
+from services.comparables import get_comparables_index
+from services.trend_rollup import record_transactions
+
+logger = logging.getLogger(__name__)
+
+FORMAT_CSV = "csv"
+FORMAT_NDJSON = "ndjson"
+
+CONTENT_TYPE_FORMATS = {
+    "text/csv": FORMAT_CSV,
+    "application/csv": FORMAT_CSV,
+    "application/x-ndjson": FORMAT_NDJSON,
+    "application/ndjson": FORMAT_NDJSON,
+    "application/jsonl": FORMAT_NDJSON,
+    "application/x-jsonlines": FORMAT_NDJSON,
+}
+
+# Column order for INSERT / COPY
+PROPERTY_COLUMNS = [
+    "locality_id", "name", "bhk", "carpet_area_sqft", "floor_number", "total_floors",
+    "building_age_years", "price", "price_per_sqft", "lift", "parking", "gym",
+    "swimming_pool", "gated_society", "cctv", "transaction_date", "source",
+    "created_at", "updated_at",
+]
+
+
+class RecordSplitter:
+    """
+    Splits a decoded text stream into complete records
+
+    A CSV record may span lines inside a quoted field; a line whose quote
+    count is odd is joined with the following line(s) until quotes balance.
+    """
+
+    def __init__(self, quoted_newlines: bool):
+        self.quoted_newlines = quoted_newlines
+        self._partial = ""
+        self._record = ""
+
+    def feed(self, text: str) -> List[str]:
+        records = []
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._add(line + "\n", records)
+        return records
+
+    def close(self) -> List[str]:
+        records = []
+        if self._partial:
+            self._add(self._partial, records)
+            self._partial = ""
+        if self._record.strip():
+            records.append(self._record)
+        self._record = ""
+        return records
+
+    def _add(self, line: str, records: List[str]):
+        self._record += line
+        if self.quoted_newlines and self._record.count('"') % 2:
+            return
+        if self._record.strip():
+            records.append(self._record)
+        self._record = ""
+
+
+class PropertyBulkLoader:
+    """Validates and bulk-inserts streamed property records in chunks"""
+
+    def __init__(self, db: Session, fmt: str):
+        settings = get_settings()
+        self.db = db
+        self.fmt = fmt
+        self.chunk_rows = max(1, settings.BULK_INGEST_CHUNK_ROWS)
+        self.max_reported_errors = settings.BULK_INGEST_MAX_REPORTED_ERRORS
+        self.accepted = 0
+        self.rejected = 0
+        self.errors = []
+        self._header: Optional[List[str]] = None
+        self._next_row = 1
+
+    async def ingest(self, stream: AsyncIterator[bytes]) -> dict:
+        """
+        Consume an upload stream and load every valid record
+
+        Args:
+            stream: Raw request body chunks
+
+        Returns:
+            Summary with accepted/rejected counts and the first errors
+        """
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        splitter = RecordSplitter(quoted_newlines=self.fmt == FORMAT_CSV)
+        pending = []
+
+        async for chunk in stream:
+            pending.extend(splitter.feed(decoder.decode(chunk)))
+            while len(pending) >= self.chunk_rows:
+                batch, pending = pending[:self.chunk_rows], pending[self.chunk_rows:]
+                await self._load(batch)
+
+        pending.extend(splitter.feed(decoder.decode(b"", final=True)))
+        pending.extend(splitter.close())
+        if pending:
+            await self._load(pending)
+
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "errors_truncated": self.rejected > len(self.errors),
+        }
+
+    async def _load(self, records: List[str]):
+        changes = await run_db_write(self._load_chunk, records)
+        get_market_stats().publish(changes)
+
+    def _load_chunk(self, records: List[str]) -> dict:
+        """Parse, validate and insert one chunk (blocking; run on the DB writer)"""
+        rows = []
+        for raw in self._parse(records):
+            row_number = self._next_row
+            self._next_row += 1
+            if isinstance(raw, Exception):
+                self._reject(row_number, str(raw))
+                continue
+            try:
+                item = PropertyCreate.model_validate(raw)
+            except ValidationError as e:
+                self._reject(row_number, "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                ))
+                continue
+            if get_locality_resolver().get(item.locality_id) is None:
+                self._reject(row_number, f"Unknown locality_id {item.locality_id}")
+            elif item.carpet_area_sqft <= 0:
+                self._reject(row_number, "carpet_area_sqft must be positive")
+            else:
+                rows.append(item.model_dump())
+
+        if not rows:
+            return {}
+
+        self._add_price_per_sqft(rows)
+        now = datetime.utcnow()
+        for row in rows:
+            row["created_at"] = now
+            row["updated_at"] = now
+
+        try:
+            self._insert(rows)
+            record_transactions(self.db, rows)
+            changes = get_market_stats().record(self.db, rows)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self.accepted += len(rows)
+        try:
+            get_comparables_index().add(rows)
+        except Exception as e:
+            # The chunk is committed; the index catches up on its next refresh
+            logger.error(f"Comparables index update failed for {len(rows)} ingested rows: {e}")
+        return changes
+
+    def _parse(self, records: List[str]):
+        """Yield one field dict (or the parse error) per data record"""
+        if self.fmt == FORMAT_NDJSON:
+            for record in records:
+                try:
+                    value = json.loads(record)
+                    if not isinstance(value, dict):
+                        raise ValueError("Expected a JSON object per line")
+                    yield value
+                except ValueError as e:
+                    yield e
+            return
+
+        for fields in csv.reader(io.StringIO("".join(records))):
+            if self._header is None:
+                self._header = [name.strip() for name in fields]
+                continue
+            if len(fields) != len(self._header):
+                yield ValueError(f"Expected {len(self._header)} columns, got {len(fields)}")
+                continue
+            # Empty cells fall back to the schema defaults
+            yield {name: value for name, value in zip(self._header, fields) if value != ""}
+
+    def _add_price_per_sqft(self, rows: List[dict]):
+        prices = np.array([np.nan if r["price"] is None else r["price"] for r in rows], dtype=float)
+        areas = np.array([r["carpet_area_sqft"] for r in rows], dtype=float)
+        per_sqft = prices / areas
+        priced = ~np.isnan(per_sqft)
+        for row, value, has_price in zip(rows, per_sqft.tolist(), priced.tolist()):
+            row["price_per_sqft"] = value if has_price else None
+
+    def _insert(self, rows: List[dict]):
+        bind = self.db.get_bind()
+        if bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2":
+            self._copy(rows)
+        else:
+            self.db.execute(insert(Property), rows)
+
+    def _copy(self, rows: List[dict]):
+        """COPY the chunk into properties inside the session's transaction"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_copy_value(row.get(column)) for column in PROPERTY_COLUMNS])
+        buffer.seek(0)
+
+        raw_connection = self.db.connection().connection.driver_connection
+        with raw_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY properties ({', '.join(PROPERTY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+
+    def _reject(self, row_number: int, error: str):
+        self.rejected += 1
+        if len(self.errors) < self.max_reported_errors:
+            self.errors.append({"row": row_number, "error": error})
+
+
+def _copy_value(value):
+    # Unquoted empty field is NULL in COPY's CSV format
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def resolve_format(fmt: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Pick the upload format from an explicit parameter or the Content-Type"""
+    if fmt:
+        fmt = fmt.lower()
+        return fmt if fmt in (FORMAT_CSV, FORMAT_NDJSON) else None
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return CONTENT_TYPE_FORMATS.get(media_type)
@@ -0,0 +1,386 @@
+"""
+In-process tracing spans with a rotating local JSONL exporter
+
+TracingMiddleware opens a root span per sampled request and stage spans
+nest under
+it through a context variable: locality resolution, feature preparation,
+scaling, model scoring, the sanity check, the database commit and
+response serialization. services.executors copies the context into its
+worker threads, so spans opened there keep their parent. The inference
+batcher and the prediction-log queue carry it across their hops too (see
+services/batching.py and services/prediction_log.py).
+
+Sampling is decided locally at TRACE_SAMPLE_PERCENT. A sampled request
+with a W3C `traceparent` header continues that trace, but the header's
+sampled flag is only obeyed with TRACE_TRUST_PARENT_SAMPLED (behind a
+gateway that sets it), so clients cannot force every request to be traced.
+Outside a sampled request span() returns a shared no-op, so unsampled
+requests and background work pay only for one context variable lookup.
+
+Finished spans are queued (at most TRACE_QUEUE_MAX_SPANS, newer spans are
+dropped and counted while it is full) to a writer thread that appends them to
+TRACE_DIR in the OTLP/JSON shape: each line is one ExportTraceServiceRequest
+(resourceSpans -> scopeSpans -> spans). The OpenTelemetry Collector's
+otlpjsonfile receiver can ingest the files, and backend/trace_report.py
+turns them into per-stage latency breakdowns offline. Each process writes
+its own file, starts a new one past TRACE_FILE_MAX_MB and deletes the
+oldest beyond TRACE_MAX_FILES.
+"""
+
+import glob
+import json
+import logging
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from config import get_settings
+from services.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+SCOPE_NAME = "navi-mumbai-backend"
+SERVICE_NAME = "navi-mumbai-house-api"
+MAX_LINKS = 128
+
+SPAN_KIND_INTERNAL = "SPAN_KIND_INTERNAL"
+SPAN_KIND_SERVER = "SPAN_KIND_SERVER"
+
+_current: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, object]) -> List[dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class Span:
+    """One timed operation; use as a context manager"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id", "kind", "attributes",
+                 "links", "start_ns", "end_ns", "error", "_token")
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str] = None,
+                 kind: str = SPAN_KIND_INTERNAL, attributes: Optional[dict] = None,
+                 links: Optional[List[Tuple[str, str]]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.links = links or []
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        get_exporter().export(self)
+        return False
+
+    def to_otlp(self) -> dict:
+        record = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": "STATUS_CODE_ERROR", "message": self.error} if self.error else {},
+        }
+        if self.parent_span_id:
+            record["parentSpanId"] = self.parent_span_id
+        if self.links:
+            record["links"] = [{"traceId": trace_id, "spanId": span_id} for trace_id, span_id in self.links]
+        return record
+
+
+class _NoopSpan:
+    """Returned by span() when the current request is not traced"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes):
+    """Child span of the current span, or a no-op outside a traced request"""
+    parent = _current.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(name, parent.trace_id, parent.span_id, attributes=attributes)
+
+
+def start_trace(name: str, links: Optional[List[Tuple[str, str]]] = None, **attributes):
+    """Root span of a new trace for background work (a no-op while tracing is disabled)"""
+    if not get_settings().TRACING_ENABLED:
+        return NOOP_SPAN
+    return Span(name, f"{random.getrandbits(128):032x}", attributes=attributes, links=(links or [])[:MAX_LINKS])
+
+
+def current_span_context() -> Optional[Tuple[str, str]]:
+    """(trace_id, span_id) of the current span, to link work done later on its behalf"""
+    current = _current.get()
+    return (current.trace_id, current.span_id) if current is not None else None
+
+
+def parse_traceparent(value: str) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent span_id, sampled) from a W3C traceparent header, None if malformed"""
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class JsonlSpanExporter:
+    """Writes finished spans from a background thread as OTLP/JSON lines"""
+
+    FLUSH_SPANS = 512
+    FLUSH_INTERVAL_SECONDS = 1.0
+
+    def __init__(self, directory: str, file_max_bytes: int, max_files: int, max_queue_size: int = 10000):
+        self.directory = directory
+        self.file_max_bytes = max(1, file_max_bytes)
+        self.max_files = max(1, max_files)
+        self.max_queue_size = max(1, max_queue_size)
+        self._queue: "queue.Queue" = queue.Queue(self.max_queue_size)
+        self.dropped_spans = 0
+        self._thread = None
+        self._pid = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._stop = object()
+        self._resource = {"attributes": _otlp_attributes({
+            "service.name": SERVICE_NAME,
+            "host.name": socket.gethostname(),
+        })}
+
+    def export(self, finished: Span):
+        if self._thread is None or self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            # The writer cannot keep up; never hold the request for it
+            self.dropped_spans += 1
+
+    def _start(self):
+        with self._lock:
+            # A forked worker inherits neither the thread nor a usable file
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._file = None
+            self._queue = queue.Queue(self.max_queue_size)
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+
+    def shutdown(self, timeout: float = 5.0):
+        """Write everything queued and stop the writer thread"""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid():
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(self._stop, timeout=timeout)
+        except queue.Full:
+            logger.warning("Trace exporter queue still full at shutdown, unwritten spans are lost")
+            return
+        thread.join(max(0.0, deadline - time.monotonic()))
+        self._thread = None
+
+    def _run(self):
+        while True:
+            batch = []
+            stop = False
+            deadline = time.monotonic() + self.FLUSH_INTERVAL_SECONDS
+            while len(batch) < self.FLUSH_SPANS:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is self._stop:
+                    stop = True
+                    break
+                batch.append(item)
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    logger.error(f"Dropping {len(batch)} spans, trace export failed: {e}")
+            if stop:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+    def _write(self, batch: List[Span]):
+        line = json.dumps({"resourceSpans": [{
+            "resource": self._resource,
+            "scopeSpans": [{
+                "scope": {"name": SCOPE_NAME},
+                "spans": [finished.to_otlp() for finished in batch],
+            }],
+        }]}, separators=(",", ":"))
+        if self._file is None or self._file.tell() >= self.file_max_bytes:
+            self._rotate()
+        self._file.write(line + "\n")
+        self._file.flush()
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"spans-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl"
+        self._file = open(os.path.join(self.directory, name), "a", encoding="utf-8")
+        files = sorted(glob.glob(os.path.join(self.directory, "spans-*.jsonl")), key=os.path.getmtime)
+        for old in files[:-self.max_files]:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+
+
+_exporter: Optional[JsonlSpanExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter() -> JsonlSpanExporter:
+    """Process-wide span exporter"""
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                settings = get_settings()
+                _exporter = JsonlSpanExporter(
+                    directory=settings.TRACE_DIR,
+                    file_max_bytes=settings.TRACE_FILE_MAX_MB * 1024 * 1024,
+                    max_files=settings.TRACE_MAX_FILES,
+                    max_queue_size=settings.TRACE_QUEUE_MAX_SPANS,
+                )
+    return _exporter
+
+
+def dropped_spans() -> int:
+    """Spans this process dropped because the exporter queue was full"""
+    return _exporter.dropped_spans if _exporter is not None else 0
+
+
+def shutdown_tracing():
+    """Flush queued spans (called on app shutdown)"""
+    if _exporter is not None:
+        _exporter.shutdown()
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens the root span of each sampled request"""
+
+    def __init__(self, app, settings=None):
+        self.app = app
+        settings = settings or get_settings()
+        self._sample_rate = max(0.0, min(100.0, settings.TRACE_SAMPLE_PERCENT)) / 100
+        self._trust_parent_sampled = settings.TRACE_TRUST_PARENT_SAMPLED
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id, sampled = None, None, None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parsed = parse_traceparent(value.decode("latin-1"))
+                if parsed is not None:
+                    trace_id, parent_id, sampled = parsed
+                break
+        if sampled is None or not self._trust_parent_sampled:
+            sampled = random.random() < self._sample_rate
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        root = Span(
+            f"{scope['method']} {scope['path']}",
+            trace_id or f"{random.getrandbits(128):032x}",
+            parent_id,
+            kind=SPAN_KIND_SERVER,
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        trace_header = (b"x-trace-id", root.trace_id.encode())
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                message = dict(message, headers=list(message.get("headers", [])) + [trace_header])
+            await send(message)
+
+        with root:
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                route = route_template(scope)
+                if route:
+                    root.name = f"{scope['method']} {route}"
+                    root.set_attribute("http.route", route)
+
+
+def instrument_fastapi():
+    """Time FastAPI's response validation and encoding as a response.serialize span"""
+    import fastapi.routing
+
+    serialize_response = fastapi.routing.serialize_response
+    if getattr(serialize_response, "_traced", False):
+        return
+
+    async def traced_serialize_response(*args, **kwargs):
+        with span("response.serialize"):
+            return await serialize_response(*args, **kwargs)
+
+    traced_serialize_response._traced = True
+    # get_request_handler looks the function up as a module global on every request
+    fastapi.routing.serialize_response = traced_serialize_response
@@ -0,0 +1,271 @@
+"""
+Materialized daily rollups behind the trend endpoints
+
+Each (locality, source, day) row in locality_daily_stats holds the number of
+samples and the sum of their price per sqft. Rows are maintained
+incrementally in the same transaction that writes predictions or property
+transactions, so a trend query reads at most one row per day instead of
+every Prediction in the period.
+
+Sources:
+- "prediction": Prediction.predicted_price_per_sqft, bucketed by created_at
+- "transaction": Property.price_per_sqft, bucketed by transaction_date
+  (created_at when the transaction date is unknown)
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta
+from math import ceil
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from models import LocalityDailyStat, Prediction, Property
+
+logger = logging.getLogger(__name__)
+
+SOURCE_PREDICTION = "prediction"
+SOURCE_TRANSACTION = "transaction"
+SOURCES = (SOURCE_PREDICTION, SOURCE_TRANSACTION)
+
+MAX_TREND_POINTS = 365
+
+# (locality_id, timestamp, price_per_sqft)
+RollupSample = Tuple[int, datetime, Optional[float]]
+
+
+def _aggregate(source: str, samples: Iterable[RollupSample]) -> List[dict]:
+    """Collapse samples into one delta per (locality, day)"""
+    buckets = {}
+    for locality_id, when, price_per_sqft in samples:
+        if locality_id is None or when is None or price_per_sqft is None:
+            continue
+        key = (locality_id, when.date())
+        entry = buckets.setdefault(key, [0, 0.0])
+        entry[0] += 1
+        entry[1] += float(price_per_sqft)
+
+    now = datetime.utcnow()
+    return [
+        {
+            "locality_id": locality_id,
+            "source": source,
+            "day": day,
+            "sample_count": count,
+            "sum_price_per_sqft": total,
+            "updated_at": now,
+        }
+        for (locality_id, day), (count, total) in buckets.items()
+    ]
+
+
+def _dialect_insert(db: Session):
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+def _apply(db: Session, deltas: List[dict]):
+    """Add deltas to the rollup table inside the caller's transaction"""
+    if not deltas:
+        return
+
+    table = LocalityDailyStat.__table__
+    insert = _dialect_insert(db)
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.locality_id, table.c.source, table.c.day],
+            set_={
+                "sample_count": table.c.sample_count + stmt.excluded.sample_count,
+                "sum_price_per_sqft": table.c.sum_price_per_sqft + stmt.excluded.sum_price_per_sqft,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        db.execute(stmt, deltas)
+        return
+
+    # Portable read-modify-write for dialects without ON CONFLICT
+    for delta in deltas:
+        result = db.execute(
+            update(table)
+            .where(
+                table.c.locality_id == delta["locality_id"],
+                table.c.source == delta["source"],
+                table.c.day == delta["day"],
+            )
+            .values(
+                sample_count=table.c.sample_count + delta["sample_count"],
+                sum_price_per_sqft=table.c.sum_price_per_sqft + delta["sum_price_per_sqft"],
+                updated_at=delta["updated_at"],
+            )
+        )
+        if result.rowcount == 0:
+            db.execute(table.insert(), [delta])
+
+
+def record_predictions(db: Session, rows: Iterable[dict]):
+    """
+    Roll up Prediction rows being written in the current transaction
+
+    Args:
+        db: Session that is about to commit the rows
+        rows: Prediction column values (dicts) or Prediction objects
+    """
+    samples = []
+    for row in rows:
+        if not isinstance(row, dict):
+            row = {
+                "locality_id": row.locality_id,
+                "created_at": row.created_at,
+                "predicted_price_per_sqft": row.predicted_price_per_sqft,
+            }
+        samples.append((row["locality_id"], row.get("created_at"), row.get("predicted_price_per_sqft")))
+    _apply(db, _aggregate(SOURCE_PREDICTION, samples))
+
+
+def record_transactions(db: Session, properties: Iterable):
+    """
+    Roll up priced Property rows being written in the current transaction
+
+    Args:
+        db: Session that is about to commit the rows
+        properties: Property objects or Property column values (dicts)
+    """
+    samples = []
+    for p in properties:
+        if not isinstance(p, dict):
+            p = {
+                "locality_id": p.locality_id,
+                "transaction_date": p.transaction_date,
+                "created_at": p.created_at,
+                "price_per_sqft": p.price_per_sqft,
+            }
+        when = p.get("transaction_date") or p.get("created_at") or datetime.utcnow()
+        samples.append((p["locality_id"], when, p.get("price_per_sqft")))
+    _apply(db, _aggregate(SOURCE_TRANSACTION, samples))
+
+
+def get_daily_trend(db: Session, locality_id: int, period_days: int, source: str = SOURCE_PREDICTION) -> List[dict]:
+    """
+    Trend points for the last period_days (today inclusive)
+
+    Periods longer than MAX_TREND_POINTS days are grouped into equal
+    multi-day buckets so the response never exceeds MAX_TREND_POINTS points.
+
+    Args:
+        db: Database session
+        locality_id: Locality to report on
+        period_days: Number of days to cover
+        source: "prediction" or "transaction"
+
+    Returns:
+        Points with date, avg_price_per_sqft and transaction_count, oldest first
+    """
+    start = datetime.utcnow().date() - timedelta(days=period_days - 1)
+    rows = db.execute(
+        select(
+            LocalityDailyStat.day,
+            LocalityDailyStat.sample_count,
+            LocalityDailyStat.sum_price_per_sqft,
+        )
+        .where(
+            LocalityDailyStat.locality_id == locality_id,
+            LocalityDailyStat.source == source,
+            LocalityDailyStat.day >= start,
+        )
+        .order_by(LocalityDailyStat.day)
+    ).all()
+
+    bucket_days = max(1, ceil(period_days / MAX_TREND_POINTS))
+    buckets = {}
+    for day, count, total in rows:
+        if not count:
+            continue
+        bucket_start = start + timedelta(days=((day - start).days // bucket_days) * bucket_days)
+        entry = buckets.setdefault(bucket_start, [0, 0.0])
+        entry[0] += count
+        entry[1] += total
+
+    return [
+        {
+            "date": datetime.combine(bucket_start, time()),
+            "avg_price_per_sqft": total / count,
+            "transaction_count": count,
+        }
+        for bucket_start, (count, total) in sorted(buckets.items())
+    ]
+
+
+def _as_date(value) -> date:
+    # func.date() comes back as a string on SQLite and a date on PostgreSQL
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def backfill(db: Session, since: Optional[date] = None) -> dict:
+    """
+    Rebuild rollup rows from the predictions and properties tables
+
+    Existing rollup rows from `since` onwards (all rows when None) are
+    replaced, so the command is safe to re-run.
+
+    Args:
+        db: Database session (committed on success)
+        since: First day to rebuild
+
+    Returns:
+        Number of rollup rows written per source
+    """
+    stats_table = LocalityDailyStat.__table__
+    clear = delete(stats_table)
+    if since is not None:
+        clear = clear.where(stats_table.c.day >= since)
+    db.execute(clear)
+
+    property_time = func.coalesce(Property.transaction_date, Property.created_at)
+    queries = {
+        SOURCE_PREDICTION: (
+            Prediction.locality_id, Prediction.created_at, Prediction.predicted_price_per_sqft
+        ),
+        SOURCE_TRANSACTION: (Property.locality_id, property_time, Property.price_per_sqft),
+    }
+
+    written = {}
+    now = datetime.utcnow()
+    for source, (locality_col, time_col, value_col) in queries.items():
+        day_col = func.date(time_col)
+        query = (
+            select(locality_col, day_col, func.count(value_col), func.sum(value_col))
+            .where(locality_col.isnot(None), value_col.isnot(None))
+            .group_by(locality_col, day_col)
+        )
+        if since is not None:
+            query = query.where(time_col >= datetime.combine(since, time()))
+
+        rows = [
+            {
+                "locality_id": locality_id,
+                "source": source,
+                "day": _as_date(day),
+                "sample_count": count,
+                "sum_price_per_sqft": float(total),
+                "updated_at": now,
+            }
+            for locality_id, day, count, total in db.execute(query)
+            if count
+        ]
+        if rows:
+            db.execute(stats_table.insert(), rows)
+        written[source] = len(rows)
+
+    db.commit()
+    logger.info(f"Trend rollup backfill complete: {written}")
+    return written
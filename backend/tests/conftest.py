@@ -0,0 +1,19 @@
+"""
+Shared test setup: backend modules import each other as top-level packages
+(`from config import ...`), so the backend directory goes on sys.path along
+with the repository root (for the `ml` training package), and the engine
+created at import time points at a scratch SQLite file unless DATABASE_URL
+is set
+"""
+
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+for path in (REPO_DIR, BACKEND_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
@@ -0,0 +1,72 @@
+"""
+The token -> UserSnapshot cache in services.auth: short TTL and eviction on User writes
+"""
+
+import asyncio
+import uuid
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from database import Base, SessionLocal, engine
+from models import User
+from services import auth
+
+
+@pytest.fixture
+def user():
+    Base.metadata.create_all(bind=engine, tables=[User.__table__])
+    auth.get_user_cache().clear()
+    db = SessionLocal()
+    row = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="x", user_type="buyer", is_active=True)
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    yield db, row
+    db.close()
+
+
+def _authenticate(email: str):
+    token = auth.create_access_token({"sub": email}, expires_delta=timedelta(minutes=30))
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return asyncio.run(auth.get_current_user(credentials)), credentials
+
+
+def test_deactivated_user_is_rejected_on_the_next_request(user):
+    db, row = user
+    snapshot, credentials = _authenticate(row.email)
+    assert snapshot.is_active
+    assert auth.get_user_cache().get(credentials.credentials) == snapshot
+
+    row.is_active = False
+    db.commit()
+
+    assert auth.get_user_cache().get(credentials.credentials) is None
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(auth.get_current_user(credentials))
+    assert exc.value.status_code == 401
+
+
+def test_deleted_and_renamed_users_are_evicted(user):
+    db, row = user
+    old_email = row.email
+    _, old_credentials = _authenticate(old_email)
+
+    row.email = f"renamed-{old_email}"
+    db.commit()
+    assert auth.get_user_cache().get(old_credentials.credentials) is None
+
+    _, credentials = _authenticate(row.email)
+    db.delete(row)
+    db.commit()
+    assert auth.get_user_cache().get(credentials.credentials) is None
+
+
+def test_entries_never_outlive_the_ttl_cap(user, monkeypatch):
+    _, row = user
+    settings = auth.get_settings()
+    monkeypatch.setattr(settings, "AUTH_USER_CACHE_TTL_SECONDS", 0)
+    _, credentials = _authenticate(row.email)
+    assert auth.get_user_cache().get(credentials.credentials) is None
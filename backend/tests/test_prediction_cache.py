@@ -0,0 +1,164 @@
+"""
+PredictionCache keys, expiry and invalidation, with InMemoryRedis as the shared tier
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from schemas import PredictionRequest
+from services import model_registry, prediction_cache, ttl_cache
+from services.model_registry import ModelHandle, ModelRegistry
+from services.prediction_cache import InMemoryRedis, PredictionCache, canonical_request_key
+from services.ttl_cache import LRUTTLCache
+
+OUTPUTS = {"predicted_total_price": 12_000_000.0, "confidence_score": 0.85}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Only the cache's view of time moves; the event loop keeps the real clock
+    fake = FakeClock()
+    monkeypatch.setattr(ttl_cache, "time", fake)
+    monkeypatch.setattr(prediction_cache, "time", fake)
+    return fake
+
+
+def _locality(**overrides):
+    values = dict(id=2, metro_distance_km=0.5, highway_distance_km=3.0, avg_price_per_sqft=120000.0)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def _request(**overrides):
+    values = dict(locality_name="Vashi", bhk=2, carpet_area_sqft=1000)
+    values.update(overrides)
+    return PredictionRequest(**values)
+
+
+def _cache(redis=None, ttl_seconds=60):
+    return PredictionCache(LRUTTLCache(100, ttl_seconds), redis_client=redis, ttl_seconds=ttl_seconds)
+
+
+def test_key_ignores_locality_name_case_and_whitespace():
+    key = canonical_request_key(_request(), _locality(), "v1")
+    assert canonical_request_key(_request(locality_name="  VASHI "), _locality(), "v1") == key
+
+
+def test_key_changes_with_request_model_and_locality_inputs():
+    key = canonical_request_key(_request(), _locality(), "v1")
+    assert canonical_request_key(_request(bhk=3), _locality(), "v1") != key
+    assert canonical_request_key(_request(lift=True), _locality(), "v1") != key
+    assert canonical_request_key(_request(), _locality(), "v2") != key
+    assert canonical_request_key(_request(), _locality(avg_price_per_sqft=125000.0), "v1") != key
+    assert canonical_request_key(_request(), _locality(metro_distance_km=1.0), "v1") != key
+
+
+def test_miss_then_hit():
+    async def scenario():
+        cache = _cache()
+        assert await cache.get("k") is None
+        await cache.set("k", OUTPUTS)
+        assert await cache.get("k") == OUTPUTS
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_local_entries_expire_after_ttl(clock):
+    async def scenario():
+        cache = _cache(ttl_seconds=60)
+        await cache.set("k", OUTPUTS)
+        clock.now += 59
+        assert await cache.get("k") == OUTPUTS
+        clock.now += 2
+        assert await cache.get("k") is None
+
+    asyncio.run(scenario())
+
+
+def test_redis_tier_is_shared_and_expires(clock):
+    async def scenario():
+        redis = InMemoryRedis()
+        writer, reader = _cache(redis), _cache(redis)
+        await writer.set("k", OUTPUTS)
+        # Another worker's local tier is empty; the value comes from Redis
+        assert await reader.get("k") == OUTPUTS
+        assert reader.redis_hits == 1
+        assert await redis.get(PredictionCache.KEY_PREFIX + "k") is not None
+        clock.now += 61
+        assert await redis.get(PredictionCache.KEY_PREFIX + "k") is None
+        assert await _cache(redis).get("k") is None
+
+    asyncio.run(scenario())
+
+
+def test_redis_errors_fall_back_to_local_tier():
+    class BrokenRedis(InMemoryRedis):
+        async def get(self, name):
+            raise ConnectionError("redis down")
+
+        async def set(self, name, value, ex=None):
+            raise ConnectionError("redis down")
+
+    async def scenario():
+        cache = _cache(BrokenRedis())
+        await cache.set("k", OUTPUTS)
+        assert await cache.get("k") == OUTPUTS
+        assert await cache.get("other") is None
+
+    asyncio.run(scenario())
+
+
+def test_locality_average_change_misses_the_cache():
+    async def scenario():
+        cache = _cache(InMemoryRedis())
+        request = _request()
+        await cache.set(canonical_request_key(request, _locality(), "v1"), OUTPUTS)
+        assert await cache.get(canonical_request_key(request, _locality(), "v1")) == OUTPUTS
+        moved = _locality(avg_price_per_sqft=130000.0)
+        assert await cache.get(canonical_request_key(request, moved, "v1")) is None
+
+    asyncio.run(scenario())
+
+
+def test_model_swap_clears_local_tier_and_changes_keys(monkeypatch):
+    registry = ModelRegistry(SimpleNamespace(MODEL_BUNDLE_DIR="unused"))
+    handles = {
+        version: ModelHandle(model=None, scaler=None, feature_names=None, fingerprint=version, version=version)
+        for version in ("v1", "v2")
+    }
+    published = {"version": "v1"}
+    monkeypatch.setattr(model_registry, "current_version", lambda directory: published["version"])
+    monkeypatch.setattr(ModelRegistry, "_load_bundle", lambda self, version: handles[version])
+
+    cache = _cache(InMemoryRedis())
+    registry.add_swap_listener(cache.clear_local)
+    assert registry.load()
+    request = _request()
+
+    async def store():
+        await cache.set(canonical_request_key(request, _locality(), registry.get().fingerprint), OUTPUTS)
+
+    asyncio.run(store())
+    assert len(cache.local) == 1
+
+    published["version"] = "v2"
+    assert registry.load()
+    assert len(cache.local) == 0
+
+    async def lookup():
+        # The shared tier still holds the v1 entry, but v2 requests never hit it
+        return await cache.get(canonical_request_key(request, _locality(), registry.get().fingerprint))
+
+    assert asyncio.run(lookup()) is None
@@ -0,0 +1,96 @@
+"""
+The folded serving model (scaler undone on the split thresholds) scores raw
+features exactly like the trained model scores standardized ones
+"""
+
+import json
+
+import numpy as np
+import pytest
+import xgboost as xgb
+from sklearn.preprocessing import StandardScaler
+
+from ml.model_trainer import (
+    FEATURE_TYPES, ModelTrainer, check_serving_parity, flatten_booster, fold_scaler,
+)
+from ml.synthetic_data import generate_synthetic_data
+from services.compiled_ensemble import CompiledEnsemble
+from services.model_registry import ModelHandle
+
+RTOL = 1e-5  # float32 leaf summation order only
+
+
+@pytest.fixture(scope="module")
+def trained():
+    """A small booster trained on standardized features, as ModelTrainer.train does"""
+    trainer = ModelTrainer()
+    X, y = trainer.prepare_features(generate_synthetic_data(3000, seed=7))
+    X_raw = X.to_numpy(dtype=float)
+    scaler = StandardScaler().fit(X_raw)
+    ModelTrainer._passthrough_locality(scaler)
+    model = xgb.XGBRegressor(
+        n_estimators=40, max_depth=5, learning_rate=0.2, random_state=0, n_jobs=1,
+        tree_method="hist", enable_categorical=True, feature_types=FEATURE_TYPES,
+    )
+    model.fit(scaler.transform(X_raw), y)
+    # XGBoost compares in float32, so only float32-representable inputs are meaningful
+    X_raw = X_raw.astype(np.float32).astype(np.float64)
+    return model, scaler, fold_scaler(model, scaler), X_raw
+
+
+def _expected(model, scaler, X_raw):
+    return model.predict(scaler.transform(X_raw))
+
+
+def _assert_close(actual, expected):
+    rel = np.abs(actual - expected) / np.maximum(np.abs(expected), 1.0)
+    assert rel.max() <= RTOL, f"max relative difference {rel.max():.2e}"
+
+
+def _threshold_rows(serving, X_raw) -> np.ndarray:
+    """Rows sitting exactly on every folded numeric threshold, and one float32 step below it"""
+    learner = json.loads(serving.get_booster().save_raw("json"))["learner"]
+    rows = []
+    base = X_raw[0]
+    for tree in learner["gradient_booster"]["model"]["trees"]:
+        for nid, child in enumerate(tree["left_children"]):
+            if child == -1 or tree["split_type"][nid] != 0:
+                continue
+            feature = tree["split_indices"][nid]
+            threshold = np.float32(tree["split_conditions"][nid])
+            for value in (threshold, np.nextafter(threshold, np.float32(-np.inf))):
+                row = base.copy()
+                row[feature] = float(value)
+                rows.append(row)
+    assert rows, "the booster has no numeric splits"
+    return np.array(rows)
+
+
+def test_folded_model_matches_scaler_plus_model(trained):
+    model, scaler, serving, X_raw = trained
+    handle = ModelHandle(model=serving, scaler=None, feature_names=None, fingerprint="test")
+    _assert_close(handle.predict(X_raw), _expected(model, scaler, X_raw))
+
+
+def test_folded_model_matches_on_threshold_boundaries(trained):
+    model, scaler, serving, X_raw = trained
+    rows = _threshold_rows(serving, X_raw)
+    handle = ModelHandle(model=serving, scaler=None, feature_names=None, fingerprint="test")
+    _assert_close(handle.predict(rows), _expected(model, scaler, rows))
+
+
+def test_compiled_evaluator_matches_on_threshold_boundaries(trained):
+    model, scaler, serving, X_raw = trained
+    rows = np.vstack([X_raw[:500], _threshold_rows(serving, X_raw)])
+    handle = ModelHandle(
+        model=serving, scaler=None, feature_names=None, fingerprint="test",
+        compiled=CompiledEnsemble(flatten_booster(serving)), compiled_max_rows=len(rows),
+    )
+    _assert_close(handle.predict(rows), _expected(model, scaler, rows))
+
+
+def test_parity_check_rejects_an_unfolded_model(trained):
+    model, scaler, _, X_raw = trained
+    # The scaled model fed raw features is what a missed fold would serve
+    with pytest.raises(ValueError):
+        check_serving_parity(model, scaler, model, X_raw[:500])
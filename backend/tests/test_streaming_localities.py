@@ -0,0 +1,24 @@
+"""
+Missing localities in the streaming training helpers (ml.streaming)
+"""
+
+import numpy as np
+import pandas as pd
+
+from ml import streaming
+
+
+def test_missing_locality_is_not_learned_as_a_category():
+    stats = streaming.StreamingStats(["carpet_area_sqft"])
+    stats.update(pd.DataFrame({
+        "locality": ["Vashi", None, np.nan, "Kharghar", "Vashi"],
+        "carpet_area_sqft": [900.0, 1000.0, 1100.0, 800.0, 950.0],
+    }))
+    assert stats.categories == {"Vashi": 2, "Kharghar": 1}
+
+
+def test_missing_and_unseen_localities_get_the_missing_code():
+    localities = ["Kharghar", "Vashi", "nan"]
+    codes = streaming.locality_codes(pd.Series(["Vashi", None, np.nan, "Panvel", "Kharghar"]), localities)
+    assert codes[0] == 1 and codes[4] == 0
+    assert np.isnan(codes[1:4]).all()
@@ -0,0 +1,103 @@
+"""
+Per-stage latency breakdown from the span files written by services/tracing.py
+
+Reads every spans-*.jsonl file under TRACE_DIR, groups the spans of each
+trace under its root request span, and reports per route: the request
+count, p50/p95/mean of every stage and its share of the request time.
+Stages that run more than once in a request are summed per request
+first. Nested stages count toward their parent too (db.commit is part of
+db.save_prediction, model.predict of inference.batch_wait), so shares can
+add up to more than 100%.
+
+Usage:
+    python trace_report.py
+    python trace_report.py --dir /var/log/traces --route "POST /api/v1/prediction/predict"
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+from collections import defaultdict
+
+import numpy as np
+
+from config import get_settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def load_spans(directory: str) -> list:
+    """Every span in the OTLP/JSON files under directory"""
+    spans = []
+    for path in sorted(glob.glob(os.path.join(directory, "spans-*.jsonl"))):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    # The writer may be mid-line in a live file
+                    continue
+                for resource_spans in request.get("resourceSpans", []):
+                    for scope_spans in resource_spans.get("scopeSpans", []):
+                        spans.extend(scope_spans.get("spans", []))
+    return spans
+
+
+def _duration_ms(span: dict) -> float:
+    return (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+
+
+def stage_durations(spans: list) -> dict:
+    """route -> {"request": [ms per request], stage name: [ms per request]}"""
+    by_trace = defaultdict(list)
+    for span in spans:
+        by_trace[span["traceId"]].append(span)
+
+    routes = defaultdict(lambda: defaultdict(list))
+    for trace in by_trace.values():
+        roots = [span for span in trace if span.get("kind") == "SPAN_KIND_SERVER"]
+        if len(roots) != 1:
+            continue
+        root = roots[0]
+        stages = defaultdict(float)
+        for span in trace:
+            if span is not root:
+                stages[span["name"]] += _duration_ms(span)
+        routes[root["name"]]["request"].append(_duration_ms(root))
+        for name, total in stages.items():
+            routes[root["name"]][name].append(total)
+    return routes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency breakdown from trace files")
+    parser.add_argument("--dir", default=get_settings().TRACE_DIR)
+    parser.add_argument("--route", help="Only report this root span name, e.g. 'POST /api/v1/prediction/predict'")
+    args = parser.parse_args()
+
+    spans = load_spans(args.dir)
+    if not spans:
+        logger.info(f"No spans found under {args.dir}")
+        return
+
+    for route, stages in sorted(stage_durations(spans).items()):
+        if args.route and route != args.route:
+            continue
+        requests = np.array(stages.pop("request"))
+        logger.info(f"{route}: {len(requests):,} requests, p50 {np.percentile(requests, 50):.2f} ms, "
+                    f"p95 {np.percentile(requests, 95):.2f} ms")
+        logger.info(f"  {'stage':<30} {'seen':>6} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9} {'share':>6}")
+        total = requests.sum()
+        for name, values in sorted(stages.items(), key=lambda item: -sum(item[1])):
+            values = np.array(values)
+            logger.info(f"  {name:<30} {len(values):>6,} {np.percentile(values, 50):>9.3f} "
+                        f"{np.percentile(values, 95):>9.3f} {values.mean():>9.3f} {values.sum() / total:>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -272,7 +272,7 @@ export default function PricePredictor() {
                 </div>
 
                 <div className="text-gray-500 text-xs">
-                  Prediction ID: {prediction.id}
+                  Prediction ID: {prediction.id ?? prediction.prediction_uuid}
                   <br />
                   Model: {prediction.model_version}
                 </div>
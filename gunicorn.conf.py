@@ -0,0 +1,77 @@
+"""
+Gunicorn configuration for the app.py entry point
+
+    gunicorn -c gunicorn.conf.py app:app
+
+With preload (the default) the master imports the app and loads the model
+registry and locality data once, then forks the workers. The workers share
+those pages copy-on-write instead of each unpickling its own model and
+building its own indexes. Two things keep the shared pages clean after the
+fork:
+
+* gc.freeze() moves everything the master allocated into the permanent
+  generation, so the workers' cyclic GC never walks (and writes to) it.
+* Each worker drops the database connections inherited from the master
+  (engine.dispose(close=False)) and opens its own.
+
+Background threads (model watcher, refreshers, batcher) are started in
+each worker's lifespan, never in the master. Set GUNICORN_PRELOAD=false
+to load everything per worker instead; backend/measure_memory.py compares
+the two modes.
+
+The Procfile starts gunicorn from the repository root, while the relative
+defaults (./models, the SQLite database) are relative to backend/, as with
+start.py; chdir moves the master into backend/ before the app is imported.
+"""
+
+import gc
+import os
+
+# Preloading exists to share the loaded model; load it eagerly in the master
+os.environ.setdefault("LAZY_STARTUP", "false")
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Relative model and database paths resolve against backend/; the repository
+# root stays importable for app:app
+chdir = os.path.join(ROOT_DIR, "backend")
+pythonpath = ROOT_DIR
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    # No collections in the master while it builds the state to be shared;
+    # the objects are frozen in when_ready
+    if server.cfg.preload_app:
+        gc.disable()
+
+
+def when_ready(server):
+    """Runs in the master after the app is imported and before any fork"""
+    if not server.cfg.preload_app:
+        return
+    from database import engine
+    from main import load_shared_state
+
+    load_shared_state()
+    # The master serves no requests; close its connections before forking
+    engine.dispose()
+    gc.freeze()
+    server.log.info(f"Preloaded model and locality data; {gc.get_freeze_count():,} objects frozen")
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    from database import engine
+
+    # Pool connections created in the master must not be shared with it
+    engine.dispose(close=False)
+    gc.enable()
@@ -0,0 +1,208 @@
+"""
+Versioned model bundle: one directory per trained model
+
+A bundle holds everything the API needs to serve a model:
+
+    bundles/
+        CURRENT                      name of the published version
+        20261017-101500-1a2b3c4d/
+            manifest.json            version, feature names, locality categories,
+                                     training metrics, sha256 of every payload file
+            model.ubj                XGBoost booster (model.joblib for RandomForest)
+            scaler.joblib            only for models that still need scaling
+            compiled/*.npy           flattened node arrays for the NumPy evaluator
+
+The compiled arrays are plain .npy files holding exactly the node arrays
+the evaluator walks, in its dtypes, so the backend memory-maps them and
+uses them without a copy; every worker process reads the same page-cache
+pages. Bundles are never
+modified after they are written: the writer builds the directory under a
+temporary name, renames it into place and then atomically replaces
+CURRENT, so a reader always sees a complete bundle. The backend side is
+backend/services/model_bundle.py.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import joblib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+CURRENT_NAME = "CURRENT"
+
+# dtypes the backend evaluator indexes with; stored as-is so loading needs no cast
+COMPILED_DTYPES = {
+    "feature": np.intp,
+    "threshold": np.float32,
+    "left": np.intp,
+    "default_right": bool,
+    "value": np.float32,
+    "roots": np.intp,
+    "virtual_source": np.intp,
+    "virtual_table": bool,
+}
+COMPILED_SCALARS = ("max_depth", "n_features", "base_score")
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _jsonable(value):
+    """Metrics may hold NumPy scalars and arrays (e.g. cv_scores)"""
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
+
+
+def write_bundle(
+    bundle_dir,
+    model,
+    feature_names: list,
+    locality_categories: Optional[list] = None,
+    scaler=None,
+    metrics: Optional[dict] = None,
+    compiled: Optional[dict] = None,
+    keep: int = 5,
+) -> Path:
+    """
+    Write a new bundle and publish it as the current version
+
+    Args:
+        bundle_dir: Directory holding all bundles and the CURRENT pointer
+        model: Trained XGBRegressor or RandomForestRegressor
+        feature_names: Column order the model expects
+        locality_categories: Sorted locality names (code = index)
+        scaler: Fitted scaler, for models that did not fold it into their trees
+        metrics: Training/evaluation metrics to record in the manifest
+        compiled: Arrays from flatten_booster, for the NumPy evaluator
+        keep: Number of most recent bundles to keep on disk (0 keeps all)
+
+    Returns:
+        Path of the published bundle directory
+    """
+    bundle_dir = Path(bundle_dir)
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    created_at = datetime.utcnow()
+    staging = bundle_dir / f".staging-{uuid.uuid4().hex}"
+    staging.mkdir()
+
+    try:
+        if hasattr(model, "get_booster"):
+            model_type, model_file = "xgboost", "model.ubj"
+            model.save_model(staging / model_file)
+            raw_features = model.get_booster().attr("raw_features") == "1"
+        else:
+            model_type, model_file = "random_forest", "model.joblib"
+            joblib.dump(model, staging / model_file)
+            raw_features = False
+
+        scaler_file = None
+        if scaler is not None:
+            scaler_file = "scaler.joblib"
+            joblib.dump(scaler, staging / scaler_file)
+
+        compiled_manifest = None
+        if compiled is not None:
+            (staging / "compiled").mkdir()
+            arrays = {}
+            for name, dtype in COMPILED_DTYPES.items():
+                arrays[name] = f"compiled/{name}.npy"
+                np.save(staging / arrays[name], np.ascontiguousarray(compiled[name], dtype=dtype))
+            compiled_manifest = {name: compiled[name].item() for name in COMPILED_SCALARS}
+            compiled_manifest["arrays"] = arrays
+
+        files = {
+            str(path.relative_to(staging).as_posix()): {"sha256": _sha256(path), "bytes": path.stat().st_size}
+            for path in sorted(staging.rglob("*")) if path.is_file()
+        }
+        content_hash = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+        version = f"{created_at:%Y%m%d-%H%M%S}-{content_hash[:8]}"
+
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "model_version": version,
+            "created_at": created_at.isoformat(),
+            "model_type": model_type,
+            "model_file": model_file,
+            "raw_features": raw_features,
+            "scaler_file": scaler_file,
+            "feature_names": list(feature_names),
+            "locality_categories": list(locality_categories) if locality_categories is not None else None,
+            "metrics": _jsonable(metrics or {}),
+            "compiled": compiled_manifest,
+            "files": files,
+        }
+        (staging / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+
+        target = bundle_dir / version
+        if target.exists():  # same content written within the same second
+            shutil.rmtree(staging)
+        else:
+            os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    publish(bundle_dir, version)
+    if keep:
+        prune(bundle_dir, keep)
+    logger.info(f"Model bundle {version} written to {target}")
+    return target
+
+
+def publish(bundle_dir, version: str):
+    """Atomically point CURRENT at a bundle (also used to roll back)"""
+    bundle_dir = Path(bundle_dir)
+    if not (bundle_dir / version / MANIFEST_NAME).exists():
+        raise FileNotFoundError(f"No bundle {version} in {bundle_dir}")
+    tmp = bundle_dir / f".{CURRENT_NAME}.{uuid.uuid4().hex}"
+    tmp.write_text(version + "\n")
+    os.replace(tmp, bundle_dir / CURRENT_NAME)
+
+
+def current_version(bundle_dir) -> Optional[str]:
+    """Version named by CURRENT, or None when nothing was published"""
+    try:
+        return (Path(bundle_dir) / CURRENT_NAME).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(bundle_path) -> dict:
+    manifest = json.loads((Path(bundle_path) / MANIFEST_NAME).read_text())
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format: {manifest.get('format')}")
+    return manifest
+
+
+def prune(bundle_dir, keep: int):
+    """Delete all but the newest ``keep`` bundles, never the current one"""
+    bundle_dir = Path(bundle_dir)
+    current = current_version(bundle_dir)
+    versions = sorted(
+        path.name for path in bundle_dir.iterdir()
+        if path.is_dir() and (path / MANIFEST_NAME).exists()
+    )
+    for version in versions[:-keep]:
+        if version != current:
+            shutil.rmtree(bundle_dir / version, ignore_errors=True)
@@ -4,18 +4,223 @@ ML model training pipeline
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split, cross_val_score, GroupKFold
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestRegressor
 import xgboost as xgb
 from sklearn.metrics import mean_absolute_error, r2_score, mean_squared_error
 import joblib
+import json
 import logging
 from pathlib import Path
 
+try:
+    from ml.synthetic_data import generate_synthetic_data
+    from ml import bundle, streaming
+    from ml.tuning import HyperparameterSearch
+except ImportError:  # run as a script: python ml/model_trainer.py
+    from synthetic_data import generate_synthetic_data
+    import bundle
+    import streaming
+    from tuning import HyperparameterSearch
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+FEATURE_COLUMNS = [
+    'bhk', 'carpet_area_sqft', 'floor_number', 'total_floors',
+    'building_age_years', 'lift', 'parking', 'gym',
+    'swimming_pool', 'gated_society', 'cctv',
+    'metro_distance_km', 'highway_distance_km'
+]
+
+# Locality is one integer-coded column (index into the sorted category list)
+# that XGBoost splits on natively, instead of one-hot columns per node
+LOCALITY_COLUMN = 'locality'
+FEATURE_TYPES = ['q'] * len(FEATURE_COLUMNS) + ['c']
+
+
+def flatten_booster(model: xgb.XGBRegressor) -> dict:
+    """
+    Flatten a trained XGBoost regressor into contiguous node arrays
+    
+    All trees share one set of arrays; roots[t] is the first node of tree t.
+    Nodes are renumbered breadth-first so that the right child is always
+    left + 1, and a leaf points to itself, so walking max_depth steps from
+    the roots always ends on leaves. Every distinct (column, category set)
+    of the categorical splits becomes a virtual 0/1 column after the real
+    features (virtual_source, virtual_table: True = category goes right),
+    and its nodes compare that column against 0.5. Leaves have a NaN
+    threshold and never go right. The arrays are exactly what
+    backend/services/compiled_ensemble.py walks, so the backend can use
+    the bundle's memory-mapped files without deriving anything per process.
+    """
+    learner = json.loads(model.get_booster().save_raw("json"))["learner"]
+    booster = learner["gradient_booster"]["model"]
+    trees = booster["trees"]
+    try:
+        best_iteration = model.best_iteration
+    except AttributeError:
+        best_iteration = None
+    if best_iteration is not None:
+        per_round = int(booster["gbtree_model_param"].get("num_parallel_tree", 1))
+        trees = trees[:(best_iteration + 1) * per_round]
+    
+    feature, threshold, left, default_left, value, cat_row = [], [], [], [], [], []
+    categories, roots = [], []
+    max_depth = 0
+    for tree in trees:
+        node_cats = dict(zip(
+            tree["categories_nodes"],
+            (tree["categories"][start:start + size]
+             for start, size in zip(tree["categories_segments"], tree["categories_sizes"]))
+        ))
+        offset = len(feature)
+        roots.append(offset)
+        # Breadth-first: (original id, depth); children get consecutive new ids
+        order = [(0, 0)]
+        for new_id, (nid, depth) in enumerate(order):
+            lc, rc = tree["left_children"][nid], tree["right_children"][nid]
+            is_leaf = lc == -1
+            max_depth = max(max_depth, depth)
+            default_left.append(bool(tree["default_left"][nid]))
+            if is_leaf:
+                feature.append(0)
+                threshold.append(0.0)
+                left.append(offset + new_id)
+                value.append(tree["split_conditions"][nid])
+                cat_row.append(-1)
+                continue
+            feature.append(tree["split_indices"][nid])
+            threshold.append(tree["split_conditions"][nid])
+            left.append(offset + len(order))
+            value.append(0.0)
+            if tree["split_type"][nid] == 1:
+                cat_row.append(len(categories))
+                categories.append(node_cats.get(nid, []))
+            else:
+                cat_row.append(-1)
+            order.extend([(lc, depth + 1), (rc, depth + 1)])
+    
+    width = max((max(c) + 1 for c in categories if c), default=0)
+    cat_table = np.zeros((len(categories), width), dtype=bool)
+    for row, cats in enumerate(categories):
+        cat_table[row, cats] = True
+    
+    n_features = int(learner["learner_model_param"]["num_feature"])
+    feature = np.asarray(feature, dtype=np.intp)
+    threshold = np.asarray(threshold, dtype=np.float32)
+    left = np.asarray(left, dtype=np.intp)
+    cat_row = np.asarray(cat_row, dtype=np.intp)
+    is_leaf = left == np.arange(len(left))
+    is_cat = cat_row >= 0
+    
+    # Sorted by source column, so each column's virtual columns are contiguous
+    keys = np.column_stack([feature[is_cat], cat_table[cat_row[is_cat]]]).astype(np.intp)
+    virtual, column = np.unique(keys, axis=0, return_inverse=True)
+    feature[is_cat] = n_features + column.reshape(-1)
+    threshold[is_cat] = 0.5
+    threshold[is_leaf] = np.nan
+    
+    return {
+        "feature": feature,
+        "threshold": threshold,
+        "left": left,
+        "default_right": ~np.asarray(default_left, dtype=bool) & ~is_leaf,
+        "value": np.asarray(value, dtype=np.float32),
+        "roots": np.asarray(roots, dtype=np.intp),
+        "virtual_source": virtual[:, 0].copy(),
+        "virtual_table": virtual[:, 1:].astype(bool),
+        "max_depth": np.int32(max_depth),
+        "n_features": np.int32(n_features),
+        "base_score": np.float64(float(learner["learner_model_param"]["base_score"].strip("[]"))),
+    }
+
+
+def _unscale_thresholds(thresholds: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    Raw-space float32 thresholds T with  x < T  <=>  float32((x - mean) / scale) < threshold
+    
+    The affine inverse gives T up to rounding; T is then moved one float32
+    step at a time to the smallest value the scaled comparison sends right,
+    so the folded split is exact for every float32 input.
+    """
+    def scaled(t):  # what the scaled model saw for raw value t
+        return ((t.astype(np.float64) - mean) / scale).astype(np.float32)
+    
+    t = (thresholds.astype(np.float64) * scale + mean).astype(np.float32)
+    while True:
+        low = scaled(t) < thresholds
+        if not low.any():
+            break
+        t[low] = np.nextafter(t[low], np.float32(np.inf))
+    while True:
+        below = np.nextafter(t, np.float32(-np.inf))
+        high = scaled(below) >= thresholds
+        if not high.any():
+            break
+        t[high] = below[high]
+    return t
+
+
+def fold_scaler(model: xgb.XGBRegressor, scaler: StandardScaler) -> xgb.XGBRegressor:
+    """
+    Rewrite a booster trained on standardized features to take raw features
+    
+    Trees only compare one feature against a threshold, so standardization
+    can be undone on the thresholds instead of applied to every input. The
+    returned model is marked with the booster attribute raw_features=1 and
+    needs no scaler at serving time.
+    """
+    raw = json.loads(model.get_booster().save_raw("json"))
+    learner = raw["learner"]
+    mean = np.asarray(scaler.mean_, dtype=np.float64)
+    scale = np.asarray(scaler.scale_, dtype=np.float64)
+    for j, feature_type in enumerate(learner.get("feature_types") or []):
+        if feature_type == "c" and (mean[j] != 0.0 or scale[j] != 1.0):
+            raise ValueError(f"Categorical feature {j} was scaled; cannot fold the scaler")
+    
+    for tree in learner["gradient_booster"]["model"]["trees"]:
+        nodes = [
+            nid for nid, child in enumerate(tree["left_children"])
+            if child != -1 and tree["split_type"][nid] == 0
+        ]
+        if not nodes:
+            continue
+        features = np.array([tree["split_indices"][nid] for nid in nodes])
+        thresholds = np.array([tree["split_conditions"][nid] for nid in nodes], dtype=np.float32)
+        folded = _unscale_thresholds(thresholds, mean[features], scale[features])
+        for nid, value in zip(nodes, folded.tolist()):
+            tree["split_conditions"][nid] = value
+    
+    serving = xgb.XGBRegressor(enable_categorical=True)
+    serving.load_model(bytearray(json.dumps(raw).encode()))
+    serving.get_booster().set_attr(raw_features="1")
+    return serving
+
+
+def check_serving_parity(model, scaler: StandardScaler, serving, X_raw: np.ndarray, rtol: float = 1e-5) -> float:
+    """
+    Compare the scaled model with its folded serving model on raw rows
+    
+    Rows are rounded to float32 first (what XGBoost compares in), where the
+    folded thresholds are exact; any disagreement beyond float summation
+    noise means the fold is wrong.
+    
+    Returns:
+        Largest relative difference
+    
+    Raises:
+        ValueError: If predictions differ by more than rtol
+    """
+    X_raw = np.asarray(X_raw, dtype=np.float32).astype(np.float64)
+    expected = model.predict(scaler.transform(X_raw))
+    actual = serving.predict(X_raw)
+    max_rel = float(np.max(np.abs(expected - actual) / np.maximum(np.abs(expected), 1.0)))
+    if max_rel > rtol:
+        raise ValueError(f"Serving model disagrees with the trained model (max relative difference {max_rel:.2e})")
+    return max_rel
+
 
 class ModelTrainer:
     """Train and evaluate house price prediction models"""
@@ -25,6 +230,9 @@ class ModelTrainer:
         self.model = None
         self.scaler = None
         self.feature_names = None
+        self.locality_categories = None
+        self.best_params = None
+        self.metrics = None
         self.model_dir = Path("./models")
         self.model_dir.mkdir(exist_ok=True)
     
@@ -49,88 +257,9 @@ class ModelTrainer:
         # Return sample synthetic data for demonstration
         return self._create_sample_data()
     
-    def _create_sample_data(self, n_samples: int = 500) -> pd.DataFrame:
-        """Create synthetic training data for demonstration"""
-        np.random.seed(42)
-        
-        localities = [
-            "Kharghar", "Vashi", "Panvel", "Nerul", 
-            "Belapur", "Airoli", "Ulwe", "Dronagiri",
-            "CBD Belapur", "Seawoods"
-        ]
-        
-        # More realistic price per sqft ranges for Navi Mumbai localities
-        locality_price_ranges = {
-            "Seawoods": (140000, 160000),
-            "CBD Belapur": (120000, 140000),
-            "Vashi": (110000, 130000),
-            "Belapur": (100000, 120000),
-            "Kharghar": (80000, 100000),
-            "Koparkhairane": (90000, 110000),
-            "Airoli": (85000, 105000),
-            "Ghansoli": (75000, 95000),
-            "Kamothe": (65000, 85000),
-            "Panvel": (60000, 80000),
-            "Ulwe": (50000, 70000),
-            "Dronagiri": (45000, 65000),
-            "Taloje": (40000, 60000),
-        }
-        
-        data = {
-            'locality': np.random.choice(localities, n_samples),
-            'bhk': np.random.choice([1, 2, 3, 4], n_samples),
-            'carpet_area_sqft': np.random.uniform(500, 4000, n_samples),
-            'floor_number': np.random.randint(1, 20, n_samples),
-            'total_floors': np.random.randint(5, 40, n_samples),
-            'building_age_years': np.random.randint(0, 25, n_samples),
-            'lift': np.random.choice([0, 1], n_samples),
-            'parking': np.random.choice([0, 1], n_samples),
-            'gym': np.random.choice([0, 1], n_samples),
-            'swimming_pool': np.random.choice([0, 1], n_samples),
-            'gated_society': np.random.choice([0, 1], n_samples),
-            'cctv': np.random.choice([0, 1], n_samples),
-            'metro_distance_km': np.random.uniform(0.5, 15, n_samples),
-            'highway_distance_km': np.random.uniform(1, 10, n_samples),
-        }
-        
-        df = pd.DataFrame(data)
-        
-        # Generate synthetic price based on realistic patterns
-        prices = []
-        for idx, row in df.iterrows():
-            locality = row['locality']
-            base_price_range = locality_price_ranges.get(locality, (80000, 100000))
-            base_price_per_sqft = np.random.uniform(base_price_range[0], base_price_range[1])
-            
-            # Apply feature adjustments
-            bhk_multiplier = {1: 0.85, 2: 1.0, 3: 1.15, 4: 1.3}
-            bhk_factor = bhk_multiplier.get(int(row['bhk']), 1.0)
-            
-            # Amenities add value
-            amenity_bonus = (row['lift'] * 0.02 + row['parking'] * 0.02 + 
-                            row['gym'] * 0.01 + row['swimming_pool'] * 0.02 + 
-                            row['gated_society'] * 0.02 + row['cctv'] * 0.01)
-            
-            # Age factor
-            age_factor = 1.0
-            if row['building_age_years'] < 5:
-                age_factor = 1.08
-            elif row['building_age_years'] > 15:
-                age_factor = 0.92
-            
-            # Calculate total price
-            adjusted_price_per_sqft = base_price_per_sqft * bhk_factor * (1 + amenity_bonus) * age_factor
-            total_price = adjusted_price_per_sqft * row['carpet_area_sqft']
-            
-            # Add small random variation
-            total_price *= np.random.uniform(0.95, 1.05)
-            
-            prices.append(total_price)
-        
-        df['price'] = prices
-        
-        # Realistic bounds for Navi Mumbai
-        df['price'] = df['price'].clip(lower=3000000, upper=50000000)
+    def _create_sample_data(self, n_samples: int = 500, seed: int = 42) -> pd.DataFrame:
+        """Create synthetic training data for demonstration (see ml.synthetic_data)"""
+        df = generate_synthetic_data(n_samples, seed=seed)
         
         logger.info(f"Created synthetic data: {df.shape}")
         logger.info(f"Price range: ₹{df['price'].min():,.0f} to ₹{df['price'].max():,.0f}")
@@ -138,23 +267,14 @@ class ModelTrainer:
     
     def prepare_features(self, df: pd.DataFrame) -> tuple:
         """Prepare features and target for modeling"""
-        # Select feature columns
-        feature_cols = [
-            'bhk', 'carpet_area_sqft', 'floor_number', 'total_floors',
-            'building_age_years', 'lift', 'parking', 'gym',
-            'swimming_pool', 'gated_society', 'cctv',
-            'metro_distance_km', 'highway_distance_km'
-        ]
-        
-        X = df[feature_cols].copy()
+        X = df[FEATURE_COLUMNS].copy()
         
         # Handle missing values
         X = X.fillna(X.median())
         
-        # One-hot encode locality if present
-        if 'locality' in df.columns:
-            locality_dummies = pd.get_dummies(df['locality'], prefix='loc')
-            X = pd.concat([X, locality_dummies], axis=1)
+        # Integer-code locality against the sorted names seen in training
+        self.locality_categories = sorted(df['locality'].dropna().astype(str).unique())
+        X[LOCALITY_COLUMN] = streaming.locality_codes(df['locality'], self.locality_categories)
         
         self.feature_names = list(X.columns)
         
@@ -163,13 +283,14 @@ class ModelTrainer:
         logger.info(f"Prepared features: {X.shape}, target: {y.shape}")
         return X, y
     
-    def train(self, df: pd.DataFrame = None, model_type: str = "xgboost"):
+    def train(self, df: pd.DataFrame = None, model_type: str = "xgboost", params: dict = None):
         """
         Train price prediction model
         
         Args:
             df: Training dataframe
             model_type: "xgboost" or "random_forest"
+            params: Constructor overrides, e.g. best_params["params"] from tune()
         """
         # Load and prepare data
         df = self.load_data(df)
@@ -180,27 +301,35 @@ class ModelTrainer:
             X, y, test_size=0.2, random_state=42
         )
         
-        # Scale features
+        # Scale features; the locality codes pass through unchanged
+        # (fitted on arrays: serving passes arrays, not DataFrames)
         self.scaler = StandardScaler()
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        self.scaler.fit(X_train.to_numpy(dtype=float))
+        self._passthrough_locality(self.scaler)
+        X_train_scaled = self.scaler.transform(X_train.to_numpy(dtype=float))
+        X_test_scaled = self.scaler.transform(X_test.to_numpy(dtype=float))
         
         # Train model
         if model_type == "xgboost":
-            self.model = xgb.XGBRegressor(
-                n_estimators=100,
-                max_depth=7,
-                learning_rate=0.1,
-                random_state=42,
-                n_jobs=-1
-            )
+            self.model = xgb.XGBRegressor(**{
+                "n_estimators": 100,
+                "max_depth": 7,
+                "learning_rate": 0.1,
+                "random_state": 42,
+                "n_jobs": -1,
+                "tree_method": "hist",
+                "enable_categorical": True,
+                "feature_types": FEATURE_TYPES,
+                **(params or {})
+            })
         else:
-            self.model = RandomForestRegressor(
-                n_estimators=100,
-                max_depth=15,
-                random_state=42,
-                n_jobs=-1
-            )
+            self.model = RandomForestRegressor(**{
+                "n_estimators": 100,
+                "max_depth": 15,
+                "random_state": 42,
+                "n_jobs": -1,
+                **(params or {})
+            })
         
         logger.info(f"Training {model_type} model...")
         self.model.fit(X_train_scaled, y_train)
@@ -219,57 +348,264 @@ class ModelTrainer:
         logger.info(f"  R² Score: {r2:.4f}")
         logger.info(f"  MAPE: {mape:.2f}%")
         
-        # Cross-validation
+        # Cross-validation across locality segments: each fold holds out whole localities
+        groups = df.loc[X_train.index, 'locality'].astype(str)
+        n_splits = min(5, groups.nunique())
         cv_scores = cross_val_score(
             self.model, X_train_scaled, y_train,
-            cv=5, scoring='r2'
+            groups=groups, cv=GroupKFold(n_splits=n_splits), scoring='r2'
         )
-        logger.info(f"  Cross-Val R² (5-fold): {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
+        logger.info(f"  Cross-Val R² ({n_splits}-fold by locality): {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
         
-        return {
+        if model_type == "xgboost":
+            self._to_serving(X_test.to_numpy(dtype=float))
+        
+        self.metrics = {
             'mae': mae,
             'rmse': rmse,
             'r2': r2,
             'mape': mape,
-            'cv_scores': cv_scores
+            'cv_scores': cv_scores,
+            'rows': len(df),
         }
+        return self.metrics
     
-    def save_model(self, model_name: str = "xgboost_model"):
-        """Save trained model, scaler, and feature names"""
-        if self.model is None:
-            raise ValueError("Model not trained yet")
+    def tune(self, df: pd.DataFrame = None, **search_kwargs) -> list:
+        """
+        Parallel hyperparameter search (see ml.tuning)
         
-        model_path = self.model_dir / f"{model_name}.pkl"
-        scaler_path = self.model_dir / "scaler.pkl"
-        features_path = self.model_dir / "feature_names.pkl"
+        Args:
+            df: Training dataframe
+            search_kwargs: HyperparameterSearch options (model_types, n_candidates,
+                strategy, workers, time_budget_seconds, ...)
+        
+        Returns:
+            Leaderboard rows, best first; the winner is kept in self.best_params
+        """
+        df = self.load_data(df)
+        X, y = self.prepare_features(df)
+        search_kwargs.setdefault("output_dir", str(self.model_dir))
+        search = HyperparameterSearch(**search_kwargs)
+        leaderboard = search.run(X.to_numpy(dtype=float), y.to_numpy(dtype=float),
+                                 df['locality'].astype(str).to_numpy(), FEATURE_TYPES)
+        self.best_params = search.best_params()
+        logger.info(f"Leaderboard saved to {search.leaderboard_path}")
+        return leaderboard
+    
+    def _to_serving(self, X_raw: np.ndarray):
+        """Replace the scaled XGBoost model with its raw-feature serving model"""
+        serving = fold_scaler(self.model, self.scaler)
+        max_rel = check_serving_parity(self.model, self.scaler, serving, X_raw)
+        logger.info(f"  Scaler folded into the trees (max relative difference {max_rel:.1e} "
+                    f"over {len(X_raw):,} rows)")
+        self.model = serving
+        self.scaler = None
+    
+    @staticmethod
+    def _passthrough_locality(scaler: StandardScaler):
+        """Leave the trailing locality code column unscaled"""
+        scaler.mean_[-1] = 0.0
+        scaler.var_[-1] = 1.0
+        scaler.scale_[-1] = 1.0
+    
+    def train_streaming(
+        self,
+        data_path: str = None,
+        chunk_rows: int = 500_000,
+        memory: str = "external",
+        cache_dir: str = None,
+        test_size: float = 0.2,
+        seed: int = 42,
+        num_boost_round: int = 100,
+    ):
+        """
+        Train XGBoost without loading the dataset into memory
         
-        joblib.dump(self.model, model_path)
-        joblib.dump(self.scaler, scaler_path)
-        joblib.dump(self.feature_names, features_path)
+        The data is read in chunks three times: one pass for scaler
+        statistics and locality categories, XGBoost's own passes to build
+        its matrix from an iterator, and one evaluation pass over the
+        hold-out rows. Peak memory depends on chunk_rows, not dataset size.
         
-        logger.info(f"Model saved to {model_path}")
-        logger.info(f"Scaler saved to {scaler_path}")
-        logger.info(f"Features saved to {features_path}")
+        Args:
+            data_path: CSV/parquet file, shard directory or glob (defaults to self.data_path)
+            chunk_rows: Rows read per chunk
+            memory: "external" (on-disk DMatrix cache, bounded RAM) or
+                "quantile" (QuantileDMatrix held in RAM, ~1 byte per cell)
+            cache_dir: Directory for the external-memory cache (defaults to the model dir)
+            test_size: Fraction of rows held out for evaluation
+            seed: Seed for the hold-out split and the booster
+            num_boost_round: Number of boosting rounds
+        """
+        data_path = data_path or self.data_path
+        if not data_path:
+            raise ValueError("Streaming training needs a data_path")
+        if memory not in ("external", "quantile"):
+            raise ValueError(f"Unknown memory mode: {memory}")
+        
+        # Pass 1: scaler statistics and locality categories on training rows
+        stats = streaming.StreamingStats(FEATURE_COLUMNS)
+        for idx, chunk in enumerate(streaming.iter_frames(data_path, chunk_rows)):
+            stats.update(chunk[~streaming.holdout_mask(idx, len(chunk), test_size, seed)])
+        localities = sorted(stats.categories)
+        self.locality_categories = localities
+        self.scaler = streaming.build_scaler(stats)
+        self.feature_names = FEATURE_COLUMNS + [LOCALITY_COLUMN]
+        fill_values = stats.mean
+        logger.info(f"Streaming stats: {stats.rows:,} training rows, {len(localities)} localities "
+                    f"(peak RSS {streaming.peak_rss_mb():,.0f} MB)")
+        
+        def chunks(holdout: bool):
+            for idx, chunk in enumerate(streaming.iter_frames(data_path, chunk_rows)):
+                mask = streaming.holdout_mask(idx, len(chunk), test_size, seed)
+                part = chunk[mask] if holdout else chunk[~mask]
+                if len(part):
+                    yield streaming.prepare_chunk(part, FEATURE_COLUMNS, localities, fill_values)
+        
+        def scaled_training_chunks():
+            for X, y in chunks(False):
+                yield self.scaler.transform(X), y
+        
+        # Pass 2: XGBoost builds its matrix from the iterator
+        if memory == "external":
+            cache_prefix = str(Path(cache_dir or self.model_dir) / "xgb_cache")
+            dtrain = xgb.DMatrix(
+                streaming.ChunkIter(scaled_training_chunks, cache_prefix=cache_prefix, feature_types=FEATURE_TYPES),
+                enable_categorical=True,
+            )
+        else:
+            dtrain = xgb.QuantileDMatrix(
+                streaming.ChunkIter(scaled_training_chunks, feature_types=FEATURE_TYPES),
+                max_bin=256,
+                enable_categorical=True,
+            )
+        logger.info(f"Built {memory} DMatrix: {dtrain.num_row():,} x {dtrain.num_col()} "
+                    f"(peak RSS {streaming.peak_rss_mb():,.0f} MB)")
+        
+        params = {
+            "objective": "reg:squarederror",
+            "tree_method": "hist",
+            "max_depth": 7,
+            "eta": 0.1,
+            "seed": seed,
+            "nthread": -1,
+        }
+        logger.info("Training xgboost model (streaming)...")
+        booster = xgb.train(params, dtrain, num_boost_round=num_boost_round)
+        del dtrain
+        
+        # Same artifact type as train(), so save_model and the API are unchanged
+        self.model = xgb.XGBRegressor(enable_categorical=True)
+        self.model.load_model(bytearray(booster.save_raw("json")))
+        
+        # Pass 3: metrics over the hold-out rows
+        evaluation = streaming.StreamingMetrics()
+        parity_rows = None
+        for X, y in chunks(True):
+            evaluation.update(y, self.model.predict(self.scaler.transform(X)))
+            if parity_rows is None:
+                parity_rows = X[:10_000]
+        metrics = evaluation.result()
+        if parity_rows is not None:
+            self._to_serving(parity_rows)
+        metrics["rows"] = stats.rows + evaluation.n
+        metrics["peak_rss_mb"] = streaming.peak_rss_mb()
+        
+        logger.info("Model Performance (streaming hold-out):")
+        logger.info(f"  MAE: ₹{metrics['mae']:,.0f}")
+        logger.info(f"  RMSE: ₹{metrics['rmse']:,.0f}")
+        logger.info(f"  R² Score: {metrics['r2']:.4f}")
+        logger.info(f"  MAPE: {metrics['mape']:.2f}%")
+        logger.info(f"  Peak RSS: {metrics['peak_rss_mb']:,.0f} MB")
+        
+        self.metrics = metrics
+        return metrics
+    
+    @property
+    def bundle_dir(self) -> Path:
+        return self.model_dir / "bundles"
     
-    def load_model(self, model_name: str = "xgboost_model"):
-        """Load previously trained model"""
-        model_path = self.model_dir / f"{model_name}.pkl"
-        scaler_path = self.model_dir / "scaler.pkl"
-        features_path = self.model_dir / "feature_names.pkl"
+    def save_model(self, keep: int = 5) -> Path:
+        """
+        Save the trained model as a new versioned bundle and publish it
+        
+        The bundle (see ml/bundle.py) holds the model, feature names,
+        locality categories, the metrics of the last training run and, for
+        XGBoost, the flattened booster for the backend's NumPy evaluator.
+        XGBoost models are saved as raw-feature serving models (scaler
+        folded into the trees), so only RandomForest bundles carry a scaler.
+        
+        Args:
+            keep: Number of most recent bundles to keep on disk (0 keeps all)
         
-        self.model = joblib.load(model_path)
-        self.scaler = joblib.load(scaler_path)
-        self.feature_names = joblib.load(features_path)
+        Returns:
+            Path of the published bundle
+        """
+        if self.model is None:
+            raise ValueError("Model not trained yet")
         
-        logger.info(f"Model loaded from {model_path}")
+        compiled = flatten_booster(self.model) if isinstance(self.model, xgb.XGBRegressor) else None
+        path = bundle.write_bundle(
+            self.bundle_dir,
+            self.model,
+            feature_names=self.feature_names,
+            locality_categories=self.locality_categories,
+            scaler=self.scaler,
+            metrics=self.metrics,
+            compiled=compiled,
+            keep=keep,
+        )
+        if compiled is not None:
+            logger.info(f"Compiled ensemble: {len(compiled['roots'])} trees, {len(compiled['feature'])} nodes")
+        return path
+    
+    def load_model(self, version: str = None):
+        """Load a saved bundle (the published one by default)"""
+        version = version or bundle.current_version(self.bundle_dir)
+        if version is None:
+            raise FileNotFoundError(f"No model bundle published in {self.bundle_dir}")
+        path = self.bundle_dir / version
+        manifest = bundle.read_manifest(path)
+        
+        if manifest["model_type"] == "xgboost":
+            self.model = xgb.XGBRegressor(enable_categorical=True)
+            self.model.load_model(path / manifest["model_file"])
+        else:
+            self.model = joblib.load(path / manifest["model_file"])
+        self.scaler = joblib.load(path / manifest["scaler_file"]) if manifest["scaler_file"] else None
+        self.feature_names = manifest["feature_names"]
+        self.locality_categories = manifest["locality_categories"]
+        self.metrics = manifest["metrics"]
+        
+        logger.info(f"Model {version} loaded from {path}")
 
 
 if __name__ == "__main__":
     """Example usage"""
-    trainer = ModelTrainer()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Train the house price model")
+    parser.add_argument("--data", default=None, help="Training CSV (synthetic data if omitted)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Out-of-core training; --data may be a CSV/parquet file, shard directory or glob")
+    parser.add_argument("--chunk-rows", type=int, default=500_000)
+    parser.add_argument("--memory", choices=["external", "quantile"], default="external")
+    parser.add_argument("--tune", action="store_true",
+                        help="Hyperparameter search first, then train the winner")
+    parser.add_argument("--time-budget", type=float, default=600, help="Tuning time budget in seconds")
+    args = parser.parse_args()
+    
+    trainer = ModelTrainer(data_path=args.data)
     
     # Train model
-    metrics = trainer.train(model_type="xgboost")
+    if args.stream:
+        metrics = trainer.train_streaming(chunk_rows=args.chunk_rows, memory=args.memory)
+    elif args.tune:
+        df = trainer.load_data()
+        trainer.tune(df, time_budget_seconds=args.time_budget)
+        best = trainer.best_params or {"model_type": "xgboost", "params": None}
+        metrics = trainer.train(df, model_type=best["model_type"], params=best["params"])
+    else:
+        metrics = trainer.train(model_type="xgboost")
     
     # Save model
     trainer.save_model()
@@ -0,0 +1,202 @@
+"""
+Out-of-core training helpers
+
+Large transaction histories (CSV or parquet, single files, directories of
+shards or globs) are read in chunks and never held in memory at once:
+
+- one streaming pass collects per-column count/mean/variance (Chan's
+  parallel update) and the locality categories, which yields the
+  StandardScaler and a fixed locality code mapping;
+- ChunkIter feeds prepared chunks to XGBoost, which builds either an
+  external-memory DMatrix (on-disk cache, bounded RAM) or a QuantileDMatrix
+  (quantized in RAM, ~1 byte per cell);
+- evaluation metrics are accumulated chunk by chunk over a deterministic
+  hold-out split.
+"""
+
+import glob
+import logging
+import os
+import resource
+import sys
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def resolve_paths(path: str) -> List[str]:
+    """Expand a file, a directory of shards or a glob into sorted data files"""
+    if os.path.isdir(path):
+        files = [str(p) for p in Path(path).iterdir() if p.suffix in (".csv", ".parquet")]
+    else:
+        files = glob.glob(path)
+    if not files:
+        raise FileNotFoundError(f"No CSV or parquet data found at {path}")
+    return sorted(files)
+
+
+def iter_frames(path: str, chunk_rows: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of at most chunk_rows rows from every data file"""
+    for file in resolve_paths(path):
+        if file.endswith(".parquet"):
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(file).iter_batches(batch_size=chunk_rows, columns=columns):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(file, chunksize=chunk_rows, usecols=columns)
+
+
+class StreamingStats:
+    """Running count/mean/M2 per column plus locality category counts"""
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self.rows = 0
+        self.counts = np.zeros(len(columns))
+        self.mean = np.zeros(len(columns))
+        self.m2 = np.zeros(len(columns))
+        self.categories = {}
+
+    def update(self, df: pd.DataFrame):
+        self.rows += len(df)
+        if "locality" in df.columns:
+            # Missing localities are not a category; they get the missing code
+            for name, count in df["locality"].dropna().astype(str).value_counts().items():
+                self.categories[name] = self.categories.get(name, 0) + int(count)
+
+        values = df[self.columns].to_numpy(dtype=float)
+        n = np.sum(~np.isnan(values), axis=0)
+        seen = n > 0
+        if not seen.any():
+            return
+        with np.errstate(invalid="ignore", divide="ignore"):
+            chunk_mean = np.where(seen, np.nansum(values, axis=0) / n, 0.0)
+            chunk_m2 = np.nansum((values - chunk_mean) ** 2, axis=0)
+            total = self.counts + n
+            delta = chunk_mean - self.mean
+            self.mean = np.where(seen, self.mean + delta * n / total, self.mean)
+            self.m2 = np.where(seen, self.m2 + chunk_m2 + delta ** 2 * self.counts * n / total, self.m2)
+        self.counts = total
+
+    @property
+    def var(self) -> np.ndarray:
+        return self.m2 / np.maximum(self.counts, 1)
+
+
+def build_scaler(stats: StreamingStats) -> StandardScaler:
+    """
+    StandardScaler equivalent to fitting on the full prepared matrix
+
+    The trailing locality code column passes through unscaled (mean 0,
+    scale 1): XGBoost reads it as a native categorical.
+    """
+    rows = stats.rows
+    mean = np.append(stats.mean, 0.0)
+    var = np.append(stats.var, 1.0)
+    scale = np.sqrt(var)
+    scale[scale == 0.0] = 1.0
+
+    scaler = StandardScaler()
+    scaler.mean_ = mean
+    scaler.var_ = var
+    scaler.scale_ = scale
+    scaler.n_features_in_ = len(mean)
+    scaler.n_samples_seen_ = rows
+    return scaler
+
+
+def prepare_chunk(
+    df: pd.DataFrame, numeric_cols: List[str], localities: List[str], fill_values: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Numeric features (NaN filled) plus the locality code column"""
+    X = df[numeric_cols].to_numpy(dtype=float)
+    missing = np.isnan(X)
+    if missing.any():
+        X = np.where(missing, fill_values, X)
+    X = np.column_stack([X, locality_codes(df["locality"], localities)])
+    return X, df["price"].to_numpy(dtype=float)
+
+
+def locality_codes(values: pd.Series, localities: List[str]) -> np.ndarray:
+    """Position of each name in the sorted category list; NaN when missing or unseen"""
+    # astype(str) alone would turn NaN/None into the name "nan"; keep them at code -1
+    names = values.astype(str).where(values.notna())
+    codes = pd.Categorical(names, categories=localities).codes.astype(float)
+    codes[codes < 0] = np.nan
+    return codes
+
+
+def holdout_mask(chunk_index: int, n_rows: int, test_size: float, seed: int) -> np.ndarray:
+    """Deterministic per-chunk split, identical on every pass over the data"""
+    rng = np.random.default_rng([seed, chunk_index])
+    return rng.random(n_rows) < test_size
+
+
+class ChunkIter(xgb.DataIter):
+    """Re-iterable XGBoost data iterator over prepared, scaled chunks"""
+
+    def __init__(self, make_chunks: Callable[[], Iterator[Tuple[np.ndarray, np.ndarray]]],
+                 cache_prefix: Optional[str] = None, feature_types: Optional[List[str]] = None):
+        self._make_chunks = make_chunks
+        self._feature_types = feature_types
+        self._it = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data: Callable) -> int:
+        if self._it is None:
+            self._it = self._make_chunks()
+        try:
+            X, y = next(self._it)
+        except StopIteration:
+            return 0
+        input_data(data=X, label=y, feature_types=self._feature_types)
+        return 1
+
+    def reset(self):
+        self._it = None
+
+
+class StreamingMetrics:
+    """MAE, RMSE, R² and MAPE accumulated over chunks"""
+
+    def __init__(self):
+        self.n = 0
+        self.abs_err = 0.0
+        self.sq_err = 0.0
+        self.abs_pct = 0.0
+        self.y_sum = 0.0
+        self.y_sq_sum = 0.0
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray):
+        err = y_true - y_pred
+        self.n += len(y_true)
+        self.abs_err += float(np.abs(err).sum())
+        self.sq_err += float((err ** 2).sum())
+        self.abs_pct += float(np.abs(err / y_true).sum())
+        self.y_sum += float(y_true.sum())
+        self.y_sq_sum += float((y_true ** 2).sum())
+
+    def result(self) -> dict:
+        if not self.n:
+            return {"mae": float("nan"), "rmse": float("nan"), "r2": float("nan"), "mape": float("nan")}
+        ss_tot = self.y_sq_sum - self.y_sum ** 2 / self.n
+        return {
+            "mae": self.abs_err / self.n,
+            "rmse": (self.sq_err / self.n) ** 0.5,
+            "r2": 1 - self.sq_err / ss_tot if ss_tot else float("nan"),
+            "mape": 100 * self.abs_pct / self.n,
+        }
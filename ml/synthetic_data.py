@@ -0,0 +1,253 @@
+"""
+Vectorized synthetic data generator for training sets and DB fixtures
+
+Rows are generated in fixed-size chunks. Each chunk draws from its own
+numpy Generator spawned from one SeedSequence, so a given (seed, chunk_rows)
+always produces the same data regardless of how many worker processes write
+the shards or in which order they finish.
+
+Usage:
+    python -m ml.synthetic_data --rows 10000000 --out data/synthetic
+    python -m ml.synthetic_data --rows 100000 --format csv --out data/fixtures \\
+        --locality-ids localities.json   # CSV for POST /properties/bulk
+"""
+
+import argparse
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Realistic price per sqft ranges for Navi Mumbai localities
+LOCALITY_PRICE_RANGES = {
+    "Seawoods": (140000, 160000),
+    "CBD Belapur": (120000, 140000),
+    "Vashi": (110000, 130000),
+    "Nerul": (100000, 120000),
+    "Belapur": (100000, 120000),
+    "Kharghar": (80000, 100000),
+    "Koparkhairane": (90000, 110000),
+    "Airoli": (85000, 105000),
+    "Ghansoli": (75000, 95000),
+    "Kamothe": (65000, 85000),
+    "Panvel": (60000, 80000),
+    "Ulwe": (50000, 70000),
+    "Dronagiri": (45000, 65000),
+    "Taloje": (40000, 60000),
+}
+
+LOCALITIES = list(LOCALITY_PRICE_RANGES)
+
+BHK_CHOICES = np.array([1, 2, 3, 4])
+BHK_MULTIPLIER = np.array([0.0, 0.85, 1.0, 1.15, 1.3])  # indexed by bhk
+
+AMENITY_WEIGHTS = {
+    "lift": 0.02,
+    "parking": 0.02,
+    "gym": 0.01,
+    "swimming_pool": 0.02,
+    "gated_society": 0.02,
+    "cctv": 0.01,
+}
+
+MIN_PRICE = 3000000
+MAX_PRICE = 50000000
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+def generate_chunk(n_rows: int, rng: np.random.Generator, localities: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Generate one chunk of synthetic listings with prices
+
+    Args:
+        n_rows: Number of rows
+        rng: Generator to draw from
+        localities: Localities to sample (defaults to all 14)
+
+    Returns:
+        DataFrame with the training columns and a `price` target
+    """
+    localities = localities or LOCALITIES
+    locality_codes = rng.integers(0, len(localities), n_rows)
+    bhk = rng.choice(BHK_CHOICES, n_rows)
+    carpet_area = rng.uniform(500, 4000, n_rows)
+    building_age = rng.integers(0, 25, n_rows)
+
+    data = {
+        "locality": pd.Categorical.from_codes(locality_codes, categories=localities),
+        "bhk": bhk,
+        "carpet_area_sqft": carpet_area,
+        "floor_number": rng.integers(1, 20, n_rows),
+        "total_floors": rng.integers(5, 40, n_rows),
+        "building_age_years": building_age,
+    }
+    amenity_bonus = np.zeros(n_rows)
+    for name, weight in AMENITY_WEIGHTS.items():
+        flags = rng.integers(0, 2, n_rows, dtype=np.int8)
+        data[name] = flags
+        amenity_bonus += flags * weight
+    data["metro_distance_km"] = rng.uniform(0.5, 15, n_rows)
+    data["highway_distance_km"] = rng.uniform(1, 10, n_rows)
+
+    ranges = np.array([LOCALITY_PRICE_RANGES.get(name, (80000, 100000)) for name in localities], dtype=float)
+    low = ranges[locality_codes, 0]
+    high = ranges[locality_codes, 1]
+    base_price_per_sqft = low + (high - low) * rng.random(n_rows)
+
+    age_factor = np.select([building_age < 5, building_age > 15], [1.08, 0.92], 1.0)
+
+    price = base_price_per_sqft * BHK_MULTIPLIER[bhk] * (1 + amenity_bonus) * age_factor * carpet_area
+    # Small random variation, then realistic bounds for Navi Mumbai
+    price *= rng.uniform(0.95, 1.05, n_rows)
+    data["price"] = np.clip(price, MIN_PRICE, MAX_PRICE)
+
+    return pd.DataFrame(data)
+
+
+def _chunk_sizes(n_rows: int, chunk_rows: int) -> List[int]:
+    chunk_rows = max(1, chunk_rows)
+    full, rest = divmod(n_rows, chunk_rows)
+    return [chunk_rows] * full + ([rest] if rest else [])
+
+
+def iter_chunks(
+    n_rows: int,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    seed: int = 42,
+    localities: Optional[List[str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield n_rows of synthetic data as DataFrames of at most chunk_rows rows"""
+    sizes = _chunk_sizes(n_rows, chunk_rows)
+    for size, child in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))):
+        yield generate_chunk(size, np.random.default_rng(child), localities)
+
+
+def generate_synthetic_data(
+    n_rows: int,
+    seed: int = 42,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    localities: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Generate n_rows of synthetic data in memory"""
+    frames = list(iter_chunks(n_rows, chunk_rows, seed, localities))
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+def to_property_fixture(df: pd.DataFrame, locality_ids: Dict[str, int]) -> pd.DataFrame:
+    """Reshape generated rows into PropertyCreate columns for POST /properties/bulk"""
+    fixture = df.drop(columns=["locality", "metro_distance_km", "highway_distance_km"])
+    fixture.insert(0, "locality_id", df["locality"].map(locality_ids).astype("Int64"))
+    for name in AMENITY_WEIGHTS:
+        fixture[name] = fixture[name].astype(bool)
+    fixture["price"] = fixture["price"].round(0)
+    fixture["source"] = "synthetic"
+    return fixture[fixture["locality_id"].notna()]
+
+
+def _write_shard(
+    index: int,
+    size: int,
+    seed_seq: np.random.SeedSequence,
+    out_dir: str,
+    fmt: str,
+    locality_ids: Optional[Dict[str, int]],
+) -> str:
+    df = generate_chunk(size, np.random.default_rng(seed_seq))
+    if locality_ids is not None:
+        df = to_property_fixture(df, locality_ids)
+
+    path = Path(out_dir) / f"part-{index:05d}.{fmt}"
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return str(path)
+
+
+def write_shards(
+    n_rows: int,
+    out_dir: str,
+    fmt: str = "parquet",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    seed: int = 42,
+    workers: int = 1,
+    locality_ids: Optional[Dict[str, int]] = None,
+) -> List[str]:
+    """
+    Generate n_rows and write one shard file per chunk
+
+    Args:
+        n_rows: Total rows to generate
+        out_dir: Output directory (created if missing)
+        fmt: "parquet" (requires pyarrow) or "csv"
+        chunk_rows: Rows per shard
+        seed: Root seed; output is identical for any number of workers
+        workers: Processes generating shards in parallel
+        locality_ids: Locality name -> id; when given, shards are written as
+            property fixtures instead of training rows
+
+    Returns:
+        Shard paths in order
+    """
+    if fmt not in ("parquet", "csv"):
+        raise ValueError(f"Unsupported format: {fmt}")
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+
+    sizes = _chunk_sizes(n_rows, chunk_rows)
+    children = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(i, size, child, out_dir, fmt, locality_ids) for i, (size, child) in enumerate(zip(sizes, children))]
+
+    if workers <= 1:
+        return [_write_shard(*job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_write_shard, *job) for job in jobs]
+        return [future.result() for future in futures]
+
+
+def _load_locality_ids(path: str) -> Dict[str, int]:
+    """Accept {name: id} or the /localities/stats/all response body"""
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "localities" in data:
+        data = data["localities"]
+    if isinstance(data, list):
+        return {item["name"]: item["id"] for item in data}
+    return {name: int(locality_id) for name, locality_id in data.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Navi Mumbai listings")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--out", default="data/synthetic")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--locality-ids", default=None,
+                        help="JSON file mapping locality names to DB ids; writes property fixtures")
+    args = parser.parse_args()
+
+    locality_ids = _load_locality_ids(args.locality_ids) if args.locality_ids else None
+
+    started = time.perf_counter()
+    paths = write_shards(
+        args.rows, args.out, args.format, args.chunk_rows, args.seed, args.workers, locality_ids
+    )
+    elapsed = time.perf_counter() - started
+    logger.info(f"Wrote {args.rows:,} rows to {len(paths)} {args.format} shards in {args.out} "
+                f"({elapsed:.1f}s, {args.rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,372 @@
+"""
+Parallel hyperparameter search for the price models
+
+Candidates are sampled from per-model search spaces and scored with
+GroupKFold cross-validation grouped by locality (the PRD's "cross-validation
+across locality segments"), so a score measures how well the model carries
+over to localities it was not fitted on. Every fold fit stops early on its
+validation fold: XGBoost through early_stopping_rounds, RandomForest by
+growing trees in steps until the validation RMSE stops improving.
+
+Two strategies:
+
+- random: every candidate is scored once with the full tree budget;
+- halving: successive halving; all candidates start with a small tree
+  budget and only the best 1/eta of each rung moves on with eta times more.
+
+Candidates run across a process pool (one single-threaded fit per worker,
+so wall-clock time scales with cores). The search stops submitting work
+once the time budget is spent and in-flight candidates give up at their
+next fold. The leaderboard is written to JSON after every rung.
+
+Usage:
+    python -m ml.tuning --rows 20000 --candidates 24 --workers 8 --time-budget 300
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error, r2_score
+from sklearn.model_selection import GroupKFold
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_RANDOM = "random"
+STRATEGY_HALVING = "halving"
+
+LEADERBOARD_FILE = "tuning_leaderboard.json"
+
+# Each entry draws one value from a numpy Generator
+XGBOOST_SPACE: Dict[str, Callable] = {
+    "max_depth": lambda rng: int(rng.integers(3, 11)),
+    "learning_rate": lambda rng: float(10 ** rng.uniform(-2, np.log10(0.3))),
+    "subsample": lambda rng: float(rng.uniform(0.6, 1.0)),
+    "colsample_bytree": lambda rng: float(rng.uniform(0.6, 1.0)),
+    "min_child_weight": lambda rng: float(10 ** rng.uniform(0, np.log10(20))),
+    "reg_lambda": lambda rng: float(10 ** rng.uniform(-1, 1)),
+}
+
+RANDOM_FOREST_SPACE: Dict[str, Callable] = {
+    "max_depth": lambda rng: [None, 8, 12, 16, 24][rng.integers(5)],
+    "min_samples_leaf": lambda rng: int(rng.integers(1, 11)),
+    "max_features": lambda rng: [1.0, 0.7, 0.5, "sqrt"][rng.integers(4)],
+}
+
+SEARCH_SPACES = {
+    "xgboost": XGBOOST_SPACE,
+    "random_forest": RANDOM_FOREST_SPACE,
+}
+
+# Shared per-process data, loaded once by the pool initializer
+_WORKER = {}
+
+
+def sample_candidates(model_types: List[str], n_candidates: int, seed: int = 42) -> List[dict]:
+    """Draw n_candidates parameter sets, alternating between model types"""
+    rng = np.random.default_rng(seed)
+    candidates = []
+    for i in range(n_candidates):
+        model_type = model_types[i % len(model_types)]
+        space = SEARCH_SPACES[model_type]
+        candidates.append({
+            "id": i,
+            "model_type": model_type,
+            "params": {name: draw(rng) for name, draw in space.items()},
+        })
+    return candidates
+
+
+def locality_folds(groups: np.ndarray, n_splits: int) -> List[tuple]:
+    """GroupKFold splits with every locality in exactly one validation fold"""
+    n_splits = min(n_splits, len(np.unique(groups)))
+    dummy = np.zeros(len(groups))
+    return list(GroupKFold(n_splits=n_splits).split(dummy, groups=groups))
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray, folds: List[tuple], feature_types: Optional[List[str]]):
+    _WORKER.update(X=X, y=y, folds=folds, feature_types=feature_types)
+
+
+def _fit_xgboost(params: dict, n_estimators: int, early_stopping_rounds: int, seed: int,
+                 X_train, y_train, X_val, y_val, feature_types) -> tuple:
+    model = xgb.XGBRegressor(
+        n_estimators=n_estimators,
+        tree_method="hist",
+        enable_categorical=feature_types is not None,
+        feature_types=feature_types,
+        early_stopping_rounds=early_stopping_rounds,
+        random_state=seed,
+        n_jobs=1,
+        **params
+    )
+    model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+    return model.predict(X_val, iteration_range=(0, model.best_iteration + 1)), model.best_iteration + 1
+
+
+def _fit_random_forest(params: dict, n_estimators: int, early_stopping_rounds: int, seed: int,
+                       X_train, y_train, X_val, y_val, feature_types) -> tuple:
+    """Grow the forest in steps; stop when the validation RMSE stalls"""
+    step = max(10, n_estimators // 10)
+    patience = max(1, early_stopping_rounds // step)
+    model = RandomForestRegressor(n_estimators=0, warm_start=True, random_state=seed, n_jobs=1, **params)
+    best_rmse, best_pred, best_trees, stalled = np.inf, None, 0, 0
+    while model.n_estimators < n_estimators and stalled < patience:
+        model.n_estimators = min(n_estimators, model.n_estimators + step)
+        model.fit(X_train, y_train)
+        pred = model.predict(X_val)
+        rmse = mean_squared_error(y_val, pred) ** 0.5
+        if rmse < best_rmse * 0.999:
+            best_rmse, best_pred, best_trees, stalled = rmse, pred, model.n_estimators, 0
+        else:
+            stalled += 1
+    return best_pred, best_trees
+
+
+FITTERS = {
+    "xgboost": _fit_xgboost,
+    "random_forest": _fit_random_forest,
+}
+
+
+def evaluate_candidate(candidate: dict, n_estimators: int, early_stopping_rounds: int,
+                       deadline: float, seed: int = 42) -> dict:
+    """
+    Cross-validate one candidate on the worker's shared data
+
+    Args:
+        candidate: Entry from sample_candidates
+        n_estimators: Tree budget for this rung (upper bound; early stopping may use fewer)
+        early_stopping_rounds: Rounds without validation improvement before stopping
+        deadline: time.time() after which remaining folds are skipped
+        seed: Model seed
+
+    Returns:
+        Leaderboard row (status "ok" or "timeout")
+    """
+    X, y = _WORKER["X"], _WORKER["y"]
+    feature_types = _WORKER["feature_types"] if candidate["model_type"] == "xgboost" else None
+    fit = FITTERS[candidate["model_type"]]
+
+    started = time.perf_counter()
+    rmses, r2s, trees = [], [], []
+    status = "ok"
+    for train_idx, val_idx in _WORKER["folds"]:
+        if time.time() > deadline:
+            status = "timeout"
+            break
+        pred, used = fit(candidate["params"], n_estimators, early_stopping_rounds, seed,
+                         X[train_idx], y[train_idx], X[val_idx], y[val_idx], feature_types)
+        rmses.append(mean_squared_error(y[val_idx], pred) ** 0.5)
+        r2s.append(r2_score(y[val_idx], pred))
+        trees.append(used)
+
+    return {
+        **candidate,
+        "n_estimators": n_estimators,
+        "best_n_estimators": int(np.mean(trees)) if trees else None,
+        "rmse": float(np.mean(rmses)) if rmses else None,
+        "rmse_std": float(np.std(rmses)) if rmses else None,
+        "r2": float(np.mean(r2s)) if r2s else None,
+        "folds": len(rmses),
+        "fit_seconds": time.perf_counter() - started,
+        "status": status,
+    }
+
+
+class HyperparameterSearch:
+    """Random or successive-halving search over a process pool"""
+
+    def __init__(
+        self,
+        model_types: List[str] = ("xgboost", "random_forest"),
+        n_candidates: int = 24,
+        strategy: str = STRATEGY_HALVING,
+        workers: Optional[int] = None,
+        time_budget_seconds: float = 600,
+        n_splits: int = 5,
+        min_estimators: int = 50,
+        max_estimators: int = 800,
+        eta: int = 3,
+        early_stopping_rounds: int = 20,
+        seed: int = 42,
+        output_dir: str = "./models",
+    ):
+        if strategy not in (STRATEGY_RANDOM, STRATEGY_HALVING):
+            raise ValueError(f"Unknown search strategy: {strategy}")
+        for model_type in model_types:
+            if model_type not in SEARCH_SPACES:
+                raise ValueError(f"No search space for model type: {model_type}")
+        self.model_types = list(model_types)
+        self.n_candidates = n_candidates
+        self.strategy = strategy
+        self.workers = workers or os.cpu_count() or 1
+        self.time_budget_seconds = time_budget_seconds
+        self.n_splits = n_splits
+        self.min_estimators = min_estimators
+        self.max_estimators = max_estimators
+        self.eta = max(2, eta)
+        self.early_stopping_rounds = early_stopping_rounds
+        self.seed = seed
+        self.leaderboard_path = Path(output_dir) / LEADERBOARD_FILE
+        self.leaderboard: List[dict] = []
+
+    def rungs(self) -> List[int]:
+        """Tree budget of every rung (a single full-budget rung for random search)"""
+        if self.strategy == STRATEGY_RANDOM:
+            return [self.max_estimators]
+        budgets = []
+        budget = self.min_estimators
+        while budget < self.max_estimators:
+            budgets.append(budget)
+            budget *= self.eta
+        return budgets + [self.max_estimators]
+
+    def run(self, X: np.ndarray, y: np.ndarray, groups: np.ndarray,
+            feature_types: Optional[List[str]] = None) -> List[dict]:
+        """
+        Search the spaces and persist the leaderboard
+
+        Args:
+            X: Feature matrix
+            y: Target
+            groups: Locality of every row (fold grouping)
+            feature_types: XGBoost feature types (e.g. "c" for the locality code)
+
+        Returns:
+            Leaderboard rows, best (lowest CV RMSE) first
+        """
+        deadline = time.time() + self.time_budget_seconds
+        folds = locality_folds(np.asarray(groups), self.n_splits)
+        survivors = sample_candidates(self.model_types, self.n_candidates, self.seed)
+        logger.info(f"Tuning {len(survivors)} candidates ({self.strategy}, rungs {self.rungs()}) "
+                    f"on {len(X):,} rows, {len(folds)} locality folds, {self.workers} workers")
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(np.asarray(X, dtype=float), np.asarray(y, dtype=float), folds, feature_types),
+        ) as pool:
+            for rung, budget in enumerate(self.rungs()):
+                results = self._run_rung(pool, survivors, budget, deadline)
+                for row in results:
+                    row["rung"] = rung
+                self.leaderboard.extend(results)
+                self._save()
+
+                finished = sorted((r for r in results if r["status"] == "ok"), key=lambda r: r["rmse"])
+                if time.time() > deadline:
+                    logger.warning(f"Time budget of {self.time_budget_seconds}s spent after rung {rung}")
+                    break
+                keep = max(1, len(finished) // self.eta)
+                survivors = [
+                    {key: r[key] for key in ("id", "model_type", "params")} for r in finished[:keep]
+                ]
+                if len(finished) <= 1:
+                    break
+
+        self.leaderboard = self.ranked()
+        self._save()
+        if self.leaderboard:
+            best = self.leaderboard[0]
+            logger.info(f"Best: {best['model_type']} {best['params']} "
+                        f"(CV RMSE ₹{best['rmse']:,.0f}, R² {best['r2']:.4f}, {best['best_n_estimators']} trees)")
+        return self.leaderboard
+
+    def _run_rung(self, pool: ProcessPoolExecutor, candidates: List[dict], budget: int, deadline: float) -> List[dict]:
+        pending = {
+            pool.submit(evaluate_candidate, c, budget, self.early_stopping_rounds, deadline, self.seed)
+            for c in candidates
+        }
+        results = []
+        while pending:
+            remaining = deadline - time.time()
+            done, pending = wait(pending, timeout=max(remaining, 0) + 1, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.error(f"Candidate failed: {e}")
+            if not done and remaining <= 0:
+                # Queued candidates never start; running ones stop at their next fold
+                for future in pending:
+                    future.cancel()
+        return results
+
+    def ranked(self) -> List[dict]:
+        """Completed rows, deepest rung first, then by CV RMSE"""
+        finished = [r for r in self.leaderboard if r["status"] == "ok"]
+        return sorted(finished, key=lambda r: (-r["rung"], r["rmse"])) + [
+            r for r in self.leaderboard if r["status"] != "ok"
+        ]
+
+    def best_params(self) -> Optional[dict]:
+        """Model type and constructor params of the winner, with its early-stopped tree count"""
+        ranked = self.ranked()
+        if not ranked or ranked[0]["status"] != "ok":
+            return None
+        best = ranked[0]
+        return {
+            "model_type": best["model_type"],
+            "params": {**best["params"], "n_estimators": best["best_n_estimators"]},
+        }
+
+    def _save(self):
+        self.leaderboard_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.leaderboard_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "strategy": self.strategy,
+                "time_budget_seconds": self.time_budget_seconds,
+                "n_splits": self.n_splits,
+                "rungs": self.rungs(),
+                "best": self.best_params(),
+                "leaderboard": self.ranked(),
+            }, f, indent=2, default=str)
+        os.replace(tmp_path, self.leaderboard_path)
+
+
+def main():
+    try:
+        from ml.model_trainer import ModelTrainer
+    except ImportError:  # run as a script: python ml/tuning.py
+        from model_trainer import ModelTrainer
+
+    parser = argparse.ArgumentParser(description="Hyperparameter search for the house price model")
+    parser.add_argument("--data", default=None, help="Training CSV (synthetic data if omitted)")
+    parser.add_argument("--rows", type=int, default=20_000, help="Synthetic rows when --data is omitted")
+    parser.add_argument("--models", nargs="+", default=["xgboost", "random_forest"], choices=list(SEARCH_SPACES))
+    parser.add_argument("--strategy", choices=[STRATEGY_HALVING, STRATEGY_RANDOM], default=STRATEGY_HALVING)
+    parser.add_argument("--candidates", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--time-budget", type=float, default=600, help="Seconds")
+    parser.add_argument("--train-best", action="store_true", help="Train and save the winning model")
+    args = parser.parse_args()
+
+    trainer = ModelTrainer(data_path=args.data)
+    df = pd.read_csv(args.data) if args.data else trainer._create_sample_data(args.rows)
+    trainer.tune(
+        df,
+        model_types=args.models,
+        n_candidates=args.candidates,
+        strategy=args.strategy,
+        workers=args.workers,
+        time_budget_seconds=args.time_budget,
+    )
+    if args.train_best and trainer.best_params:
+        trainer.train(df, model_type=trainer.best_params["model_type"], params=trainer.best_params["params"])
+        trainer.save_model()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
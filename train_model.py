@@ -31,16 +31,16 @@ def main():
     # Save model artifacts
     print("\n[2/2] Saving Model Artifacts...")
     print("-" * 70)
-    trainer.save_model()
+    bundle_path = trainer.save_model()
     
     print("\n" + "=" * 70)
     print("✅ MODEL TRAINING COMPLETE!")
     print("=" * 70)
     print(f"""
-Model Artifacts Successfully Created:
-  ✓ models/xgboost_model.pkl (trained model)
-  ✓ models/scaler.pkl (feature scaler)
-  ✓ models/feature_names.pkl (feature names)
+Model Bundle {bundle_path.name} Published:
+  ✓ {bundle_path}/manifest.json (version, features, localities, metrics, checksums)
+  ✓ {bundle_path}/model.ubj (serving model, takes raw features)
+  ✓ {bundle_path}/compiled/*.npy (flattened trees for NumPy inference)
 
 Performance Metrics:
   Mean Absolute Error (MAE):    ₹{metrics['mae']:,.0f}